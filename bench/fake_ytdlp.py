@@ -0,0 +1,166 @@
+"""
+Stand-in for yt_dlp.YoutubeDL serving synthetic channels, so the sync can be benchmarked without touching YouTube
+
+Channels, playlists and video details follow the manifest returned by synthetic_archive.generate_channel_tree(),
+downloads write synthetic MP4/M4A files. Only the parts of the YoutubeDL interface ArchiveTube uses are provided.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+
+import yt_dlp
+
+import synthetic_archive
+
+
+class FakeYoutubeDL:
+    # Set by install()
+    manifest = None
+    channel_by_link = {}
+    request_latency = 0.0
+    page_size = 100
+    stats = None
+    stats_lock = threading.Lock()
+    # Pure function, the real one works just fine
+    sanitize_info = staticmethod(yt_dlp.YoutubeDL.sanitize_info)
+
+    def __init__( self, params: dict | None = None ):
+        self.params = dict(params or {})
+        # Real YoutubeDL normalizes output template to a dict, ArchiveTube relies on that when reusing instances
+        if not isinstance(self.params.get("outtmpl"), dict):
+            self.params["outtmpl"] = { "default": self.params.get("outtmpl", "%(title)s [%(id)s].%(ext)s") }
+        self._download_retcode = 0
+        self.count("instances")
+
+    @classmethod
+    def count( cls, key: str, amount: int = 1 ):
+        with cls.stats_lock:
+            cls.stats[key] = cls.stats.get(key, 0) + amount
+
+    def request( self ):
+        self.count("requests")
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+    def extract_info( self, url: str, download: bool = True, process: bool = True ) -> dict:
+        self.request()
+        if "watch?v=" in url:
+            return self.video_info(url.split("watch?v=", 1)[1])
+
+        if "playlist?list=UU" in url:
+            channel_idx = int(url.rsplit("UUbench", 1)[1])
+            return {
+                "_type": "playlist",
+                "id": f"UUbench{channel_idx:04d}",
+                "title": f"Uploads from {self.manifest["channels"][channel_idx]["Name"]}",
+                "entries": self.playlist_entries(channel_idx),
+            }
+
+        if url.endswith("/streams"):
+            return { "_type": "playlist", "id": url, "title": "Live", "entries": [] }
+
+        channel_idx = self.channel_by_link[url]
+        return {
+            "_type": "playlist",
+            "id": f"UCbench{channel_idx:04d}",
+            "channel_id": f"UCbench{channel_idx:04d}",
+            "title": self.manifest["channels"][channel_idx]["Name"],
+            "entries": [],
+        }
+
+    def playlist_entries( self, channel_idx: int ):
+        """
+        Flat entries, newest first - like with process=False they are generated lazily and every page is a request
+        """
+        approximate_date = "approximate_date" in self.params.get("extractor_args", {}).get("youtubetab", {})
+        for video_idx in range(self.manifest["new_videos"] + self.manifest["files_per_channel"]):
+            if video_idx and video_idx % self.page_size == 0:
+                self.request()
+            video_id = synthetic_archive.video_id(channel_idx, video_idx)
+            self.count("entries")
+            yield {
+                "_type": "url",
+                "ie_key": "Youtube",
+                "id": video_id,
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "title": f"Bench video {video_idx:05d}",
+                "duration": synthetic_archive.VIDEO_DURATION,
+                "live_status": None,
+                # YouTube says just "3 days ago", the fake is exact
+                "timestamp": synthetic_archive.video_timestamp(video_idx, self.manifest["now"]) if approximate_date else None,
+            }
+
+    def video_info( self, video_id: str ) -> dict:
+        video_idx = int(video_id[5:10])
+        timestamp = synthetic_archive.video_timestamp(video_idx, self.manifest["now"])
+        return {
+            "id": video_id,
+            "title": f"Bench video {video_idx:05d}",
+            "timestamp": timestamp,
+            "upload_date": datetime.datetime.fromtimestamp(timestamp).strftime("%Y%m%d"),
+            "duration": synthetic_archive.VIDEO_DURATION,
+            "live_status": "not_live",
+            "is_live": False,
+            "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+            "formats": [{
+                "format_id": "18",
+                "ext": "mp4",
+                "url": f"https://bench.invalid/videoplayback?id={video_id}&expire={int(time.time()) + 6 * 3600}",
+            }],
+        }
+
+    def download( self, urls: list ) -> int:
+        for url in urls:
+            self.request()
+            self.process_ie_result(self.video_info(url.split("watch?v=", 1)[1]))
+        return self._download_retcode
+
+    def process_ie_result( self, info: dict, download: bool = True ) -> dict:
+        """
+        Download video from already extracted info, no request is made for it
+        """
+        if download:
+            audio = any(pp.get("key") == "FFmpegExtractAudio" for pp in self.params.get("postprocessors", []))
+            file_base_name = self.params["outtmpl"]["default"].replace(".%(ext)s", "")
+            file_base_path = os.path.join(self.params.get("paths", {}).get("home", "."), file_base_name)
+            file_path = f"{file_base_path}.{"m4a" if audio else "mp4"}"
+
+            media_day = datetime.datetime.fromtimestamp(info["timestamp"]).strftime(synthetic_archive.MEDIA_DAY_FORMAT)
+            data = synthetic_archive.build_mp4(info["id"], info["title"], media_day, audio=audio)
+            for progress_hook in self.params.get("progress_hooks", []):
+                for downloaded in (0, len(data) // 2, len(data)):
+                    progress_hook({ "status": "downloading", "downloaded_bytes": downloaded, "total_bytes": len(data),
+                                    "info_dict": info, "_percent": 100 * downloaded / len(data) })
+                progress_hook({ "status": "finished", "info_dict": info })
+
+            with open(file_path, "wb") as media_file:
+                media_file.write(data)
+            if self.params.get("writeinfojson"):
+                with open(f"{file_base_path}.info.json", "w") as info_file:
+                    json.dump(info, info_file)
+            if not self.params.get("no_mtime"):
+                os.utime(file_path, (info["timestamp"], info["timestamp"]))
+
+            for post_hook in self.params.get("post_hooks", []):
+                post_hook(file_path)
+            self.count("downloads")
+
+        return info
+
+    def close( self ):
+        pass
+
+
+def install( manifest: dict, request_latency: float = 0.0, page_size: int = 100 ) -> type[FakeYoutubeDL]:
+    """
+    Replace yt_dlp.YoutubeDL with FakeYoutubeDL serving channels from the manifest
+    """
+    FakeYoutubeDL.manifest = manifest
+    FakeYoutubeDL.channel_by_link = { channel["Link"]: idx for idx, channel in enumerate(manifest["channels"]) }
+    FakeYoutubeDL.request_latency = request_latency
+    FakeYoutubeDL.page_size = page_size
+    FakeYoutubeDL.stats = {}
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    return FakeYoutubeDL
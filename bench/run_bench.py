@@ -0,0 +1,187 @@
+"""
+Offline benchmark of ArchiveTube hot paths
+
+Generates a synthetic archive (tiny MP4/M4A files with real metadata atoms), replaces yt-dlp with FakeYoutubeDL
+serving matching channels and times the sync stages one by one, reporting throughput of each and peak of Python
+memory it allocated (on top of what was allocated before it started). Nothing is sent to YouTube or media servers.
+
+Example:
+    python bench/run_bench.py --channels 20 --files 50000 --new-videos 5 --json bench_output.json
+
+ArchiveTube environment variables (download_threads, extraction_threads, ...) apply as usual, request_rate defaults
+to 0 (no throttling) here.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_FOLDER)
+sys.path.insert(0, os.path.dirname(BENCH_FOLDER))
+
+import fake_ytdlp
+import synthetic_archive
+
+
+class Benchmark:
+    def __init__( self, trace_memory: bool ):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def measure( self, name: str, func, unit: str, items=None ):
+        """
+        Run func once and record its duration, items is either a number or a callable taking func's return value
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        ret = func()
+        seconds = time.perf_counter() - start_time
+        # Memory allocated by the stage on top of what was already there when it started
+        peak_memory = tracemalloc.get_traced_memory()[1] - start_memory if self.trace_memory else None
+
+        item_count = items(ret) if callable(items) else items
+        result = {
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "items": item_count,
+            "unit": unit,
+            "rate": round(item_count / seconds, 1) if item_count is not None and seconds > 0 else None,
+            "peak_memory": peak_memory,
+        }
+        self.results.append(result)
+        print(self.format_result(result), flush=True)
+        return ret
+
+    @staticmethod
+    def format_result( result: dict ) -> str:
+        rate = f"{result["rate"]:>12,.1f} {result["unit"]}/s" if result["rate"] is not None else " " * 14 + " " * len(result["unit"])
+        items = f"{result["items"]:>9,}" if result["items"] is not None else " " * 9
+        memory = f"{result["peak_memory"] / 2**20:>+9.1f} MiB" if result["peak_memory"] is not None else ""
+        return f"{result["stage"]:<48} {result["seconds"]:>9.3f} s {items} {rate:<24} {memory}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark of ArchiveTube hot paths")
+    parser.add_argument("--channels", type=int, default=10, help="number of synthetic channels (default: %(default)s)")
+    parser.add_argument("--files", type=int, default=10000, help="total number of archived media files (default: %(default)s)")
+    parser.add_argument("--audio-channels", type=int, default=0, help="how many of the channels are audio only (default: %(default)s)")
+    parser.add_argument("--new-videos", type=int, default=2, help="not yet archived videos per channel, downloaded by the sync (default: %(default)s)")
+    parser.add_argument("--payload-size", type=int, default=1024, help="size of media data in each file in bytes (default: %(default)s)")
+    parser.add_argument("--request-latency", type=float, default=0.0, help="simulated latency of each YouTube request in seconds (default: %(default)s)")
+    parser.add_argument("--keep-days", type=float, default=None, help="Keep_Days used for the cleanup stage (default: half of the archive is removed)")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the channel list load (default: %(default)s)")
+    parser.add_argument("--workdir", help="where to generate the archive (default: new temporary folder)")
+    parser.add_argument("--keep", action="store_true", help="do not remove the generated archive afterwards")
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory (tracing slows everything down)")
+    parser.add_argument("--verbose", action="store_true", help="keep ArchiveTube logs below WARNING enabled (they cost time too)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    files_per_channel = max(1, args.files // args.channels)
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="archivetube-bench-"))
+    bench = Benchmark(trace_memory=not args.no_memory)
+    json_path = os.path.abspath(args.json) if args.json else None
+    if bench.trace_memory:
+        tracemalloc.start()
+
+    print(f"Archive: {args.channels} channels x {files_per_channel} files (+{args.new_videos} new videos each) in {workdir}")
+    manifest = bench.measure("generate synthetic archive", lambda: synthetic_archive.generate_channel_tree(
+        workdir, args.channels, files_per_channel, new_videos=args.new_videos, audio_channels=args.audio_channels,
+        payload_size=args.payload_size), "files", lambda m: m["file_count"])
+    fake = fake_ytdlp.install(manifest, request_latency=args.request_latency)
+
+    # ArchiveTube works with folders relative to the current directory and starts right on import
+    os.chdir(workdir)
+    os.environ.pop("XDG_CACHE_HOME", None)
+    os.environ.setdefault("request_rate", "0")
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    def start():
+        from src import ArchiveTube
+        ArchiveTube.data_handler.startup_count_thread.join()
+        return ArchiveTube.data_handler
+
+    data_handler = bench.measure("startup (incl. counting files, cold index)", start, "files", manifest["file_count"])
+    channels = list(data_handler.req_channel_list)
+    channel_folders = [ data_handler.get_channel_folder_path(channel) for channel in channels ]
+
+    def load_channel_list():
+        for _ in range(args.repeat):
+            data_handler.req_channel_list = []
+            data_handler.load_channel_list_from_file()
+
+    bench.measure("load_channel_list_from_file", load_channel_list, "channels", len(channels) * args.repeat)
+    channels = list(data_handler.req_channel_list)
+
+    def count_media_files():
+        return sum(data_handler.count_media_files(channel_folder)[0] for channel_folder in channel_folders)
+
+    with data_handler.archive_index.lock, data_handler.archive_index.db:
+        data_handler.archive_index.db.execute("DELETE FROM files")
+    bench.measure("count_media_files (cold index)", count_media_files, "files", lambda count: count)
+    bench.measure("count_media_files (warm index)", count_media_files, "files", lambda count: count)
+
+    folder_files = bench.measure("get_list_of_files_from_channel_folder", lambda: [
+        data_handler.get_list_of_files_from_channel_folder(channel_folder) for channel_folder in channel_folders
+    ], "files", lambda files: sum(len(folder_info["filename_list"]) for folder_info in files))
+
+    def get_videos():
+        entries = fake.stats.get("entries", 0)
+        for channel, current_channel_files in zip(channels, folder_files):
+            data_handler.get_list_of_videos_from_youtube(channel, current_channel_files)
+        return fake.stats.get("entries", 0) - entries
+
+    bench.measure("get_list_of_videos_from_youtube", get_videos, "entries", lambda entries: entries)
+
+    def sync():
+        with data_handler.video_info_cache.lock:
+            data_handler.video_info_cache.data.clear()
+        downloads = fake.stats.get("downloads", 0)
+        data_handler.master_queue()
+        return fake.stats.get("downloads", 0) - downloads
+
+    bench.measure("master_queue (full sync, cold video info cache)", sync, "downloads", lambda downloads: downloads)
+
+    keep_days = args.keep_days
+    if keep_days is None:
+        keep_days = (args.new_videos + files_per_channel / 2) * synthetic_archive.VIDEO_INTERVAL / 86400
+    folder_scans = [ data_handler.scan_channel_folder(channel_folder) for channel_folder in channel_folders ]
+
+    def cleanup():
+        return sum(data_handler.cleanup_old_files(channel_folder, channel | { "Keep_Days": keep_days }, folder_scan)
+                   for channel, channel_folder, folder_scan in zip(channels, channel_folders, folder_scans))
+
+    bench.measure(f"cleanup_old_files (Keep_Days={keep_days:g})", cleanup, "files", lambda removed: removed)
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(f"Max RSS {max_rss / 2**20:.1f} MiB, fake YouTube requests: {fake.stats.get("requests", 0)}, "
+          f"YoutubeDL instances: {fake.stats.get("instances", 0)}")
+
+    if json_path:
+        with open(json_path, "w") as json_file:
+            json.dump({ "args": vars(args), "max_rss": max_rss, "fake_stats": fake.stats, "results": bench.results },
+                      json_file, indent=4)
+
+    if not args.keep and not args.workdir:
+        os.chdir(BENCH_FOLDER)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Background threads of ArchiveTube would keep running otherwise
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
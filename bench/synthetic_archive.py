@@ -0,0 +1,135 @@
+"""
+Generator of synthetic channel trees for benchmarks
+
+Media files are tiny but valid MP4/M4A containers (ftyp + moov with iTunes metadata + mdat) carrying the same
+\xa9cmt (video ID) and \xa9day (timestamp) atoms that ArchiveTube reads from real downloads. They are assembled by
+hand, so no ffmpeg is needed to generate even 100k of them.
+"""
+import datetime
+import json
+import os
+import struct
+import time
+
+MEDIA_DAY_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Synthetic uploads are spread backwards in time from now, one every VIDEO_INTERVAL seconds
+VIDEO_INTERVAL = 6 * 3600
+VIDEO_DURATION = 600
+
+
+def atom( atom_type: bytes, payload: bytes ) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), atom_type) + payload
+
+
+def full_atom( atom_type: bytes, payload: bytes, version: int = 0, flags: int = 0 ) -> bytes:
+    return atom(atom_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def text_item( item_type: bytes, value: str ) -> bytes:
+    # Data atom with type indicator 1 (UTF-8) and empty locale
+    return atom(item_type, atom(b"data", struct.pack(">II", 1, 0) + value.encode("utf-8")))
+
+
+def build_mp4( video_id: str, title: str, media_day: str, audio: bool = False, payload_size: int = 1024 ) -> bytes:
+    """
+    Minimal MP4 (or M4A with audio=True) with video ID, title and timestamp in its metadata
+    """
+    ftyp = atom(b"ftyp", (b"M4A " if audio else b"isom") + struct.pack(">I", 0x200) + b"isomiso2mp41")
+
+    identity_matrix = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    mvhd = full_atom(b"mvhd", struct.pack(">IIII", 0, 0, 1000, VIDEO_DURATION * 1000) + struct.pack(">IH", 0x10000, 0x100)
+                     + bytes(10) + identity_matrix + bytes(24) + struct.pack(">I", 2))
+
+    hdlr = full_atom(b"hdlr", bytes(4) + b"mdir" + b"appl" + bytes(8) + b"\0")
+    ilst = atom(b"ilst", text_item(b"\xa9nam", title) + text_item(b"\xa9cmt", video_id) + text_item(b"\xa9day", media_day))
+    udta = atom(b"udta", full_atom(b"meta", hdlr + ilst))
+
+    return ftyp + atom(b"moov", mvhd + udta) + atom(b"mdat", bytes(payload_size))
+
+
+def video_id( channel_idx: int, video_idx: int ) -> str:
+    """
+    Synthetic video ID, 11 characters like the real ones (and matched by VIDEO_ID_IN_FILENAME_RE)
+    """
+    return f"c{channel_idx:03d}v{video_idx:05d}A"
+
+
+def video_timestamp( video_idx: int, now: float ) -> float:
+    return now - (video_idx + 1) * VIDEO_INTERVAL
+
+
+def channel_entry( channel_idx: int, **overrides ) -> dict:
+    """
+    Channel configuration as stored in channel_list.json
+    """
+    return {
+        "Name": f"Bench Channel {channel_idx:04d}",
+        "Link": f"https://www.youtube.com/@benchchannel{channel_idx:04d}",
+        "Paused": False,
+        "DL_Days": -1,
+        "Keep_Days": -1,
+        "Filter_Title_Text": "",
+        "Negate_Filter": False,
+        "Search_Limit": 0,
+        "Live_Rule": "Ignore",
+        "Audio_Only": False,
+        "Use_SponsorBlock": False,
+        "Use_Best_Quality": False,
+        "Write_Info_Json": True,
+        "Set_Mtime": True,
+    } | overrides
+
+
+def generate_channel_tree( root_folder: str, channels: int, files_per_channel: int, new_videos: int = 0,
+                           audio_channels: int = 0, payload_size: int = 1024, now: float | None = None ) -> dict:
+    """
+    Create config/channel_list.json and downloads (audio_downloads) folders with archived files of all channels
+
+    Channel i has files for videos new_videos .. new_videos + files_per_channel - 1, videos 0 .. new_videos - 1 are
+    newer ones the fake extractor offers but that are not archived yet. The last audio_channels channels are audio
+    only. Returns manifest describing the tree, FakeYoutubeDL serves playlists according to it.
+    """
+    now = time.time() if now is None else now
+    channel_list = []
+    file_count = 0
+    total_size = 0
+
+    for channel_idx in range(channels):
+        audio = channel_idx >= channels - audio_channels
+        channel = channel_entry(channel_idx, Audio_Only=audio)
+        channel_list.append(channel)
+
+        channel_folder = os.path.join(root_folder, "audio_downloads" if audio else "downloads", channel["Name"])
+        os.makedirs(channel_folder, exist_ok=True)
+        for video_idx in range(new_videos, new_videos + files_per_channel):
+            vid = video_id(channel_idx, video_idx)
+            title = f"Bench video {video_idx:05d}"
+            timestamp = video_timestamp(video_idx, now)
+            media_day = datetime.datetime.fromtimestamp(timestamp).strftime(MEDIA_DAY_FORMAT)
+
+            file_base_path = os.path.join(channel_folder, f"{title} [{vid}]")
+            file_path = f"{file_base_path}.{"m4a" if audio else "mp4"}"
+            data = build_mp4(vid, title, media_day, audio=audio, payload_size=payload_size)
+            with open(file_path, "wb") as media_file:
+                media_file.write(data)
+            with open(f"{file_base_path}.info.json", "w") as info_file:
+                json.dump({ "id": vid, "title": title, "timestamp": timestamp }, info_file)
+
+            # Set_Mtime is on, so mtime matches the upload time as it would after a real download
+            os.utime(file_path, (timestamp, timestamp))
+            file_count += 1
+            total_size += len(data)
+
+    config_folder = os.path.join(root_folder, "config")
+    os.makedirs(config_folder, exist_ok=True)
+    with open(os.path.join(config_folder, "channel_list.json"), "w") as json_file:
+        json.dump(channel_list, json_file, indent=4)
+
+    return {
+        "now": now,
+        "channels": channel_list,
+        "files_per_channel": files_per_channel,
+        "new_videos": new_videos,
+        "file_count": file_count,
+        "total_size": total_size,
+    }
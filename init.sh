@@ -21,7 +21,12 @@ echo -e " - ArchiveTube: ${RELEASE_VERSION:-?}"
 echo -e "\e[1mEnvironment:\e[0m"
 
 for V in PWD SHELL PUID PGID video_format_id audio_format_id defer_hours thread_limit fallback_vcodec fallback_acodec subtitles \
-         subtitle_languages verbose_logs; do
+         subtitle_languages verbose_logs startup_scan_threads video_cache_days video_cache_live_minutes video_cache_size \
+         metadata_threads download_threads channel_download_threads download_rate_limit cleanup_threads \
+         extraction_threads request_rate request_burst slow_request_rate \
+         adaptive_schedule schedule_min_hours schedule_max_hours \
+         partial_max_age_days partial_max_size media_scan_delay sync_reports_kept channel_resolve_days \
+         ytdlp_worker_processes ytdlp_worker_max_jobs ytdlp_worker_max_memory ARCHIVETUBE_ROLE ARCHIVETUBE_WORKER_ID ARCHIVETUBE_METRICS_PORT; do
   echo -n " - ${V}"
   eval VAL="\$${V}"
   if [ ${#VAL} -eq 0 ]; then
@@ -40,5 +45,10 @@ mkdir -p /archivetube/downloads /archivetube/audio_downloads /archivetube/config
 chown -R "${PUID}:${PGID}" /archivetube
 
 
+if [ "${ARCHIVETUBE_ROLE}" = "worker" ]; then
+  echo "Running ArchiveTube sync worker..."
+  exec su-exec "${PUID}:${PGID}" python src/sync_worker.py
+fi
+
 echo "Running ArchiveTube..."
 exec su-exec "${PUID}:${PGID}" gunicorn src.ArchiveTube:app -c gunicorn_config.py
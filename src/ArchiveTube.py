@@ -2,28 +2,62 @@ import logging
 import pprint
 import re
 import os
+import posixpath
 import json
 import time
 import datetime
 import threading
+import sqlite3
+import atexit
+import collections
+import heapq
+import random
+import contextlib
+import sys
+import subprocess
+import fcntl
+import socket
 from numbers import Number
 
 from gevent import monkey
 from mutagen.mp4 import MP4
 import concurrent.futures
-from flask import Flask, render_template
-from flask_socketio import SocketIO
+from flask import Flask, Response, render_template
+from flask_socketio import SocketIO, emit
 import yt_dlp
 from plexapi.server import PlexServer
 import requests
-import tempfile
+import shutil
+import hashlib
 
 monkey.patch_all()
 
 PERMANENT_RETENTION = -1
 VIDEO_EXTENSIONS = {".mp4", ".mkv"}
 AUDIO_EXTENSIONS = {".m4a"}
+SUBTITLE_EXTENSIONS = {".srt"}
 MEDIA_FILE_EXTENSIONS = VIDEO_EXTENSIONS.union(AUDIO_EXTENSIONS)
+PREFETCH_MAX_ENTRIES = 50
+CHANNEL_UPDATE_INTERVAL = 0.5
+PROGRESS_UPDATE_INTERVAL = 1.0
+LAST_SYNCED_FORMAT = "%d-%m-%y %H:%M:%S"
+PROFILER_INTERVAL = 0.01
+SYNC_REPORT_NAME_RE = re.compile(r"^sync-\d{8}-\d{6}(-[\w-]+)?$", re.ASCII)
+VIDEO_ID_IN_FILENAME_RE = re.compile(r"\[([0-9A-Za-z_-]{10,}[048AEIMQUYcgkosw])\]")
+# Flat playlist entries carry only approximate upload time ("3 weeks ago"), so enumeration stops at them early only
+# once they are this many times older than the cut-off date
+APPROXIMATE_CUTOFF_FACTOR = 2
+# Signed stream URLs carry their expiry either in query (expire=...) or in path (/expire/...) of manifests
+STREAM_URL_EXPIRE_RE = re.compile(r"[?&/]expire[=/](\d+)")
+# Extracted info handed over to the downloader is used only while its stream URLs stay valid for at least this long
+EXTRACTED_INFO_EXPIRY_MARGIN = 1800
+# How long extracted info is considered usable when its stream URLs don't say when they expire
+EXTRACTED_INFO_MAX_AGE = 3 * 3600
+SYNC_ROLES = ("all", "web", "worker")
+# Channel lease of a sync worker expires unless renewed by its heartbeat, so channels of a dead worker get taken over
+SYNC_LEASE_TTL = 120
+# How often sync workers look for sync requests and web frontends for channel state written by the workers
+SYNC_POLL_INTERVAL = 5
 
 
 def video_duration_filter( info, *, incomplete ):
@@ -50,6 +84,84 @@ def number_si_suffix( num: Number ) -> str:
     return f"{num:.1f}Y"
 
 
+def parse_si_number( text: str ) -> float:
+    """
+    Convert number with optional SI suffix (as produced by number_si_suffix, e.g. "2.5M") back to a number
+    """
+    text = text.strip()
+    for exponent, unit in enumerate(("k", "M", "G", "T", "P", "E", "Z", "Y"), start=1):
+        if text[-1:].upper() == unit.upper():
+            return float(text[:-1]) * 1024.0 ** exponent
+    return float(text)
+
+
+def compile_title_filter( text: str ) -> re.Pattern | None:
+    """
+    Compile title filter text of a channel, matching is case-insensitive
+
+    Text prefixed with "re:" is a regular expression, text prefixed with "any:" is a list of terms separated by ";"
+    and any of them has to be in the title. Anything else is a single term, matched as a whole like it always was.
+    Returns None for an empty filter, raises re.error for an invalid expression.
+    """
+    if text.startswith("re:"):
+        return re.compile(text[3:], re.IGNORECASE)
+
+    if text.startswith("any:"):
+        terms = [ term.strip() for term in text[4:].split(";") ]
+    else:
+        terms = [text]
+    terms = [ term for term in terms if term ]
+    return re.compile("|".join(map(re.escape, terms)), re.IGNORECASE) if terms else None
+
+
+def assign_channel_uids( channels: list ) -> bool:
+    """
+    Give channels saved without Uid one, returns whether any was assigned
+
+    Uid identifies a channel in all of its stored state - Link can't, several channels can share it (e.g. audio only
+    and video copy of the same YouTube channel). Missing ones are derived from the channel settings instead of being
+    random, so every process sharing the config folder comes up with the same Uid until one of them saves it.
+    """
+    taken = { channel["Uid"] for channel in channels if channel.get("Uid") }
+    assigned = False
+    for channel in channels:
+        if channel.get("Uid"):
+            continue
+        signature = json.dumps([channel.get("Link", ""), channel.get("Name", ""), bool(channel.get("Audio_Only", False))])
+        base_uid = uid = hashlib.sha1(signature.encode()).hexdigest()[:16]
+        suffix = 1
+        while uid in taken:
+            suffix += 1
+            uid = f"{base_uid}-{suffix}"
+        channel["Uid"] = uid
+        taken.add(uid)
+        assigned = True
+    return assigned
+
+
+def compact_video_info( info: dict, keep_subtitles: bool ) -> dict:
+    """
+    Serialisable copy of info dict extracted by yt-dlp, without private and bulky fields the download doesn't need
+
+    The copy can be passed to YoutubeDL.process_ie_result() later, so the video doesn't have to be extracted again.
+    """
+    dropped_fields = {"heatmap"} if keep_subtitles else {"heatmap", "subtitles", "automatic_captions"}
+    return yt_dlp.YoutubeDL.sanitize_info({ k: v for k, v in info.items() if k not in dropped_fields }, remove_private_keys=True)
+
+
+def video_info_expiry( info: dict ) -> float:
+    """
+    Time when stream URLs in extracted info expire (the earliest one), estimated from extraction time if unknown
+    """
+    expiry = [
+        int(match.group(1))
+        for stream_format in info.get("formats") or []
+        for url in (stream_format.get("url"), stream_format.get("manifest_url")) if url
+        for match in [STREAM_URL_EXPIRE_RE.search(url)] if match
+    ]
+    return min(expiry) if expiry else info.get("epoch", time.time()) + EXTRACTED_INFO_MAX_AGE
+
+
 class FancyFormatter(logging.Formatter):
     FMT_SEQ = "\x1b["
     ASCII_COLORS = {
@@ -71,6 +183,1806 @@ class FancyFormatter(logging.Formatter):
                                  ).format(r)
 
 
+def write_json_atomically( file_path: str, data, **dump_kwargs ):
+    """
+    Write data to a temporary file first and then rename it over the original one, so a crash in the middle of
+    a write never leaves a truncated file behind
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as json_file:
+        json.dump(data, json_file, **dump_kwargs)
+    os.replace(tmp_path, file_path)
+
+
+class JsonFileStore:
+    """
+    Thread-safe dictionary persisted (atomically) as a JSON file
+    """
+
+    def __init__( self, file_path: str, log: logging.Logger ):
+        self.file_path = file_path
+        self.log = log
+        self.lock = threading.RLock()
+        self.data = {}
+        self.dirty = False
+        self.load()
+
+    def load( self ):
+        if not os.path.exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, "r") as json_file:
+                data = json.load(json_file)
+            if not isinstance(data, dict):
+                raise ValueError("Unexpected content")
+
+            with self.lock:
+                self.data = data
+                self.dirty = False
+
+        except Exception as e:
+            self.log.error(f"Error loading {self.file_path}: {str(e)}")
+
+    def save( self ):
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                write_json_atomically(self.file_path, self.data, separators=(",", ":"))
+                self.dirty = False
+
+            except Exception as e:
+                self.log.error(f"Error saving {self.file_path}: {str(e)}")
+
+
+class VideoInfoCache(JsonFileStore):
+    """
+    Cache of extracted per-video info (only the fields the sync logic needs)
+
+    Entries expire after ttl seconds, items that are live or upcoming expire after live_ttl seconds as their state
+    changes quickly. When there are more than max_entries items, least recently used ones are evicted.
+    """
+    CACHED_FIELDS = ("upload_date", "timestamp", "live_status", "duration", "title")
+    VOLATILE_LIVE_STATES = ("is_live", "is_upcoming", "post_live")
+
+    def __init__( self, file_path: str, log: logging.Logger, ttl: float, live_ttl: float, max_entries: int ):
+        self.ttl = ttl
+        self.live_ttl = live_ttl
+        self.max_entries = max_entries
+        super().__init__(file_path, log)
+
+    def load( self ):
+        super().load()
+        with self.lock:
+            # Drop everything that expired while we were not running
+            for video_id in [k for k, v in self.data.items() if not self.is_fresh(v)]:
+                del self.data[video_id]
+                self.dirty = True
+
+    def is_fresh( self, entry: dict ) -> bool:
+        ttl = self.live_ttl if entry.get("live_status") in self.VOLATILE_LIVE_STATES else self.ttl
+        return time.time() - entry.get("cached_at", 0) < ttl
+
+    def get( self, video_id: str ) -> dict | None:
+        with self.lock:
+            entry = self.data.pop(video_id, None)
+            if entry is None:
+                return None
+
+            if not self.is_fresh(entry):
+                self.dirty = True
+                return None
+
+            # Re-insert so the dict stays ordered from least to most recently used
+            self.data[video_id] = entry
+            return entry
+
+    def put( self, video_id: str, info: dict ):
+        entry = { k: info.get(k) for k in self.CACHED_FIELDS }
+        entry["cached_at"] = int(time.time())
+
+        with self.lock:
+            self.data.pop(video_id, None)
+            self.data[video_id] = entry
+            while len(self.data) > self.max_entries:
+                del self.data[next(iter(self.data))]
+            self.dirty = True
+
+
+class ChannelWatermarks(JsonFileStore):
+    """
+    Per-channel high-water mark - IDs of newest videos for which every older video was already handled
+
+    Handled means downloaded, already present in the folder or skipped for a reason that won't change (filter, live
+    rule, cut-off date...). Enumeration can stop at any of these IDs. Because the reasons depend on channel settings,
+    the watermark is dropped whenever a relevant setting changes. Videos past the search limit were never looked at,
+    so a walk cut short by it adds nothing (see get_list_of_videos_from_youtube).
+    """
+    MAX_IDS = 20
+    SIGNATURE_FIELDS = ("Name", "DL_Days", "Filter_Title_Text", "Negate_Filter", "Live_Rule", "Audio_Only")
+
+    def signature( self, channel: dict ) -> str:
+        return json.dumps([channel.get(k) for k in self.SIGNATURE_FIELDS])
+
+    def get_ids( self, channel: dict ) -> list:
+        with self.lock:
+            watermark = self.data.get(channel["Uid"])
+            if not watermark or watermark.get("signature") != self.signature(channel):
+                return []
+            return list(watermark.get("ids", []))
+
+    def get_known_ids( self, channel: dict ) -> set:
+        return set(self.get_ids(channel))
+
+    def update( self, channel: dict, walk_log: list, downloaded_ids: set ):
+        """
+        Update watermark from the enumeration walk (newest first) of a finished channel sync
+        """
+        new_ids = []
+        for video_id, handled in walk_log:
+            if handled is None:
+                handled = video_id in downloaded_ids
+
+            if handled:
+                new_ids.append(video_id)
+            else:
+                # Everything newer than a video we still need to revisit can't be used as a watermark
+                new_ids = []
+
+        with self.lock:
+            ids = list(dict.fromkeys(new_ids + self.get_ids(channel)))[:self.MAX_IDS]
+            self.data[channel["Uid"]] = { "signature": self.signature(channel), "ids": ids }
+            self.dirty = True
+
+    def remove( self, channel: dict ):
+        with self.lock:
+            if self.data.pop(channel["Uid"], None) is not None:
+                self.dirty = True
+
+
+class ChannelResolutions(JsonFileStore):
+    """
+    Channel ID and title resolved from channel Link, so syncs can go straight to the uploads playlist
+
+    Resolving means fetching the whole channel page, which is the same for every sync. Entries are revalidated after
+    roughly ttl seconds (with a bit of jitter, so channels added together don't all expire in the same sync) or when
+    the uploads playlist of the cached channel ID can't be fetched.
+    """
+
+    def __init__( self, file_path: str, log: logging.Logger, ttl: float ):
+        self.ttl = ttl
+        super().__init__(file_path, log)
+
+    def get( self, channel: dict ) -> dict | None:
+        with self.lock:
+            resolution = self.data.get(channel["Link"])
+            if resolution is None or resolution.get("expires_at", 0) <= time.time():
+                return None
+            return dict(resolution)
+
+    def put( self, channel: dict, channel_id: str, title: str ) -> dict:
+        resolution = {
+            "channel_id": channel_id,
+            "title": title,
+            "uploads_url": f"https://www.youtube.com/playlist?list=UU{channel_id[2:]}",
+            "expires_at": int(time.time() + self.ttl * random.uniform(0.8, 1.0)),
+        }
+        with self.lock:
+            self.data[channel["Link"]] = resolution
+            self.dirty = True
+        return dict(resolution)
+
+    def remove( self, channel: dict ):
+        with self.lock:
+            if self.data.pop(channel.get("Link"), None) is not None:
+                self.dirty = True
+
+
+class ChannelScheduler(JsonFileStore):
+    """
+    Next due time of each channel for the adaptive sync schedule
+
+    Sync interval of a channel follows its upload cadence - a quarter of the median gap between its recent uploads
+    (or of the time since the last upload, when the channel went quiet) clamped to [min_interval, max_interval] and
+    doubled after each failed sync. Due times are kept in a heap, superseded heap entries are skipped when popped.
+    """
+    MAX_UPLOADS = 10
+    CADENCE_FRACTION = 0.25
+    DEFAULT_INTERVAL = 24 * 3600
+
+    def __init__( self, file_path: str, log: logging.Logger, min_interval: float, max_interval: float ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.heap = []
+        super().__init__(file_path, log)
+
+    def load( self ):
+        super().load()
+        with self.lock:
+            self.heap = [ (state["next_due"], channel_key) for channel_key, state in self.data.items() if "next_due" in state ]
+            heapq.heapify(self.heap)
+
+    def schedule( self, channel_key: str, due: float ):
+        with self.lock:
+            self.data.setdefault(channel_key, { "uploads": [], "failures": 0 })["next_due"] = due
+            heapq.heappush(self.heap, (due, channel_key))
+            self.dirty = True
+
+    def next_due( self ) -> float | None:
+        with self.lock:
+            while self.heap and self.data.get(self.heap[0][1], {}).get("next_due") != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            return self.heap[0][0] if self.heap else None
+
+    def pop_due( self, channel_list: list, now: float ) -> list:
+        """
+        Return Ids of channels that are due, new channels get scheduled first
+        """
+        channel_keys = { channel["Uid"]: channel["Id"] for channel in channel_list }
+        due_ids = []
+        with self.lock:
+            for channel_key in channel_keys:
+                if "next_due" not in self.data.get(channel_key, {}):
+                    # Spread channels we know nothing about yet, so they don't all get synced at once
+                    self.schedule(channel_key, now + random.uniform(0, self.min_interval))
+
+            while self.heap and self.heap[0][0] <= now:
+                due, channel_key = heapq.heappop(self.heap)
+                if channel_key in channel_keys and self.data.get(channel_key, {}).get("next_due") == due:
+                    due_ids.append(channel_keys[channel_key])
+        return due_ids
+
+    def get_interval( self, state: dict, now: float ) -> float:
+        uploads = sorted(state.get("uploads", []))
+        gaps = sorted(b - a for a, b in zip(uploads, uploads[1:]) if b > a)
+        if gaps:
+            cadence = max(gaps[len(gaps) // 2], now - uploads[-1])
+            interval = cadence * self.CADENCE_FRACTION
+        else:
+            interval = self.DEFAULT_INTERVAL
+
+        interval *= 2 ** state.get("failures", 0)
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def record_sync( self, channel: dict, success: bool, upload_times: list ) -> float:
+        """
+        Reschedule channel after a sync, returns the new interval in seconds
+        """
+        channel_key = channel["Uid"]
+        now = time.time()
+        with self.lock:
+            state = self.data.setdefault(channel_key, { "uploads": [], "failures": 0 })
+            uploads = set(state.get("uploads", [])).union(int(t) for t in upload_times if t)
+            state["uploads"] = sorted(uploads)[-self.MAX_UPLOADS:]
+            state["failures"] = 0 if success else min(state.get("failures", 0) + 1, 10)
+
+            # A bit of jitter so channels synced together drift apart over time
+            interval = self.get_interval(state, now) * random.uniform(0.9, 1.1)
+            self.schedule(channel_key, now + interval)
+            return interval
+
+    def postpone( self, channels: list, delay: float ):
+        """
+        Reschedule channels that were due but did not get synced (paused, already running...)
+        """
+        now = time.time()
+        with self.lock:
+            for channel in channels:
+                if self.data.get(channel["Uid"], {}).get("next_due", now) < now:
+                    self.schedule(channel["Uid"], now + delay)
+
+    def remove( self, channel: dict ):
+        with self.lock:
+            if self.data.pop(channel["Uid"], None) is not None:
+                self.dirty = True
+
+
+class DownloadJournal(JsonFileStore):
+    """
+    Durable record of queued downloads and their persistent work directories (yt-dlp temp path)
+
+    Items are journaled when queued and removed once their channel is finished. Whatever is left in the journal on
+    startup was interrupted and gets resumed - yt-dlp continues the partial files left in the work directories.
+    Work directories of successful downloads are removed right away, the rest is garbage-collected by age and size.
+    """
+    JOURNALED_FIELDS = ("id", "title", "link", "channel_name", "timestamp")
+    EXTRACTED_INFO_FILE = "extracted_info.json"
+
+    def __init__( self, file_path: str, log: logging.Logger, work_folder: str ):
+        self.work_folder = work_folder
+        super().__init__(file_path, log)
+
+    def get_work_dir_name( self, channel: dict, item: dict ) -> str:
+        # Same video can be downloaded by several channels (e.g. audio only and video copy with the same Link), so
+        # the channel Uid is part of it
+        return f"{channel["Uid"]}_{item["id"]}"
+
+    def get_work_dir( self, channel: dict, item: dict ) -> str:
+        return os.path.join(self.work_folder, self.get_work_dir_name(channel, item))
+
+    def save_extracted_info( self, channel: dict, item: dict, info: dict ) -> bool:
+        """
+        Keep info extracted while enumerating in the work directory of item until it is downloaded, so the download
+        queue doesn't hold whole info dicts in memory. Returns whether it was saved.
+        """
+        work_dir = self.get_work_dir(channel, item)
+        try:
+            os.makedirs(work_dir, exist_ok=True)
+            write_json_atomically(os.path.join(work_dir, self.EXTRACTED_INFO_FILE), info)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.log.warning(f"{channel["Name"]}|{item["id"]}> Failed to save extracted info: {e}")
+            return False
+
+    def pop_extracted_info( self, channel: dict, item: dict ) -> dict | None:
+        """
+        Load info saved by save_extracted_info() and remove it, None if there is none (e.g. garbage-collected)
+        """
+        file_path = os.path.join(self.get_work_dir(channel, item), self.EXTRACTED_INFO_FILE)
+        try:
+            with open(file_path, "r") as info_file:
+                return json.load(info_file)
+        except (OSError, ValueError):
+            return None
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(file_path)
+
+    def add_items( self, channel: dict, items: list ):
+        with self.lock:
+            for item in items:
+                entry = { key: item.get(key) for key in self.JOURNALED_FIELDS }
+                entry["upload_date"] = item["upload_date"].strftime("%Y%m%d")
+                entry["channel_uid"] = channel["Uid"]
+                self.data[self.get_work_dir_name(channel, item)] = entry
+            self.dirty = True
+        self.save()
+
+    def remove_items( self, channel: dict, items: list ):
+        with self.lock:
+            for item in items:
+                self.data.pop(self.get_work_dir_name(channel, item), None)
+            self.dirty = True
+        self.save()
+
+    def get_interrupted_items( self ) -> dict:
+        """
+        Return journaled items grouped by channel Uid
+        """
+        interrupted_items = collections.defaultdict(list)
+        with self.lock:
+            for entry in self.data.values():
+                item = { key: entry.get(key) for key in self.JOURNALED_FIELDS }
+                item["upload_date"] = datetime.datetime.strptime(entry["upload_date"], "%Y%m%d")
+                interrupted_items[entry["channel_uid"]].append(item)
+        return interrupted_items
+
+    def remove_channel( self, channel: dict ):
+        with self.lock:
+            for work_dir_name in [ k for k, v in self.data.items() if v.get("channel_uid") == channel["Uid"] ]:
+                del self.data[work_dir_name]
+                self.dirty = True
+        self.save()
+
+    def collect_garbage( self, max_age: float, max_size: int ) -> int:
+        """
+        Remove work directories of items that are no longer queued once they are older than max_age seconds, then
+        the oldest ones until all of them fit into max_size bytes. Returns number of removed directories.
+        """
+        if not os.path.isdir(self.work_folder):
+            return 0
+
+        with self.lock:
+            queued = set(self.data)
+
+        work_dirs = []
+        for entry in os.scandir(self.work_folder):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            size = 0
+            mtime = entry.stat().st_mtime
+            for dirpath, _, filenames in os.walk(entry.path):
+                for filename in filenames:
+                    try:
+                        file_stat = os.stat(os.path.join(dirpath, filename))
+                    except OSError:
+                        continue
+                    size += file_stat.st_size
+                    mtime = max(mtime, file_stat.st_mtime)
+            work_dirs.append((mtime, size, entry.name, entry.path))
+
+        removed = 0
+        now = time.time()
+        total_size = sum(size for _, size, _, _ in work_dirs)
+        for mtime, size, name, path in sorted(work_dirs):
+            if name in queued:
+                continue
+            if now - mtime > max_age or total_size > max_size:
+                shutil.rmtree(path, ignore_errors=True)
+                total_size -= size
+                removed += 1
+        return removed
+
+
+class ChannelStore:
+    """
+    Persists the channel list split into configuration (channel_list.json) and runtime state (channel_state.json)
+
+    Runtime state changes all the time during a sync while configuration changes only on user edits, so they are
+    written separately. Both files are written atomically and writes are debounced - changes are only marked and
+    flushed by a background loop after flush_delay seconds, coalescing all changes made in the meantime.
+
+    State file can be shared by several sync workers (see SyncJobStore), so only states of channels that changed
+    since they were loaded or last written are merged into the file as it is on disk, under an exclusive file lock.
+    Configuration is written only by processes serving the UI, sync workers just follow it.
+    """
+    STATE_FIELDS = ("Last_Synced", "Last_Success", "Item_Count", "Item_Size", "Remote_Count")
+
+    def __init__( self, config_path: str, state_path: str, log: logging.Logger, get_channel_list, flush_delay: float,
+                  write_config: bool = True, write_state: bool = True ):
+        self.config_path = config_path
+        self.state_path = state_path
+        self.log = log
+        self.get_channel_list = get_channel_list
+        self.flush_delay = flush_delay
+        self.write_config = write_config
+        self.write_state = write_state
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.config_dirty = False
+        self.state_dirty = False
+        # State of each channel as it is in the state file, None until known (all states get written then)
+        self.written_states = None
+        # Modification times of both files as last loaded or written by us
+        self.config_mtime = None
+        self.state_mtime = None
+
+    @staticmethod
+    def get_mtime( file_path: str ) -> int | None:
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def config_changed_on_disk( self ) -> bool:
+        return self.get_mtime(self.config_path) != self.config_mtime
+
+    def state_changed_on_disk( self ) -> bool:
+        return self.get_mtime(self.state_path) != self.state_mtime
+
+    @contextlib.contextmanager
+    def state_file_lock( self ):
+        with open(f"{self.state_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load_states( self ) -> dict:
+        """
+        Runtime state of channels keyed by their Uid, as it is in the state file now
+        """
+        self.state_mtime = self.get_mtime(self.state_path)
+        with open(self.state_path, "r") as json_file:
+            return json.load(json_file)
+
+    def load( self ) -> list[dict]:
+        """
+        Return channels with their runtime state merged in, channel_list.json with state inside is migrated
+        """
+        self.config_mtime = self.get_mtime(self.config_path)
+        with open(self.config_path, "r") as json_file:
+            channels = json.load(json_file)
+        if assign_channel_uids(channels):
+            self.mark_changed(config=True)
+
+        if os.path.exists(self.state_path):
+            channel_states = self.load_states()
+            for channel in channels:
+                channel.update(channel_states.get(channel["Uid"], {}))
+
+        elif any(field in channel for channel in channels for field in self.STATE_FIELDS):
+            # Old format with everything in channel_list.json - state stays as loaded, both files get rewritten
+            self.log.warning(f"Migrating runtime state of channels from {self.config_path} to {self.state_path}")
+            self.mark_changed(config=True)
+            self.mark_changed()
+
+        return channels
+
+    def get_state( self, channel: dict ) -> dict:
+        return { key: channel.get(key) for key in self.STATE_FIELDS }
+
+    def remember_states( self, channel_list: list ):
+        """
+        Take states of channels as the ones in the state file, only later changes of them get written
+        """
+        with self.lock:
+            self.written_states = { channel["Uid"]: self.get_state(channel) for channel in channel_list }
+
+    def mark_changed( self, config: bool = False ):
+        with self.lock:
+            if config:
+                self.config_dirty = True
+            else:
+                self.state_dirty = True
+        self.changed.set()
+
+    def run( self ):
+        while True:
+            self.changed.wait()
+            time.sleep(self.flush_delay)
+            self.changed.clear()
+            self.flush()
+
+    def get_configured_uids( self ) -> set:
+        """
+        Uids of channels in channel_list.json as it is on disk now, it can list channels we did not load yet
+        """
+        try:
+            with open(self.config_path, "r") as json_file:
+                channels = json.load(json_file)
+        except (OSError, ValueError):
+            return set()
+        assign_channel_uids(channels)
+        return { channel["Uid"] for channel in channels }
+
+    def write_states( self, channel_list: list ):
+        channel_states = { channel["Uid"]: self.get_state(channel) for channel in channel_list }
+        with self.state_file_lock():
+            if self.written_states is None:
+                merged_states = channel_states
+                current_states = None
+            else:
+                changed_states = { uid: state for uid, state in channel_states.items() if self.written_states.get(uid) != state }
+                current_states = self.load_states() if os.path.exists(self.state_path) else {}
+                # States of channels synced by other workers stay as they wrote them, removed channels are dropped
+                configured_uids = set(channel_states) | self.get_configured_uids()
+                merged_states = { uid: state for uid, state in current_states.items() if uid in configured_uids } | changed_states
+
+            if merged_states != current_states:
+                write_json_atomically(self.state_path, merged_states, separators=(",", ":"))
+                self.state_mtime = self.get_mtime(self.state_path)
+        self.written_states = channel_states
+
+    def flush( self ):
+        with self.lock:
+            config_dirty, self.config_dirty = self.config_dirty and self.write_config, False
+            state_dirty, self.state_dirty = self.state_dirty and self.write_state, False
+            if not config_dirty and not state_dirty:
+                return
+
+            channel_list = list(self.get_channel_list())
+            try:
+                if config_dirty:
+                    channel_configs = [
+                        { key: value for key, value in channel.items() if key != "Id" and key not in self.STATE_FIELDS }
+                        for channel in channel_list
+                    ]
+                    write_json_atomically(self.config_path, channel_configs, indent=4)
+                    self.config_mtime = self.get_mtime(self.config_path)
+
+                if state_dirty:
+                    self.write_states(channel_list)
+
+            except Exception as e:
+                self.log.error(f"Error Saving Channels: {str(e)}")
+                self.config_dirty |= config_dirty
+                self.state_dirty |= state_dirty
+
+
+class ArchiveIndex:
+    """
+    SQLite index of archived media and subtitle files
+
+    Each row is valid as long as size and mtime of the file did not change, so a folder only needs to be listed and
+    stat-ed to find out what changed. Only new or modified files are opened to read video ID and timestamp from the
+    embedded metadata.
+
+    Media time (embedded timestamp, or mtime of the file when there is none) is resolved once at index time and
+    indexed per folder, so retention only has to query files older than a cut-off.
+    """
+    MEDIA_DAY_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    def __init__( self, db_path: str, log: logging.Logger ):
+        self.log = log
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    folder TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    video_id TEXT,
+                    title TEXT,
+                    media_day TEXT,
+                    media_type TEXT NOT NULL,
+                    media_time REAL
+                )""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS files_folder ON files (folder)")
+
+            # Index created before media time was stored - add the column and compute it from what is already there
+            if "media_time" not in [ column["name"] for column in self.db.execute("PRAGMA table_info(files)") ]:
+                self.db.execute("ALTER TABLE files ADD COLUMN media_time REAL")
+            missing = self.db.execute("SELECT path, mtime_ns, media_day, media_type FROM files WHERE media_time IS NULL").fetchall()
+            if missing:
+                self.log.info(f"Computing media time of {len(missing)} indexed files")
+                self.db.executemany("UPDATE files SET media_time = ? WHERE path = ?", [
+                    (self.get_media_time(row["media_day"], row["mtime_ns"], row["media_type"]), row["path"]) for row in missing
+                ])
+            self.db.execute("CREATE INDEX IF NOT EXISTS files_media_time ON files (folder, media_time)")
+
+    @staticmethod
+    def get_media_type( file_ext: str ) -> str | None:
+        file_ext = file_ext.lower()
+        if file_ext in VIDEO_EXTENSIONS:
+            return "video"
+        if file_ext in AUDIO_EXTENSIONS:
+            return "audio"
+        if file_ext in SUBTITLE_EXTENSIONS:
+            return "subtitle"
+        return None
+
+    def parse_file( self, file_path: str, filename: str, media_type: str ) -> tuple[str | None, str, str | None]:
+        """
+        Get video ID, title and embedded timestamp (\xa9day) of a file
+        """
+        file_base_name, file_ext = os.path.splitext(filename)
+        id_in_title = VIDEO_ID_IN_FILENAME_RE.search(file_base_name)
+        video_id = id_in_title.group(1) if id_in_title else None
+        media_day = None
+
+        if media_type != "subtitle":
+            try:
+                mp4_file = MP4(file_path)
+                video_id = video_id or mp4_file.get("\xa9cmt", [None])[0]
+                media_day = mp4_file.get("\xa9day", [None])[0]
+
+            except Exception as e:
+                if video_id is None:
+                    self.log.error(f"No video ID present or cannot read it from metadata of {filename}: {e}")
+
+        return video_id, file_base_name, media_day
+
+    @classmethod
+    def get_media_time( cls, media_day: str | None, mtime_ns: int, media_type: str ) -> float:
+        """
+        Timestamp of an archived file - from embedded metadata (\xa9day) or from mtime of the file as a fallback
+        """
+        if media_day and media_type != "subtitle":
+            try:
+                return datetime.datetime.strptime(media_day, cls.MEDIA_DAY_FORMAT).timestamp()
+            except ValueError:
+                pass
+        return mtime_ns / 1e9
+
+    def get_expired( self, folder_path: str, cutoff: float, media_types: list ) -> list[sqlite3.Row]:
+        """
+        Files of given media types in folder with media time older than cutoff (oldest first)
+        """
+        with self.lock:
+            return self.db.execute(
+                f"SELECT * FROM files WHERE folder = ? AND media_time < ? AND media_type IN ({", ".join("?" * len(media_types))}) "
+                f"ORDER BY media_time", (folder_path, cutoff, *media_types)).fetchall()
+
+    def remove_paths( self, paths: list ):
+        with self.lock, self.db:
+            self.db.executemany("DELETE FROM files WHERE path = ?", [ (path,) for path in paths ])
+
+    def refresh_folder( self, folder_path: str, current_files: dict ) -> list[sqlite3.Row]:
+        """
+        Re-index new or changed files, drop removed ones and return all rows for the folder
+
+        current_files maps path of each indexable file in the folder to (filename, size, mtime_ns, media_type).
+        """
+        with self.lock:
+            indexed = { row["path"]: row for row in self.db.execute("SELECT * FROM files WHERE folder = ?", (folder_path,)) }
+
+        updates = []
+        for file_path, (filename, size, mtime_ns, media_type) in current_files.items():
+            row = indexed.get(file_path)
+            if row is not None and row["size"] == size and row["mtime_ns"] == mtime_ns:
+                continue
+            video_id, title, media_day = self.parse_file(file_path, filename, media_type)
+            media_time = self.get_media_time(media_day, mtime_ns, media_type)
+            updates.append((file_path, folder_path, size, mtime_ns, video_id, title, media_day, media_type, media_time))
+
+        removed = [(file_path,) for file_path in indexed if file_path not in current_files]
+
+        with self.lock, self.db:
+            if updates:
+                self.db.executemany("INSERT OR REPLACE INTO files (path, folder, size, mtime_ns, video_id, title, media_day, media_type, media_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", updates)
+            if removed:
+                self.db.executemany("DELETE FROM files WHERE path = ?", removed)
+
+            if updates or removed:
+                self.log.debug(f"Archive index of {folder_path}: {len(updates)} files updated, {len(removed)} removed")
+                return list(self.db.execute("SELECT * FROM files WHERE folder = ?", (folder_path,)))
+
+        return list(indexed.values())
+
+
+class SyncJobStore:
+    """
+    SQLite store coordinating sync workers and web frontends that share the config folder
+
+    A channel is synced only by the worker holding its lease. Leases expire unless their owner keeps renewing them
+    with heartbeats, so channels of a worker that died get picked up by others. Each lease also remembers when its
+    channel sync last started - a sync scheduled or requested at some time skips channels that some worker started
+    after it, so all workers can go through the same schedule or request without syncing any channel twice.
+
+    Web frontends post manual sync requests and flags (profile next sync) here and find out from worker heartbeats
+    whether a sync is running. Workers publish their download progress here for the web frontends to show.
+    """
+    REQUEST_MAX_AGE = 86400
+
+    def __init__( self, db_path: str, log: logging.Logger, owner: str, lease_ttl: float ):
+        self.log = log
+        self.owner = owner
+        self.lease_ttl = lease_ttl
+        self.lock = threading.Lock()
+        # Other processes hold the database only for single short statements, waiting for them is fine
+        self.db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            # Leases used to be keyed by channel Link, which several channels can share. They only matter while
+            # a sync runs, so the old ones are simply dropped.
+            lease_columns = [ row["name"] for row in self.db.execute("PRAGMA table_info(channel_leases)") ]
+            if "link" in lease_columns:
+                self.db.execute("DROP TABLE channel_leases")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS channel_leases (
+                    uid TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    started REAL NOT NULL
+                )""")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS sync_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    requested REAL NOT NULL
+                )""")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS workers (
+                    owner TEXT PRIMARY KEY,
+                    heartbeat REAL NOT NULL,
+                    syncing INTEGER NOT NULL
+                )""")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS worker_progress (
+                    owner TEXT PRIMARY KEY,
+                    downloads TEXT NOT NULL
+                )""")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS flags (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )""")
+
+    def acquire_channel( self, uid: str, not_synced_since: float | None = None ) -> bool:
+        """
+        Take lease of a channel, fails when another worker holds it or (with not_synced_since) when sync of the
+        channel started after that time
+        """
+        now = time.time()
+        with self.lock, self.db:
+            cursor = self.db.execute("""
+                INSERT INTO channel_leases (uid, owner, expires, started) VALUES (?, ?, ?, ?)
+                ON CONFLICT (uid) DO UPDATE SET owner = excluded.owner, expires = excluded.expires, started = excluded.started
+                WHERE (channel_leases.owner = excluded.owner OR channel_leases.expires < ?) AND channel_leases.started < ?
+                """, (uid, self.owner, now + self.lease_ttl, now, now, now if not_synced_since is None else not_synced_since))
+            return cursor.rowcount > 0
+
+    def release_channel( self, uid: str ):
+        with self.lock, self.db:
+            self.db.execute("UPDATE channel_leases SET expires = 0 WHERE uid = ? AND owner = ?", (uid, self.owner))
+
+    def release_all( self ):
+        """
+        Release all leases of this worker, including the ones left behind by its previous run, and drop its progress
+        """
+        with self.lock, self.db:
+            self.db.execute("UPDATE channel_leases SET expires = 0 WHERE owner = ?", (self.owner,))
+            self.db.execute("DELETE FROM worker_progress WHERE owner = ?", (self.owner,))
+
+    def heartbeat( self, syncing: bool ):
+        """
+        Renew leases held by this worker and let web frontends know whether it is syncing
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("UPDATE channel_leases SET expires = ? WHERE owner = ? AND expires >= ?",
+                            (now + self.lease_ttl, self.owner, now))
+            self.db.execute("INSERT OR REPLACE INTO workers (owner, heartbeat, syncing) VALUES (?, ?, ?)",
+                            (self.owner, now, int(syncing)))
+
+    def sync_running( self ) -> bool:
+        """
+        Whether some live worker is syncing right now
+        """
+        with self.lock:
+            row = self.db.execute("SELECT COUNT(*) FROM workers WHERE syncing AND heartbeat >= ?",
+                                  (time.time() - self.lease_ttl,)).fetchone()
+        return row[0] > 0
+
+    def request_sync( self ):
+        """
+        Ask workers to sync all channels
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM sync_requests WHERE requested < ?", (now - self.REQUEST_MAX_AGE,))
+            self.db.execute("INSERT INTO sync_requests (requested) VALUES (?)", (now,))
+
+    def last_request_id( self ) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM sync_requests").fetchone()[0]
+
+    def get_sync_requests( self, after_id: int ) -> list[sqlite3.Row]:
+        with self.lock:
+            return self.db.execute("SELECT * FROM sync_requests WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+
+    def set_flag( self, name: str, value: bool ):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO flags (name, value) VALUES (?, ?)", (name, int(value)))
+
+    def get_flag( self, name: str ) -> bool:
+        with self.lock:
+            row = self.db.execute("SELECT value FROM flags WHERE name = ?", (name,)).fetchone()
+        return bool(row and row["value"])
+
+    def take_flag( self, name: str ) -> bool:
+        """
+        Clear the flag, returns whether it was set - only one worker gets True for each time it is set
+        """
+        with self.lock, self.db:
+            cursor = self.db.execute("UPDATE flags SET value = 0 WHERE name = ? AND value", (name,))
+            return cursor.rowcount > 0
+
+    def publish_progress( self, downloads: list ):
+        """
+        Replace download progress of this worker
+        """
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO worker_progress (owner, downloads) VALUES (?, ?)",
+                            (self.owner, json.dumps(downloads)))
+
+    def get_progress( self ) -> list[dict]:
+        """
+        Download progress of all live workers
+        """
+        with self.lock:
+            rows = self.db.execute("""
+                SELECT worker_progress.downloads FROM worker_progress JOIN workers USING (owner)
+                WHERE workers.heartbeat >= ? ORDER BY owner
+                """, (time.time() - self.lease_ttl,)).fetchall()
+        return [ download for row in rows for download in json.loads(row["downloads"]) ]
+
+
+class SyncStats:
+    """
+    Thread-safe state shared by all workers of a single sync run
+    """
+
+    def __init__( self ):
+        self.lock = threading.Lock()
+        self.channel_errors = 0
+        self.changed_folders = set()
+
+    def add_channel_error( self ) -> int:
+        with self.lock:
+            self.channel_errors += 1
+            return self.channel_errors
+
+    def request_media_server_scan( self, folder_path: str ):
+        with self.lock:
+            self.changed_folders.add(folder_path)
+
+    @property
+    def media_server_scan_required( self ) -> bool:
+        return bool(self.changed_folders)
+
+
+class MediaServerNotifier:
+    """
+    Collects changed channel folders and has media servers scan them in batches
+
+    Folders requested within delay seconds of each other end up in a single scan, so channels finishing one after
+    another during a sync don't trigger a scan each.
+    """
+
+    def __init__( self, log: logging.Logger, delay: float, scan ):
+        self.log = log
+        self.delay = delay
+        self.scan = scan
+        self.lock = threading.Lock()
+        self.scan_lock = threading.Lock()
+        self.changed = threading.Event()
+        self.pending = set()
+
+    def request_scan( self, folder_path: str ):
+        with self.lock:
+            self.pending.add(folder_path)
+        self.changed.set()
+
+    def run( self ):
+        while True:
+            self.changed.wait()
+            time.sleep(self.delay)
+            self.changed.clear()
+            self.flush()
+
+    def flush( self ):
+        with self.scan_lock:
+            with self.lock:
+                folders, self.pending = self.pending, set()
+            if not folders:
+                return
+            try:
+                self.scan(sorted(folders))
+            except Exception as e:
+                self.log.error(f"Media server scan failed: {str(e)}")
+
+
+class ChannelSync:
+    """
+    State of a single channel while it passes through the sync pipeline (enumeration -> downloads -> cleanup)
+    """
+
+    def __init__( self, channel: dict, channel_folder_path: str ):
+        self.channel = channel
+        self.channel_folder_path = channel_folder_path
+        self.folder_scan = None
+        self.walk_log = []
+        self.items = None
+        self.resume_items = None
+        self.lock = threading.Lock()
+        self.download_fails = 0
+        self.download_failed = False
+        self.problem = False
+        # Shown again when the channel gets skipped after all (synced by another worker)
+        self.last_synced = channel.get("Last_Synced")
+        # Skip the channel if its sync started after this time (see SyncJobStore.acquire_channel)
+        self.not_synced_since = None
+
+
+class FairDownloadQueue:
+    """
+    Download queue shared by all download workers
+
+    Items are kept per channel and handed out round-robin, so one channel with a large backlog does not starve the
+    others. A channel gets at most max_active_per_channel items in flight at a time.
+    """
+
+    def __init__( self, max_active_per_channel: int = 1 ):
+        self.condition = threading.Condition()
+        self.max_active_per_channel = max_active_per_channel
+        self.queued = {}
+        self.active = {}
+        self.round_robin = []
+        self.closed = False
+
+    def put_channel( self, channel_sync: ChannelSync, items: list ):
+        with self.condition:
+            self.queued[channel_sync] = collections.deque(items)
+            self.active[channel_sync] = 0
+            self.round_robin.append(channel_sync)
+            self.condition.notify_all()
+
+    def close( self ):
+        """
+        No more channels will be added, workers exit once the queue is drained
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get( self ) -> tuple[ChannelSync, dict] | None:
+        with self.condition:
+            while True:
+                for idx, channel_sync in enumerate(self.round_robin):
+                    if self.queued[channel_sync] and self.active[channel_sync] < self.max_active_per_channel:
+                        # Move channel to the end of the round so others get their turn
+                        self.round_robin.append(self.round_robin.pop(idx))
+                        self.active[channel_sync] += 1
+                        return channel_sync, self.queued[channel_sync].popleft()
+
+                if self.closed and not any(self.queued.values()) and not any(self.active.values()):
+                    return None
+                self.condition.wait()
+
+    def queued_count( self ) -> int:
+        with self.condition:
+            return sum(len(items) for items in self.queued.values())
+
+    def task_done( self, channel_sync: ChannelSync, drop_remaining: bool = False ) -> bool:
+        """
+        Mark item of channel as processed, returns True when this was the last item of the channel
+        """
+        with self.condition:
+            self.active[channel_sync] -= 1
+            if drop_remaining:
+                self.queued[channel_sync].clear()
+
+            finished = not self.queued[channel_sync] and self.active[channel_sync] == 0
+            if finished:
+                self.round_robin.remove(channel_sync)
+                del self.queued[channel_sync]
+                del self.active[channel_sync]
+            self.condition.notify_all()
+            return finished
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all threads to cap the aggregate rate of something (bytes downloaded, requests made, ...)
+
+    The bucket is allowed to go into debt and the consumer sleeps until it is paid off. That way tokens can also be
+    consumed after the fact (e.g. from download progress hooks) and concurrent consumers get served in order.
+    Bursts are limited to burst tokens, one second worth of tokens by default.
+    """
+
+    def __init__( self, rate: float, burst: float | None = None ):
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+
+    def consume( self, amount: float = 1 ):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= amount
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class MetricsRegistry:
+    """
+    Metrics of the sync exposed in OpenMetrics text format (for Prometheus) on /metrics
+
+    Counters, gauges and histograms are kept as dicts of label values -> value and updated under a single lock. Gauges
+    derived from current state (channel sizes, ...) have a collector instead, which is called only when scraped.
+    """
+    STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+    def __init__( self ):
+        self.lock = threading.Lock()
+        self.families = {}
+
+    def declare( self, name: str, metric_type: str, help_text: str, labels: tuple = (), buckets: tuple = None, collect=None ):
+        """
+        Add metric family, collect returns dict of label values (tuples) -> value of the whole family
+        """
+        self.families[name] = {
+            "type": metric_type,
+            "help": help_text,
+            "labels": labels,
+            "buckets": buckets,
+            "collect": collect,
+            "samples": {},
+        }
+
+    def inc( self, name: str, amount: float = 1, **labels ):
+        family = self.families[name]
+        key = tuple(str(labels[label]) for label in family["labels"])
+        with self.lock:
+            family["samples"][key] = family["samples"].get(key, 0) + amount
+
+    def set( self, name: str, value: float, **labels ):
+        family = self.families[name]
+        key = tuple(str(labels[label]) for label in family["labels"])
+        with self.lock:
+            family["samples"][key] = value
+
+    def observe( self, name: str, value: float, **labels ):
+        family = self.families[name]
+        key = tuple(str(labels[label]) for label in family["labels"])
+        with self.lock:
+            sample = family["samples"].setdefault(key, [ [0] * len(family["buckets"]), 0.0, 0 ])
+            for idx, bound in enumerate(family["buckets"]):
+                if value <= bound:
+                    sample[0][idx] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    @contextlib.contextmanager
+    def time( self, name: str, **labels ):
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start_time, **labels)
+
+    @staticmethod
+    def escape_label_value( value ) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    def format_sample( self, name: str, labels: list, value ) -> str:
+        if labels:
+            label_text = ",".join(f'{label}="{self.escape_label_value(label_value)}"' for label, label_value in labels)
+            return f"{name}{{{label_text}}} {value}"
+        return f"{name} {value}"
+
+    def render( self ) -> str:
+        lines = []
+        for name, family in self.families.items():
+            if family["collect"] is not None:
+                try:
+                    samples = family["collect"]()
+                except Exception:
+                    continue
+            else:
+                with self.lock:
+                    samples = { key: [list(value[0]), value[1], value[2]] if family["type"] == "histogram" else value
+                                for key, value in family["samples"].items() }
+
+            lines.append(f"# TYPE {name} {family["type"]}")
+            lines.append(f"# HELP {name} {family["help"]}")
+            for key, value in samples.items():
+                labels = list(zip(family["labels"], key))
+                if family["type"] == "histogram":
+                    bucket_counts, total, count = value
+                    for bound, bucket_count in zip(family["buckets"], bucket_counts):
+                        lines.append(self.format_sample(f"{name}_bucket", labels + [("le", float(bound))], bucket_count))
+                    lines.append(self.format_sample(f"{name}_bucket", labels + [("le", "+Inf")], count))
+                    lines.append(self.format_sample(f"{name}_sum", labels, total))
+                    lines.append(self.format_sample(f"{name}_count", labels, count))
+                elif family["type"] == "counter":
+                    lines.append(self.format_sample(f"{name}_total", labels, value))
+                else:
+                    lines.append(self.format_sample(name, labels, value))
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class SyncTrace:
+    """
+    Span tree of a single sync: sync -> channel -> stages (counting, enumeration, extraction, download, ...)
+
+    Spans are kept as flat rows [parent, name, start, end, attrs] with times in seconds since the start of the sync,
+    so the report stays compact even for syncs with thousands of videos.
+    """
+
+    def __init__( self ):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.start_time = time.monotonic()
+        self.spans = [ [-1, "sync", 0.0, None, {}] ]
+        self.channel_spans = {}
+
+    def channel_span( self, channel: dict ) -> int:
+        """
+        Span of channel under the sync span, it starts the first time it is asked for
+        """
+        with self.lock:
+            span = self.channel_spans.get(channel["Uid"])
+            if span is None:
+                span = self.channel_spans[channel["Uid"]] = len(self.spans)
+                self.spans.append([0, "channel", time.monotonic() - self.start_time, None, { "channel": channel["Name"] }])
+            return span
+
+    def add_span( self, name: str, parent: int, start_time: float, end_time: float, **attrs ):
+        """
+        Record finished span, start_time and end_time are time.monotonic() values
+        """
+        with self.lock:
+            self.spans.append([parent, name, start_time - self.start_time, end_time - self.start_time, attrs])
+
+    def end_span( self, span: int, **attrs ):
+        with self.lock:
+            self.spans[span][3] = time.monotonic() - self.start_time
+            self.spans[span][4].update(attrs)
+
+    def end( self ):
+        """
+        End the sync span, spans still open (channels skipped half-way, ...) end with it
+        """
+        with self.lock:
+            end = time.monotonic() - self.start_time
+            for span in self.spans:
+                if span[3] is None:
+                    span[3] = end
+                    if span[1] != "sync":
+                        span[4]["unfinished"] = True
+
+    def as_report( self ) -> dict:
+        with self.lock:
+            spans = [
+                [ parent, name, round(start, 3), None if end is None else round(end - start, 3), attrs or None ]
+                for parent, name, start, end, attrs in self.spans
+            ]
+        return {
+            "Started": self.started_at,
+            "Duration": spans[0][3],
+            "Channels": len(self.channel_spans),
+            "Spans": spans,
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling stacks of all threads from a real OS thread
+
+    The sampler thread is started with the original (not gevent-patched) primitives, so it keeps sampling at a steady
+    rate no matter what greenlets do. Result is in folded stack format ("frame;frame;frame count" per line), which
+    flamegraph.pl, speedscope or inferno render directly.
+    """
+
+    def __init__( self, interval: float ):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.running = False
+        self.done = False
+        self.sleep = monkey.get_original("time", "sleep")
+
+    def start( self ):
+        self.running = True
+        monkey.get_original("_thread", "start_new_thread")(self.run, ())
+
+    def run( self ):
+        own_thread_id = monkey.get_original("_thread", "get_ident")()
+        try:
+            while self.running:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+                self.sleep(self.interval)
+        finally:
+            self.done = True
+
+    def stop( self ) -> str:
+        self.running = False
+        while not self.done:
+            self.sleep(self.interval)
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SyncReportStore:
+    """
+    Reports of past syncs (span tree as JSON and optionally folded stacks from the profiler) in a folder, only the
+    newest max_reports are kept
+
+    Sync workers share the folder and start scheduled syncs at the same time, their reports get name_suffix (worker
+    id) so they don't overwrite each other.
+    """
+
+    def __init__( self, folder: str, log: logging.Logger, max_reports: int, name_suffix: str = "" ):
+        self.folder = folder
+        self.log = log
+        self.max_reports = max_reports
+        self.name_suffix = f"-{re.sub(r"[^\w-]", "_", name_suffix, flags=re.ASCII)}" if name_suffix else ""
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get_names( self ) -> list[str]:
+        """
+        Names of stored reports, newest first (names are timestamps, so they sort by time)
+        """
+        return sorted((os.path.splitext(filename)[0] for filename in os.listdir(self.folder) if filename.endswith(".json")), reverse=True)
+
+    def save( self, trace: SyncTrace, profile: str | None = None ) -> str:
+        name = datetime.datetime.fromtimestamp(trace.started_at).strftime("sync-%Y%m%d-%H%M%S") + self.name_suffix
+        report = { "Name": name, "Profile": profile is not None } | trace.as_report()
+        write_json_atomically(os.path.join(self.folder, f"{name}.json"), report, separators=(",", ":"))
+        if profile is not None:
+            with open(os.path.join(self.folder, f"{name}.folded"), "w") as profile_file:
+                profile_file.write(profile)
+
+        for old_name in self.get_names()[self.max_reports:]:
+            for ext in (".json", ".folded"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.folder, f"{old_name}{ext}"))
+        return name
+
+    def load( self, name: str ) -> dict | None:
+        if not SYNC_REPORT_NAME_RE.match(name or ""):
+            return None
+        try:
+            with open(os.path.join(self.folder, f"{name}.json"), "r") as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return None
+
+    def load_profile( self, name: str ) -> str | None:
+        if not SYNC_REPORT_NAME_RE.match(name or ""):
+            return None
+        try:
+            with open(os.path.join(self.folder, f"{name}.folded"), "r") as profile_file:
+                return profile_file.read()
+        except FileNotFoundError:
+            return None
+
+    def get_summaries( self ) -> list[dict]:
+        summaries = []
+        for name in self.get_names():
+            report = self.load(name)
+            if report is not None:
+                summaries.append({ key: report.get(key) for key in ("Name", "Started", "Duration", "Channels", "Profile") })
+        return summaries
+
+
+class DownloadProgress:
+    """
+    Progress of a single download, each download gets its own so concurrent downloads don't mix up their reports
+
+    yt-dlp calls progress hooks many times per second, so this is just a fixed set of slots updated in place.
+    """
+
+    __slots__ = ("key", "log_prefix", "channel_name", "title", "position", "status", "is_live", "downloaded_bytes",
+                 "total_bytes", "speed", "eta", "fragment_index", "report_perc", "finished_time", "stream_started")
+
+    def __init__( self, channel: dict, item: dict ):
+        # Uid rather than Id, downloads of sync workers are shown by web frontends that number channels on their own
+        self.key = f"{channel["Uid"]}|{item["id"]}"
+        self.log_prefix = f"{channel["Name"]}|{item["id"]}"
+        self.channel_name = channel["Name"]
+        self.title = item["title"]
+        self.position = item.get("position")
+        self.status = "starting"
+        self.is_live = None
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.speed = None
+        self.eta = None
+        self.fragment_index = None
+        self.report_perc = 0
+        self.finished_time = None
+        # Whether the current stream reported any progress yet, see DataHandler.progress_callback()
+        self.stream_started = False
+
+    def as_dict( self ) -> dict:
+        return {
+            "Key": self.key,
+            "Channel": self.channel_name,
+            "Title": self.title,
+            "Position": self.position,
+            "Status": self.status,
+            "Is_Live": bool(self.is_live),
+            "Downloaded_Bytes": self.downloaded_bytes,
+            "Total_Bytes": self.total_bytes,
+            "Speed": self.speed,
+            "ETA": self.eta,
+            "Fragment_Index": self.fragment_index,
+        }
+
+
+class DownloadProgressTable:
+    """
+    Progress of all running downloads, pushed to UI clients at most once per PROGRESS_UPDATE_INTERVAL
+
+    Progress hooks only update their DownloadProgress and set the changed flag, so clients get the same rate of
+    updates no matter how often yt-dlp calls the hooks. Sync workers have no clients, they publish their progress
+    (see SyncJobStore) and web frontends show it next to their own as remote downloads.
+    """
+
+    def __init__( self, log: logging.Logger, publish=None ):
+        self.lock = threading.Lock()
+        self.log = log
+        self.publish = publish
+        self.downloads = {}
+        self.remote_downloads = []
+        self.changed = False
+
+    def add( self, progress: DownloadProgress ):
+        with self.lock:
+            self.downloads[progress.key] = progress
+            self.changed = True
+
+    def remove( self, progress: DownloadProgress ):
+        with self.lock:
+            self.downloads.pop(progress.key, None)
+            self.changed = True
+
+    def set_remote( self, downloads: list ):
+        with self.lock:
+            if downloads != self.remote_downloads:
+                self.remote_downloads = downloads
+                self.changed = True
+
+    def snapshot( self ) -> dict:
+        with self.lock:
+            return { "Downloads": [ progress.as_dict() for progress in self.downloads.values() ] + self.remote_downloads }
+
+    def run( self ):
+        while True:
+            time.sleep(PROGRESS_UPDATE_INTERVAL)
+            if not self.changed:
+                continue
+            self.changed = False
+            try:
+                if self.publish is None:
+                    socketio.emit("download_progress", self.snapshot())
+                else:
+                    self.publish(self.snapshot()["Downloads"])
+            except Exception as e:
+                self.log.error(f"Error publishing download progress: {e}")
+
+
+class PooledYoutubeDL:
+    """
+    Long-lived YoutubeDL instance owned by YoutubeDLPool
+
+    Hooks are registered with yt-dlp only once when the instance is created, they dispatch to the hooks of whoever is
+    currently leasing the instance.
+
+    With ignoreerrors, failures don't raise and download() reports them by a return code that stays set for the rest
+    of the instance's life, so such an instance is used just once (single_use).
+    """
+
+    def __init__( self, ydl_opts: dict, signature: str ):
+        self.signature = signature
+        self.single_use = bool(ydl_opts.get("ignoreerrors"))
+        self.progress_hooks = []
+        self.post_hooks = []
+        self.ydl = yt_dlp.YoutubeDL(ydl_opts | {"progress_hooks": [self.on_progress], "post_hooks": [self.on_post]})
+
+    def on_progress( self, progress_data: dict ):
+        for hook in self.progress_hooks:
+            hook(progress_data)
+
+    def on_post( self, file_path: str ):
+        for hook in self.post_hooks:
+            hook(file_path)
+
+    def prepare( self, ydl_opts: dict ):
+        """
+        Apply per-item options and hooks of the new lessee
+        """
+        self.progress_hooks = ydl_opts.get("progress_hooks", [])
+        self.post_hooks = ydl_opts.get("post_hooks", [])
+        if "paths" in ydl_opts:
+            self.ydl.params["paths"] = ydl_opts["paths"]
+        if "outtmpl" in ydl_opts:
+            self.ydl.params["outtmpl"]["default"] = ydl_opts["outtmpl"]
+
+
+class YoutubeDLPool:
+    """
+    Pool of YoutubeDL instances reused across items, so extractors, cookie jar, postprocessors and HTTP connections
+    don't have to be set up for every single video
+
+    Instances are keyed by their options without the per-item ones (paths, output template and hooks), each instance
+    is leased by one worker at a time.
+    """
+
+    PER_ITEM_OPTIONS = ("paths", "outtmpl", "progress_hooks", "post_hooks")
+
+    def __init__( self, log: logging.Logger, max_idle: int ):
+        self.lock = threading.Lock()
+        self.log = log
+        self.max_idle = max_idle
+        self.idle = []
+        self.generation = 0
+
+    def signature( self, ydl_opts: dict ) -> str:
+        shared_opts = { key: value for key, value in ydl_opts.items() if key not in self.PER_ITEM_OPTIONS }
+        return json.dumps(shared_opts, sort_keys=True, default=repr)
+
+    @contextlib.contextmanager
+    def lease( self, ydl_opts: dict ):
+        signature = self.signature(ydl_opts)
+        pooled = None
+        with self.lock:
+            generation = self.generation
+            pooled = self.take_idle(signature)
+
+        if pooled is None:
+            self.log.debug(f"Creating new YoutubeDL instance ({len(self.idle)} idle in pool)")
+            pooled = self.create_instance(ydl_opts, signature)
+        pooled.prepare(ydl_opts)
+
+        try:
+            yield pooled.ydl
+
+        except yt_dlp.utils.DownloadError:
+            # Regular download failure, the instance itself is still fine
+            self.release(pooled, generation)
+            raise
+
+        except BaseException:
+            self.close_instance(pooled)
+            raise
+
+        else:
+            self.release(pooled, generation)
+
+    def take_idle( self, signature: str ) -> PooledYoutubeDL | None:
+        """
+        Pop idle instance created with the same options, called with the lock held
+        """
+        for idx in range(len(self.idle) - 1, -1, -1):
+            if self.idle[idx].signature == signature:
+                return self.idle.pop(idx)
+        return None
+
+    def create_instance( self, ydl_opts: dict, signature: str ) -> PooledYoutubeDL:
+        return PooledYoutubeDL({ key: value for key, value in ydl_opts.items() if key not in ("progress_hooks", "post_hooks") }, signature)
+
+    def release( self, pooled: PooledYoutubeDL, generation: int ):
+        pooled.progress_hooks = []
+        pooled.post_hooks = []
+        evicted = []
+        with self.lock:
+            if generation != self.generation or pooled.single_use:
+                evicted.append(pooled)
+            else:
+                self.idle.append(pooled)
+                while len(self.idle) > self.max_idle:
+                    evicted.append(self.idle.pop(0))
+
+        for pooled in evicted:
+            self.close_instance(pooled)
+
+    def close_instance( self, pooled: PooledYoutubeDL ):
+        try:
+            pooled.ydl.close()
+        except Exception as e:
+            self.log.warning(f"Error closing YoutubeDL instance: {e}")
+
+    def clear( self ):
+        """
+        Close all idle instances (this also saves cookies), instances leased right now are closed once returned
+        """
+        with self.lock:
+            self.generation += 1
+            idle, self.idle = self.idle, []
+
+        for pooled in idle:
+            self.close_instance(pooled)
+
+
+class YoutubeDLWorkerProcess:
+    """
+    Worker process running yt-dlp (see ytdlp_worker.py) as an instance of YoutubeDLProcessPool
+
+    Its ydl attribute stands in for YoutubeDL, hooks of whoever is leasing the process are called for progress and
+    post events the worker sends.
+    """
+
+    def __init__( self, command: list, signature: str ):
+        self.signature = signature
+        # Worker decides about reuse of its YoutubeDL instances on its own, the process itself can always be reused
+        self.single_use = False
+        self.progress_hooks = []
+        self.post_hooks = []
+        self.sync_progress = False
+        self.jobs = 0
+        self.max_rss = 0
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.ydl = RemoteYoutubeDL(self)
+
+    def prepare( self, ydl_opts: dict ):
+        self.jobs += 1
+        self.progress_hooks = ydl_opts.get("progress_hooks", [])
+        self.post_hooks = ydl_opts.get("post_hooks", [])
+        self.ydl.prepare(ydl_opts)
+
+    def call( self, request: dict ) -> dict:
+        """
+        Send request to the worker and dispatch its events until the result comes, returns the result event
+        """
+        sync_progress = self.sync_progress and bool(self.progress_hooks)
+        self.send(json.dumps(request | { "sync_progress": sync_progress }))
+
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise self.exited_error()
+
+            event = json.loads(line)
+            if event["event"] == "progress":
+                for hook in self.progress_hooks:
+                    hook(event["data"])
+                if sync_progress:
+                    self.send('{"op": "ack"}')
+
+            elif event["event"] == "post":
+                for hook in self.post_hooks:
+                    hook(event["path"])
+
+            elif event["event"] == "result":
+                self.max_rss = event.get("max_rss", 0)
+                return event
+
+            else:
+                error_class = { "DownloadError": yt_dlp.utils.DownloadError, "ReExtractInfo": yt_dlp.utils.ReExtractInfo }.get(event["type"], Exception)
+                raise error_class(event["message"])
+
+    def send( self, line: str ):
+        try:
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            raise self.exited_error()
+
+    def exited_error( self ) -> Exception:
+        return Exception(f"yt-dlp worker process {self.process.pid} exited unexpectedly with code {self.process.wait()}")
+
+    def close( self ):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+
+class RemoteYoutubeDL:
+    """
+    The part of YoutubeDL interface ArchiveTube uses, forwarded to a worker process
+    """
+    # Not serialisable, worker has its own logger and reports hook calls as events
+    LOCAL_OPTIONS = ("logger", "progress_hooks", "post_hooks")
+    ENTRIES_PER_REQUEST = 10
+
+    def __init__( self, worker: YoutubeDLWorkerProcess ):
+        self.worker = worker
+        self.opts = {}
+
+    def prepare( self, ydl_opts: dict ):
+        self.opts = { key: value for key, value in ydl_opts.items() if key not in self.LOCAL_OPTIONS }
+
+    def call( self, op: str, **fields ) -> dict:
+        return self.worker.call({ "op": op, "opts": self.opts } | fields)
+
+    def extract_info( self, url: str, download: bool = True, process: bool = True ) -> dict:
+        # Only ever used to get info, downloads go through download() and process_ie_result()
+        event = self.call("extract", url=url, process=process)
+        info = event["value"]
+        if event.get("entries"):
+            info["entries"] = self.iter_entries()
+        return info
+
+    def iter_entries( self ):
+        """
+        Entries of the last extracted playlist, pulled from the worker (which fetches pages lazily) a few at a time
+        """
+        while True:
+            page = self.call("entries", count=self.ENTRIES_PER_REQUEST)["value"]
+            yield from page["entries"]
+            if page["done"]:
+                return
+
+    def download( self, url_list: list ) -> int:
+        retcode = 0
+        for url in url_list:
+            retcode = self.call("download", url=url)["value"] or retcode
+        return retcode
+
+    def process_ie_result( self, info: dict, download: bool = True ) -> dict:
+        self.call("process", info=info)
+        return info
+
+    def close( self ):
+        self.worker.close()
+
+
+class YoutubeDLProcessPool(YoutubeDLPool):
+    """
+    YoutubeDLPool of worker processes instead of YoutubeDL instances, so yt-dlp doesn't run in the web server process
+
+    Any idle process can serve any options (it keeps a few YoutubeDL instances of its own), one that served the same
+    options last is preferred. Processes are recycled after max_jobs leases or once their peak memory exceeds
+    max_memory bytes, a process that crashed or failed in an unexpected way is replaced right away.
+    """
+
+    WORKER_COMMAND = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ytdlp_worker.py")]
+
+    def __init__( self, log: logging.Logger, max_idle: int, max_jobs: int, max_memory: float, sync_progress: bool ):
+        super().__init__(log, max_idle)
+        self.max_jobs = max_jobs
+        self.max_memory = max_memory
+        # Progress hooks throttle downloads when total download rate is limited, worker has to wait for them
+        self.sync_progress = sync_progress
+
+    def take_idle( self, signature: str ) -> YoutubeDLWorkerProcess | None:
+        pooled = super().take_idle(signature) or (self.idle.pop() if self.idle else None)
+        if pooled is not None:
+            pooled.signature = signature
+        return pooled
+
+    def create_instance( self, ydl_opts: dict, signature: str ) -> YoutubeDLWorkerProcess:
+        pooled = YoutubeDLWorkerProcess(self.WORKER_COMMAND, signature)
+        pooled.sync_progress = self.sync_progress
+        self.log.info(f"Started yt-dlp worker process {pooled.process.pid}")
+        return pooled
+
+    def release( self, pooled: YoutubeDLWorkerProcess, generation: int ):
+        if pooled.jobs >= self.max_jobs or pooled.max_rss > self.max_memory:
+            self.log.info(f"Recycling yt-dlp worker process {pooled.process.pid} after {pooled.jobs} jobs ({number_si_suffix(pooled.max_rss)}B peak memory)")
+            self.close_instance(pooled)
+            return
+        super().release(pooled, generation)
+
+
+class ChannelListPublisher:
+    """
+    Pushes channel list changes to UI clients as versioned patches
+
+    Callers just mark the list as changed, a background loop publishes at most once per CHANNEL_UPDATE_INTERVAL.
+    Each patch carries only the fields that changed since the previous one (against a snapshot of the last published
+    state) and a version number, so clients can detect a missed patch and ask for the full list again.
+    """
+
+    def __init__( self, get_channel_list, log: logging.Logger ):
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.get_channel_list = get_channel_list
+        self.log = log
+        self.version = 0
+        self.snapshots = {}
+        self.order = []
+
+    def mark_changed( self ):
+        self.changed.set()
+
+    def run( self ):
+        while True:
+            self.changed.wait()
+            self.changed.clear()
+            try:
+                self.publish()
+            except Exception as e:
+                self.log.error(f"Error publishing channel list changes: {e}")
+            time.sleep(CHANNEL_UPDATE_INTERVAL)
+
+    def publish( self ):
+        with self.lock:
+            channel_list = list(self.get_channel_list())
+            changed = []
+            for channel in channel_list:
+                snapshot = self.snapshots.get(channel["Id"])
+                if snapshot is None:
+                    changed.append(dict(channel))
+                    continue
+
+                changed_fields = { key: value for key, value in channel.items() if key not in snapshot or snapshot[key] != value }
+                if changed_fields:
+                    changed.append({ "Id": channel["Id"] } | changed_fields)
+
+            order = [ channel["Id"] for channel in channel_list ]
+            current_ids = set(order)
+            removed = [ channel_id for channel_id in self.snapshots if channel_id not in current_ids ]
+            if not changed and not removed and order == self.order:
+                return
+
+            self.version += 1
+            self.snapshots = { channel["Id"]: dict(channel) for channel in channel_list }
+            patch = { "Version": self.version, "Changed": changed, "Removed": removed }
+            if order != self.order:
+                patch["Order"] = order
+            self.order = order
+
+        socketio.emit("channel_list_patch", patch)
+
+    def full_list( self ) -> dict:
+        """
+        Publish pending changes and return the whole list with its version, for newly connected clients
+        """
+        self.publish()
+        with self.lock:
+            return { "Version": self.version, "Channel_List": [ self.snapshots[channel_id] for channel_id in self.order ] }
+
+
 class DataHandler:
     def __init__(self):
         #logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -83,6 +1995,7 @@ class DataHandler:
 
         self.task_thread = None
         self.task_thread_started = False
+        startup_time = time.monotonic()
 
         app_name_text = os.path.basename(__file__).replace(".py", "")
         release_version = os.environ.get("RELEASE_VERSION", "unknown")
@@ -90,20 +2003,26 @@ class DataHandler:
         self.log.warning(f"{app_name_text} Version: {release_version}")
         self.log.warning(f"{'*' * 50}")
 
-        self.download_progress_report_perc = 0
         self.config_folder = "config"
-        # TODO: Fix process_channel_errors by making it thread-safe!
-        self.process_channel_errors = 0
+        self.sync_stats = SyncStats()
+        self.channel_counter_lock = threading.Lock()
         self.download_folder = "downloads"
         self.audio_download_folder = "audio_downloads"
         self.media_server_addresses = ""
         self.media_server_tokens = ""
         self.media_server_library_name = "YouTube"
-        self.media_server_scan_req_flag = False
         self.video_format_id = os.environ.get("video_format_id", "137")
         self.audio_format_id = os.environ.get("audio_format_id", "140")
         self.defer_hours = float(os.environ.get("defer_hours", "0"))
         self.thread_limit = int(os.environ.get("thread_limit", "1"))
+        self.metadata_threads = max(1, int(os.environ.get("metadata_threads", self.thread_limit)))
+        self.download_threads = max(1, int(os.environ.get("download_threads", self.thread_limit)))
+        self.cleanup_threads = max(1, int(os.environ.get("cleanup_threads", "1")))
+        # Downloads of a single channel can never use more workers than there are in the download pool
+        self.channel_download_threads = min(self.download_threads, max(1, int(os.environ.get("channel_download_threads", "1"))))
+        self.download_rate_limit = parse_si_number(os.environ.get("download_rate_limit", "0") or "0")
+        self.download_limiter = TokenBucket(self.download_rate_limit) if self.download_rate_limit > 0 else None
+        self.startup_scan_threads = max(1, int(os.environ.get("startup_scan_threads", "4")))
         self.fallback_vcodec = os.environ.get("fallback_vcodec", "vp9")
         self.fallback_acodec = os.environ.get("fallback_acodec", "mp4a")
         self.subtitles = os.environ.get("subtitles", "none").lower()
@@ -113,6 +2032,34 @@ class DataHandler:
         self.verbose_logs = os.environ.get("verbose_logs", "false").lower() == "true"
         self.ignore_ssl_errors = False
         self.youtube_slow = False
+        self.video_cache_days = float(os.environ.get("video_cache_days", "30"))
+        self.video_cache_live_minutes = float(os.environ.get("video_cache_live_minutes", "30"))
+        self.video_cache_size = int(os.environ.get("video_cache_size", "50000"))
+        self.media_scan_delay = float(os.environ.get("media_scan_delay", "60"))
+        self.channel_resolve_days = float(os.environ.get("channel_resolve_days", "7"))
+        self.ytdlp_worker_processes = os.environ.get("ytdlp_worker_processes", "false").lower() == "true"
+        self.ytdlp_worker_max_jobs = max(1, int(os.environ.get("ytdlp_worker_max_jobs", "100")))
+        self.ytdlp_worker_max_memory = parse_si_number(os.environ.get("ytdlp_worker_max_memory", "1G") or "0") or float("inf")
+        self.cache_folder = os.path.join(os.environ["XDG_CACHE_HOME"], "archivetube") if os.environ.get("XDG_CACHE_HOME") else "cache"
+        self.partial_max_age_days = float(os.environ.get("partial_max_age_days", "7"))
+        self.partial_max_size = parse_si_number(os.environ.get("partial_max_size", "20G") or "0")
+        self.sync_reports_kept = max(1, int(os.environ.get("sync_reports_kept", "20")))
+        # Web frontend and sync workers can run as separate processes sharing the config folder, "all" runs both
+        self.role = os.environ.get("ARCHIVETUBE_ROLE", "all").lower()
+        if self.role not in SYNC_ROLES:
+            self.log.error(f"Unknown ARCHIVETUBE_ROLE '{self.role}', running as 'all'")
+            self.role = "all"
+        self.worker_id = os.environ.get("ARCHIVETUBE_WORKER_ID") or socket.gethostname()
+        self.adaptive_schedule = os.environ.get("adaptive_schedule", "false").lower() == "true"
+        self.schedule_min_hours = float(os.environ.get("schedule_min_hours", "1"))
+        self.schedule_max_hours = float(os.environ.get("schedule_max_hours", "168"))
+        self.extraction_threads = max(1, int(os.environ.get("extraction_threads", "4")))
+        self.request_rate = float(os.environ.get("request_rate", "2"))
+        self.request_burst = max(1.0, float(os.environ.get("request_burst", "5")))
+        self.slow_request_rate = float(os.environ.get("slow_request_rate", "0.1"))
+        # All requests for video info and downloads go through one of these, slow one is used when self.youtube_slow is True
+        self.request_limiter = TokenBucket(self.request_rate, self.request_burst) if self.request_rate > 0 else None
+        self.slow_request_limiter = TokenBucket(self.slow_request_rate, 1) if self.slow_request_rate > 0 else None
 
         # TODO: Add option to control verbose logs from the UI
         if self.verbose_logs:
@@ -125,32 +2072,69 @@ class DataHandler:
             "logger":                   self.log,
             "quiet":                    True,
             'fragment_retries':         10,
-            'retries':                  10,
-        }
-
-        # This gets used when self.youtube_slow is True
-        self.ytd_slow_parameters = {
-            'max_sleep_interval':       20.0,
-            'sleep_interval':           10.0,
-            'sleep_interval_requests':  0.75,
-            'sleep_interval_subtitles': 5
+            'retries':                  10,
         }
 
         os.makedirs(self.config_folder, exist_ok=True)
         os.makedirs(self.download_folder, exist_ok=True)
         os.makedirs(self.audio_download_folder, exist_ok=True)
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+        self.video_info_cache = VideoInfoCache(os.path.join(self.config_folder, "video_info_cache.json"), self.log,
+                                               ttl=self.video_cache_days * 86400,
+                                               live_ttl=self.video_cache_live_minutes * 60,
+                                               max_entries=self.video_cache_size)
+        self.channel_watermarks = ChannelWatermarks(os.path.join(self.config_folder, "channel_watermarks.json"), self.log)
+        self.channel_resolutions = ChannelResolutions(os.path.join(self.config_folder, "channel_resolutions.json"), self.log,
+                                                      ttl=self.channel_resolve_days * 86400)
+        self.archive_index = ArchiveIndex(os.path.join(self.config_folder, "archive_index.db"), self.log)
+        self.job_store = SyncJobStore(os.path.join(self.config_folder, "sync_jobs.db"), self.log, self.worker_id, SYNC_LEASE_TTL)
+        self.download_journal = DownloadJournal(os.path.join(self.cache_folder, "download_queue.json"), self.log,
+                                                os.path.join(self.cache_folder, "work"))
+        self.channel_scheduler = ChannelScheduler(os.path.join(self.config_folder, "channel_schedule.json"), self.log,
+                                                  min_interval=self.schedule_min_hours * 3600,
+                                                  max_interval=self.schedule_max_hours * 3600)
+        self.channel_list_publisher = ChannelListPublisher(lambda: self.req_channel_list, self.log)
+        self.download_progress_table = DownloadProgressTable(self.log, publish=self.job_store.publish_progress if self.role == "worker" else None)
+        self.media_server_notifier = MediaServerNotifier(self.log, self.media_scan_delay, self.sync_media_servers)
+        # Clients are reused between scans, plex servers are keyed by (address, token)
+        self.media_server_session = requests.Session()
+        self.plex_servers = {}
+        ydl_pool_max_idle = self.metadata_threads * (1 + self.extraction_threads) + self.download_threads
+        if self.ytdlp_worker_processes:
+            self.ydl_pool = YoutubeDLProcessPool(self.log, max_idle=ydl_pool_max_idle, max_jobs=self.ytdlp_worker_max_jobs,
+                                                 max_memory=self.ytdlp_worker_max_memory, sync_progress=self.download_limiter is not None)
+        else:
+            self.ydl_pool = YoutubeDLPool(self.log, max_idle=ydl_pool_max_idle)
+        self.metrics = MetricsRegistry()
+        self.declare_metrics()
+        self.sync_reports = SyncReportStore(os.path.join(self.config_folder, "sync_reports"), self.log, self.sync_reports_kept,
+                                            name_suffix=self.worker_id if self.role == "worker" else "")
+        # Trace of the running sync, profiler runs only for a sync started after it was requested from the UI
+        self.sync_trace = None
+        self.profile_next_sync = False
 
         self.sync_start_times = []
         self.settings_config_file = os.path.join(self.config_folder, "settings_config.json")
+        self.settings_mtime = None
+        # Web role only - whether some sync worker was syncing when last checked
+        self.workers_syncing = False
 
         self.req_channel_list = []
         self.channel_list_config_file = os.path.join(self.config_folder, "channel_list.json")
+        self.channel_store = ChannelStore(self.channel_list_config_file, os.path.join(self.config_folder, "channel_state.json"),
+                                          self.log, lambda: self.req_channel_list, flush_delay=2.0,
+                                          write_config=self.role != "worker", write_state=self.role != "web")
 
+        stage_time = time.monotonic()
         if os.path.exists(self.settings_config_file):
             self.load_settings_from_file()
+        settings_load_time = time.monotonic() - stage_time
 
+        stage_time = time.monotonic()
         if os.path.exists(self.channel_list_config_file):
             self.load_channel_list_from_file()
+        channel_list_load_time = time.monotonic() - stage_time
 
         # TODO: Add support for getting cookies directly from the browser (by passing profile directory). It is a PITA
         #       passing cookies.txt manually. Especially since it changes whenever I click on something on YT.
@@ -164,11 +2148,131 @@ class DataHandler:
         if self.ignore_ssl_errors:
             self.ytd_extra_parameters["nocheckcertificate"] = True
 
+        channel_store_thread = threading.Thread(target=self.channel_store.run, daemon=True)
+        channel_store_thread.start()
+        atexit.register(self.channel_store.flush)
+
+        channel_update_thread = threading.Thread(target=self.channel_list_publisher.run, daemon=True)
+        channel_update_thread.start()
+
+        progress_update_thread = threading.Thread(target=self.download_progress_table.run, daemon=True)
+        progress_update_thread.start()
+
+        if self.role == "web":
+            # Syncs run in worker processes, the web frontend just follows what they write
+            shared_state_thread = threading.Thread(target=self.follow_shared_state, daemon=True)
+            shared_state_thread.start()
+            worker_progress_thread = threading.Thread(target=self.follow_worker_progress, daemon=True)
+            worker_progress_thread.start()
+            self.log.info(f"Startup finished in {time.monotonic() - startup_time:.2f}s (settings: {settings_load_time:.2f}s, "
+                          f"channel list: {channel_list_load_time:.2f}s), running as web frontend only")
+            return
+
+        # Leases left behind by the previous run of this worker would block its channels until they expire
+        self.job_store.release_all()
+
+        coordinator_thread = threading.Thread(target=self.sync_coordinator, daemon=True)
+        coordinator_thread.start()
+
         task_thread = threading.Thread(target=self.schedule_checker, daemon=True)
         task_thread.start()
 
+        resume_thread = threading.Thread(target=self.resume_interrupted_downloads, daemon=True)
+        resume_thread.start()
+
+        media_server_thread = threading.Thread(target=self.media_server_notifier.run, daemon=True)
+        media_server_thread.start()
+
+        # Counting files can take minutes on slow storage, so it runs in the background with persisted counts shown
+        # in the meantime
+        self.startup_count_thread = threading.Thread(target=self.count_media_files_for_all_channels, daemon=True)
+        self.startup_count_thread.start()
+
+        self.log.info(f"Startup finished in {time.monotonic() - startup_time:.2f}s (settings: {settings_load_time:.2f}s, "
+                      f"channel list: {channel_list_load_time:.2f}s), counting media files in the background"
+                      f"{f" (sync worker {self.worker_id})" if self.role == "worker" else ""}")
+
+    def declare_metrics(self):
+        self.metrics.declare("archivetube_stage_duration_seconds", "histogram",
+                             "Duration of sync stages (enumeration per channel, extraction and download per video, ...)",
+                             labels=("stage",), buckets=MetricsRegistry.STAGE_BUCKETS)
+        self.metrics.declare("archivetube_downloaded_bytes", "counter", "Bytes downloaded by yt-dlp", labels=("channel",))
+        self.metrics.declare("archivetube_ytdlp_requests", "counter", "Requests made through yt-dlp", labels=("kind",))
+        self.metrics.declare("archivetube_ytdlp_errors", "counter", "Failed requests made through yt-dlp", labels=("kind",))
+        self.metrics.declare("archivetube_extracted_info_downloads", "counter",
+                             "Downloads by whether they reused info extracted during enumeration or had to extract it again",
+                             labels=("result",))
+        self.metrics.declare("archivetube_queue_depth", "gauge", "Work waiting in sync pipeline queues", labels=("queue",))
+        self.metrics.declare("archivetube_active_workers", "gauge", "Sync pipeline workers busy right now", labels=("stage",))
+        self.metrics.declare("archivetube_workers", "gauge", "Configured size of sync pipeline worker pools", labels=("stage",))
+        for stage, workers in (("enumeration", self.metadata_threads), ("extraction", self.extraction_threads),
+                               ("download", self.download_threads), ("cleanup", self.cleanup_threads)):
+            self.metrics.set("archivetube_workers", workers, stage=stage)
+            self.metrics.set("archivetube_active_workers", 0, stage=stage)
+        for queue in ("enumeration", "download", "cleanup"):
+            self.metrics.set("archivetube_queue_depth", 0, queue=queue)
+
+        self.metrics.declare("archivetube_channel_last_success_age_seconds", "gauge",
+                             "Time since the last successful sync of channel", labels=("channel",),
+                             collect=lambda: { (channel["Name"],): round(time.time() - channel["Last_Success"], 3)
+                                               for channel in self.req_channel_list if channel.get("Last_Success") })
+        self.metrics.declare("archivetube_channel_items", "gauge", "Media files archived for channel", labels=("channel",),
+                             collect=lambda: { (channel["Name"],): channel.get("Item_Count", 0) for channel in self.req_channel_list })
+        self.metrics.declare("archivetube_channel_size_bytes", "gauge", "Size of files archived for channel", labels=("channel",),
+                             collect=lambda: { (channel["Name"],): channel.get("Item_Size", 0) for channel in self.req_channel_list })
+        self.metrics.declare("archivetube_sync_running", "gauge", "Whether sync is running right now",
+                             collect=lambda: { (): int(self.is_sync_running()) })
+
+    @contextlib.contextmanager
+    def worker_active(self, stage):
+        self.metrics.inc("archivetube_active_workers", 1, stage=stage)
+        try:
+            yield
+        finally:
+            self.metrics.inc("archivetube_active_workers", -1, stage=stage)
+
+    def trace_span(self, channel, name, start_time, end_time, **attrs):
+        """
+        Record span under the channel span in the trace of the running sync (if there is one)
+        """
+        trace = self.sync_trace
+        if trace is not None:
+            trace.add_span(name, trace.channel_span(channel), start_time, end_time, **attrs)
+
+    def record_stage(self, channel, stage, start_time, end_time, **attrs):
+        self.metrics.observe("archivetube_stage_duration_seconds", end_time - start_time, stage=stage)
+        self.trace_span(channel, stage, start_time, end_time, **attrs)
+
+    @contextlib.contextmanager
+    def sync_stage(self, channel, stage, **attrs):
+        """
+        Time stage of channel sync for metrics and the sync trace, attrs of the span can be extended by the caller
+        """
+        start_time = time.monotonic()
+        try:
+            yield attrs
+        except BaseException:
+            attrs["failed"] = True
+            raise
+        finally:
+            self.record_stage(channel, stage, start_time, time.monotonic(), **attrs)
+
+    def submit_stage(self, executor, stage, func, *args):
+        """
+        Submit pipeline stage of a channel to its executor, keeping queue depth and busy worker metrics up to date
+        """
+        self.metrics.inc("archivetube_queue_depth", 1, queue=stage)
+
+        def run_stage():
+            self.metrics.inc("archivetube_queue_depth", -1, queue=stage)
+            with self.worker_active(stage):
+                return func(*args)
+
+        return executor.submit(run_stage)
+
     def load_settings_from_file(self):
         try:
+            self.settings_mtime = ChannelStore.get_mtime(self.settings_config_file)
             with open(self.settings_config_file, "r") as json_file:
                 ret = json.load(json_file)
                 self.sync_start_times = ret.get("sync_start_times", "")
@@ -186,19 +2290,18 @@ class DataHandler:
 
     def save_settings_to_file_and_reload( self ):
         try:
-            with open(self.settings_config_file, "w") as json_file:
-                json.dump(
-                    {
-                        "sync_start_times": self.sync_start_times,
-                        "media_server_addresses": self.media_server_addresses,
-                        "media_server_tokens": self.media_server_tokens,
-                        "media_server_library_name": self.media_server_library_name,
-                        "ignore_ssl_errors": self.ignore_ssl_errors,
-                        "youtube_slow": self.youtube_slow
-                    },
-                    json_file,
-                    indent=4,
-                )
+            write_json_atomically(
+                self.settings_config_file,
+                {
+                    "sync_start_times": self.sync_start_times,
+                    "media_server_addresses": self.media_server_addresses,
+                    "media_server_tokens": self.media_server_tokens,
+                    "media_server_library_name": self.media_server_library_name,
+                    "ignore_ssl_errors": self.ignore_ssl_errors,
+                    "youtube_slow": self.youtube_slow
+                },
+                indent=4,
+            )
 
         except Exception as e:
             self.log.error(f"Error Saving Config: {str(e)}")
@@ -209,8 +2312,7 @@ class DataHandler:
 
     def load_channel_list_from_file(self):
         try:
-            with open(self.channel_list_config_file, "r") as json_file:
-                channels = json.load(json_file)
+            channels = self.channel_store.load()
             sorted_channels = sorted(channels, key=lambda c: c.get("Name", "").lower())
 
             self.log.info(f"load_channel_list_from_file> Loading {len(sorted_channels)} channels from {self.channel_list_config_file}")
@@ -226,6 +2328,8 @@ class DataHandler:
                     full_channel_data = {
                         # ID of channel (immutable)
                         "Id": idx,
+                        # Persistent identity of channel, all per-channel state is keyed by it
+                        "Uid": channel["Uid"],
                         "Name": channel.get("Name", ""),
                         "Link": channel.get("Link", ""),
                         # Synchronization disabled (paused) or not
@@ -233,8 +2337,11 @@ class DataHandler:
                         "DL_Days": int(channel.get("DL_Days", 0)),
                         "Keep_Days": int(channel.get("Keep_Days", 0)),
                         "Last_Synced": synced_state,
+                        # Unix time of the last successful sync, channels saved before it was stored get it from Last_Synced
+                        "Last_Success": channel.get("Last_Success") or self.parse_last_synced(synced_state),
+                        # Counts from the last run, refreshed by count_media_files_for_all_channels() after start
                         "Item_Count": int(channel.get("Item_Count", 0)),
-                        "Item_Size": 0,
+                        "Item_Size": int(channel.get("Item_Size", 0)),
                         # Remote media count
                         "Remote_Count": int(channel.get("Remote_Count", 0)),
                         "Filter_Title_Text": channel.get("Filter_Title_Text", ""),
@@ -248,40 +2355,171 @@ class DataHandler:
                         "Set_Mtime": bool(channel.get("Set_Mtime", True)),
                     }
 
-                    itm_count, itm_size = self.count_media_files_for_channel( full_channel_data )
-                    full_channel_data["Item_Count"] = itm_count
-                    full_channel_data["Item_Size"] = itm_size
-                    if full_channel_data["Item_Count"] == -1:
-                        full_channel_data["Last_Synced"] = "Never"
-                        full_channel_data["Item_Count"] = 0
-
                     self.req_channel_list.append(full_channel_data)
                     self.log.info(f"load_channel_list_from_file> Channel '{full_channel_data["Name"]}' loaded")
                 except ValueError as e:
                     self.log.error(f"load_channel_list_from_file> Failed to load channel ID={idx}: {str(e)}")
 
+            # Only changes made from now on get written to the state file (other workers may be writing it too)
+            if os.path.exists(self.channel_store.state_path):
+                self.channel_store.remember_states(self.req_channel_list)
+
         except Exception as e:
             self.log.error(f"load_channel_list_from_file> Error Loading Channels: {str(e)}")
             self.log.exception(e)
 
-    def save_channel_list_to_file(self):
+    @staticmethod
+    def parse_last_synced(last_synced):
         try:
-            with open(self.channel_list_config_file, "w") as json_file:
-                json.dump(self.req_channel_list, json_file, indent=4)
+            return datetime.datetime.strptime(last_synced, LAST_SYNCED_FORMAT).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def count_media_files_for_all_channels(self):
+        """
+        Refresh media counters of all loaded channels, results are pushed to clients as soon as each channel is done
+        """
+        start_time = time.monotonic()
+        channel_times = []
+
+        def count_channel( channel ):
+            channel_start_time = time.monotonic()
+            itm_count, itm_size = self.count_media_files_for_channel(channel)
+            return itm_count, itm_size, time.monotonic() - channel_start_time
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.startup_scan_threads) as executor:
+            futures = { executor.submit(count_channel, channel): channel for channel in list(self.req_channel_list) }
+            for future in concurrent.futures.as_completed(futures):
+                channel = futures[future]
+                try:
+                    itm_count, itm_size, channel_time = future.result()
+                except Exception as e:
+                    self.log.error(f"{channel["Name"]}> Failed to count media files: {str(e)}")
+                    continue
 
-        except Exception as e:
-            self.log.error(f"Error Saving Channels: {str(e)}")
+                channel_times.append((channel_time, channel["Name"]))
+                if itm_count == -1:
+                    channel["Last_Synced"] = "Never"
+                    itm_count = 0
+                channel["Item_Count"] = itm_count
+                channel["Item_Size"] = itm_size
+                self.emit_channel_refresh()
+
+        slowest = ", ".join(f"'{name}' {channel_time:.2f}s" for channel_time, name in sorted(channel_times, reverse=True)[:5])
+        self.log.info(f"Media files of {len(channel_times)} channels counted in {time.monotonic() - start_time:.2f}s "
+                      f"using {self.startup_scan_threads} threads (slowest: {slowest or '-'})")
+
+    def save_channel_list_to_file(self, flush=False):
+        """
+        Mark channel configuration as changed, it gets written by the channel store shortly (or right away with flush)
+        """
+        self.channel_store.mark_changed(config=True)
+        if flush:
+            self.channel_store.flush()
+
+    def is_sync_running(self):
+        """
+        Whether sync runs in this process or, for the web frontend, in some of the sync workers
+        """
+        return self.task_thread_started or self.workers_syncing
+
+    def reload_shared_config(self):
+        """
+        Pick up settings and channel list changed by another process sharing the config folder (web frontend and
+        sync workers running separately)
+        """
+        if self.task_thread_started:
+            return
+
+        if os.path.exists(self.settings_config_file) and ChannelStore.get_mtime(self.settings_config_file) != self.settings_mtime:
+            self.load_settings_from_file()
+
+        if os.path.exists(self.channel_list_config_file) and self.channel_store.config_changed_on_disk():
+            self.log.info("Channel list changed on disk, reloading it")
+            # Pending changes belong to the list being replaced
+            self.channel_store.flush()
+            self.req_channel_list = []
+            self.load_channel_list_from_file()
+            self.channel_list_publisher.mark_changed()
+
+    def sync_coordinator(self):
+        """
+        Renew leases of channels being synced and run syncs requested by web frontends through the job store
+        """
+        last_request_id = self.job_store.last_request_id()
+        while True:
+            try:
+                self.job_store.heartbeat(self.task_thread_started)
+                sync_requests = [] if self.task_thread_started else self.job_store.get_sync_requests(last_request_id)
+                if sync_requests:
+                    last_request_id = sync_requests[-1]["id"]
+                    self.log.warning("Manual sync requested by web frontend")
+                    if self.role == "worker":
+                        self.reload_shared_config()
+                    # Channels other workers started since the request was made are skipped
+                    self.task_thread = threading.Thread(target=self.master_queue, daemon=True,
+                                                        kwargs={ "not_synced_since": sync_requests[0]["requested"] })
+                    self.task_thread.start()
+
+            except Exception as e:
+                self.log.error(f"Sync coordination error: {str(e)}")
+
+            time.sleep(SYNC_POLL_INTERVAL)
+
+    def follow_shared_state(self):
+        """
+        Web frontend only - keep up with channel state written by sync workers and tell clients when they sync
+        """
+        while True:
+            try:
+                self.reload_shared_config()
+                if os.path.exists(self.channel_store.state_path) and self.channel_store.state_changed_on_disk():
+                    channel_states = self.channel_store.load_states()
+                    for channel in self.req_channel_list:
+                        channel.update(channel_states.get(channel["Uid"], {}))
+                    self.channel_list_publisher.mark_changed()
+
+                # Only shown in settings here, the flag is taken by the worker that starts the next sync
+                self.profile_next_sync = self.job_store.get_flag("profile_next_sync")
+                workers_syncing = self.job_store.sync_running()
+                if workers_syncing != self.workers_syncing:
+                    self.workers_syncing = workers_syncing
+                    socketio.emit("sync_state_changed", { "Sync_State": "run" } if workers_syncing else { "Sync_State": "stop", "Success": True })
+
+            except Exception as e:
+                self.log.error(f"Error following state of sync workers: {str(e)}")
+
+            time.sleep(SYNC_POLL_INTERVAL)
+
+    def follow_worker_progress(self):
+        """
+        Web frontend only - show downloads of sync workers, they publish their progress through the job store
+        """
+        while True:
+            try:
+                self.download_progress_table.set_remote(self.job_store.get_progress())
+            except Exception as e:
+                self.log.error(f"Error following download progress of sync workers: {str(e)}")
+
+            time.sleep(PROGRESS_UPDATE_INTERVAL)
 
     def schedule_checker(self):
+        if self.adaptive_schedule:
+            self.adaptive_schedule_checker()
+            return
+
         self.log.info("Starting periodic checks every 10 minutes to monitor sync start times.")
         self.log.info(f"Current scheduled hours to start sync (in 24-hour format): {self.sync_start_times}")
         while True:
+            if self.role == "worker":
+                self.reload_shared_config()
             current_time = datetime.datetime.now()
             within_sync_window = current_time.hour in self.sync_start_times
 
             if within_sync_window:
                 self.log.info(f"Time to Start Sync - as current hour: {current_time.hour} in schedule {str(self.sync_start_times)}")
-                self.master_queue()
+                # Every worker runs the scheduled sync, channels already started by others in this hour are skipped
+                self.master_queue(not_synced_since=current_time.replace(minute=0, second=0, microsecond=0).timestamp())
 
                 current_time = datetime.datetime.now()
                 next_hour = (current_time + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=1)
@@ -294,155 +2532,411 @@ class DataHandler:
             else:
                 time.sleep(600)
 
-    def get_list_of_videos_from_youtube(self, channel, current_channel_files):
-        # TODO: It would be nice to cache individual video metadata so we don't have to re-download it. This does not
-        #       really matter in the production, but it really sucks to re-download same stuff again and again during
-        #       the development. Not to mention that this is probably the reason my IP got blacklisted by YT.
+    def adaptive_schedule_checker(self):
+        """
+        Sync each channel when it is due according to its own adaptive interval (see ChannelScheduler)
 
-        days_to_retrieve = channel["DL_Days"]
-        channel_link = channel["Link"]
+        Sync hours are optional here - when set, due channels wait for the next sync hour.
+        """
+        self.log.info(f"Adaptive sync schedule enabled (interval {self.schedule_min_hours}-{self.schedule_max_hours} hours, "
+                      f"sync hours: {self.sync_start_times or 'any'})")
+        while True:
+            now = time.time()
+            within_sync_window = not self.sync_start_times or datetime.datetime.now().hour in self.sync_start_times
+
+            if within_sync_window and not self.task_thread_started:
+                if self.role == "worker":
+                    self.reload_shared_config()
+                due_ids = self.channel_scheduler.pop_due(self.req_channel_list, now)
+                if due_ids:
+                    self.log.info(f"Adaptive schedule: {len(due_ids)} channels due for sync")
+                    # Schedule of each worker is its own, channels another worker just synced are skipped
+                    self.master_queue(due_ids, not_synced_since=now - self.channel_scheduler.min_interval / 2)
+                    # Channels that were skipped (paused, ...) get another look later
+                    due_channels = [ channel for channel in self.req_channel_list if channel["Id"] in due_ids ]
+                    self.channel_scheduler.postpone(due_channels, self.channel_scheduler.min_interval)
+                    self.channel_scheduler.save()
+                    continue
+
+            next_due = self.channel_scheduler.next_due()
+            sleep_seconds = 600 if next_due is None else min(600, max(5, next_due - time.time()))
+            time.sleep(sleep_seconds)
+
+    def extract_video_info(self, ydl, channel, video):
+        """
+        Get info for a single video, either from the video info cache or by extracting it from YT
+        """
+        video_info = self.video_info_cache.get(video["id"])
+        if video_info is not None:
+            self.log.debug(f"{channel["Name"]}|{video["id"]}> Using cached video info")
+            return video_info
+
+        self.wait_for_request_slot()
+        self.metrics.inc("archivetube_ytdlp_requests", kind="video_info")
+        try:
+            with self.sync_stage(channel, "extraction", video=video["id"]):
+                video_info = ydl.extract_info(video["url"], download=False)
+        except Exception:
+            self.metrics.inc("archivetube_ytdlp_errors", kind="video_info")
+            raise
+        self.video_info_cache.put(video["id"], video_info)
+        return video_info
+
+    def extract_video_info_pooled(self, channel, ydl_opts, video):
+        """
+        Same as extract_video_info() but with YoutubeDL leased from the pool, so it can run in its own thread
+        """
+        video_info = self.video_info_cache.get(video["id"])
+        if video_info is not None:
+            self.log.debug(f"{channel["Name"]}|{video["id"]}> Using cached video info")
+            return video_info
+
+        with self.worker_active("extraction"), self.ydl_pool.lease(ydl_opts) as ydl:
+            return self.extract_video_info(ydl, channel, video)
+
+    def wait_for_request_slot(self):
+        """
+        Throttle requests to YT through the process-wide token bucket
+        """
+        limiter = self.slow_request_limiter if self.youtube_slow else self.request_limiter
+        if limiter is not None:
+            limiter.consume()
+
+    def prefetch_video_info(self, channel, ydl_opts, entries, known_ids, prefilter):
+        """
+        Yield (video, future) for playlist entries in their original order, while info of up to extraction_threads
+        upcoming entries is extracted concurrently
+
+        Future is None for entries that are going to be filtered out without full info (prefilter returns something
+        for them). Nothing is prefetched past a known video or the search limit, and in "Only" live mode (just the
+        first live video is wanted) at all.
+        """
         search_limit = channel["Search_Limit"]
-        video_to_download_list = []
+        window = 0 if channel["Live_Rule"] == "Only" else self.extraction_threads
+
+        entries = iter(entries)
+        pending = collections.deque()
+        in_flight = 0
+        pulled = 0
+        stopped = False
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, window))
+        try:
+            while True:
+                # Don't run too far ahead of the consumer, every entry pulled may mean another playlist page fetched
+                while not stopped and in_flight < max(1, window) and len(pending) < PREFETCH_MAX_ENTRIES:
+                    video = next(entries, None)
+                    if video is None:
+                        stopped = True
+                        break
 
-        ydl_opts = {
-            "quiet": True,
-            "extract_flat": True,
-            "match_filter": video_duration_filter,
-        }
-        ydl_opts |= self.ytd_extra_parameters
+                    pulled += 1
+                    if window == 0 or video["id"] in known_ids or 0 < search_limit < pulled:
+                        # Consumer either stops at this entry or processes it by itself
+                        stopped = window > 0
+                        pending.append((video, None))
+                        break
 
-        if self.youtube_slow is True:
-            ydl_opts |= self.ytd_slow_parameters
+                    skip = prefilter(video)
+                    if skip is not None and skip[2]:
+                        # Consumer stops at this entry
+                        stopped = True
+                        pending.append((video, None))
+                        break
 
-        if search_limit > 0:
-            ydl_opts["playlist_items"] = f"1-{search_limit}"
-        ydl = yt_dlp.YoutubeDL(ydl_opts)
+                    future = executor.submit(self.extract_video_info_pooled, channel, ydl_opts, video) if skip is None else None
+                    in_flight += future is not None
+                    pending.append((video, future))
 
-        playlist = ydl.extract_info(channel_link, download=False)
-        channel_title = playlist.get("title")
-        channel_id = playlist.get("channel_id")
-        self.log.info(f"{channel["Name"]}> CHANNEL_ID={channel_id}  VIDEOS={len(playlist["entries"])}  TITLE='{channel_title}' ")
+                if not pending:
+                    return
+
+                video, future = pending.popleft()
+                in_flight -= future is not None
+                yield video, future
+
+        finally:
+            # Enumeration may stop early (cut-off date reached, ...), don't extract what nobody is going to look at
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract_playlist_lazily(self, ydl, url):
+        """
+        Extract playlist without processing it, so its entries are fetched page by page only as we iterate over them
+        """
+        for _ in range(3):
+            self.metrics.inc("archivetube_ytdlp_requests", kind="playlist")
+            try:
+                playlist = ydl.extract_info(url, download=False, process=False)
+            except Exception:
+                self.metrics.inc("archivetube_ytdlp_errors", kind="playlist")
+                raise
+            if playlist.get("_type") not in ("url", "url_transparent"):
+                return playlist
+            url = playlist["url"]
+        raise Exception(f"Too many redirects while extracting {url}")
+
+    def prefilter_video(self, channel, video, title_filter, current_channel_files, approximate_cutoff):
+        """
+        Decide whatever can be decided about video from its flat playlist entry alone, without extracting its info
+
+        Returns None when full info is needed, otherwise (reason, handled, stop) tuple - reason for log, whether the
+        skip is final (see walk_log of get_list_of_videos_from_youtube) and whether enumeration should stop here.
+        """
+        video_title = f'{video["title"]} [{video["id"]}]' if self.include_id_in_filename else video["title"]
+
+        if approximate_cutoff is not None and video.get("timestamp") and video["timestamp"] < approximate_cutoff:
+            return "Ignoring video as it is long past the cut-off date (judging by its approximate upload date).", True, True
+
+        if video_duration_filter(video, incomplete=True):
+            return f"Skipping video as it is too short: {video_title}", True, False
 
-        if "playlist?list" not in channel_link.lower():
-            if not channel_id:
-                raise Exception("No Channel ID")
-            if not channel_title:
-                raise Exception("No Channel Title")
+        if channel["Live_Rule"] == "Ignore" and video.get("live_status") is not None:
+            return f"Ignoring live video: {video_title}", True, False
 
+        if video["id"] in current_channel_files["id_list"] or video_title in current_channel_files["filename_list"]:
+            return f"File for video '{video_title}' already in folder.", True, False
+
+        # Plain filters always matched "title [id]", expressions anchored to the end of the title need it without id
+        if title_filter is not None and bool(title_filter.search(video_title) or title_filter.search(video["title"])) == channel["Negate_Filter"]:
+            contains = "contains" if channel["Negate_Filter"] else "does not contain"
+            return f"Skipped video as it {contains} the filter text: {channel["Filter_Title_Text"]}", True, False
+
+        return None
+
+    def extract_channel_videos_playlist(self, ydl, channel, known_count):
+        """
+        Extract (lazily) playlist of channel uploads, or of its live videos in "Only" live mode
+
+        Channel Link has to be resolved to channel ID first, resolution is cached in channel_resolutions. Cached one
+        is dropped and the channel resolved again when its playlist can't be extracted. Returns tuple of channel ID,
+        channel title and the playlist.
+        """
+        def extract_playlist(resolution):
             if channel["Live_Rule"] == "Only":
                 self.log.info(f"{channel["Name"]}> Getting list of live videos for this channel")
-                playlist_url = f"{channel_link}/streams"
-            else:
-                self.log.info(f"{channel["Name"]}> Getting list of videos")
-                playlist_url = f"https://www.youtube.com/playlist?list=UU{channel_id[2:]}"
+                return self.extract_playlist_lazily(ydl, f"{channel["Link"]}/streams")
 
-            playlist = ydl.extract_info(playlist_url, download=False)
+            self.log.info(f"{channel["Name"]}> Getting list of videos")
+            return self.extract_playlist_lazily(ydl, resolution["uploads_url"])
 
-        today = datetime.datetime.now()
-        cutoff_date = None if days_to_retrieve == -1 else today - datetime.timedelta(days=days_to_retrieve)
-
-        fails = 0
-        for video in playlist["entries"]:
+        resolution = self.channel_resolutions.get(channel)
+        if resolution is not None:
+            self.log.info(f"{channel["Name"]}> CHANNEL_ID={resolution["channel_id"]}  TITLE='{resolution["title"]}'  KNOWN={known_count}  (cached)")
             try:
-                video_title = f'{video["title"]} [{video["id"]}]' if self.include_id_in_filename else video["title"]
-                duration = 0 if not video["duration"] else video["duration"]
+                return resolution["channel_id"], resolution["title"], extract_playlist(resolution)
+            except Exception as e:
+                self.log.warning(f"{channel["Name"]}> Failed to get videos of cached channel ID, resolving channel again: {e}")
+                self.channel_resolutions.remove(channel)
 
-                if channel["Live_Rule"] == "Only":
-                    if len(video_to_download_list):
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Live video found")
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Downloading only first live video")
-                        break
+        playlist = self.extract_playlist_lazily(ydl, channel["Link"])
+        channel_title = playlist.get("title")
+        channel_id = playlist.get("channel_id")
+        self.log.info(f"{channel["Name"]}> CHANNEL_ID={channel_id}  TITLE='{channel_title}'  KNOWN={known_count}")
 
-                    if video["live_status"] == "is_upcoming":
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Skipping upcoming live video: {video_title}")
-                        continue
+        if not channel_id:
+            raise Exception("No Channel ID")
+        if not channel_title:
+            raise Exception("No Channel Title")
 
-                    if video["live_status"] not in ("is_live", "post_live"):
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> We only want active live videos and none were found")
-                        break
+        resolution = self.channel_resolutions.put(channel, channel_id, channel_title)
+        return channel_id, channel_title, extract_playlist(resolution)
 
-                if channel["Live_Rule"] == "Ignore" and video["live_status"] is not None:
-                    self.log.info(f"{channel["Name"]}|{video["id"]}> Ignoring live video: {video_title}")
-                    continue
+    def get_list_of_videos_from_youtube(self, channel, current_channel_files, walk_log=None):
+        """
+        Get list of videos that should be downloaded for given channel
 
-                if video["id"] in current_channel_files["id_list"] or video_title in current_channel_files["filename_list"]:
-                    self.log.info(f"{channel["Name"]}|{video["id"]}> File for video '{video_title}' already in folder.")
-                    continue
+        Playlist entries are enumerated lazily (newest first) and the enumeration stops as soon as we reach a video
+        from the channel watermark. When walk_log list is passed, (video_id, handled) tuples of all visited videos are
+        appended to it - handled is None for videos that were added to the download list.
+        """
+        days_to_retrieve = channel["DL_Days"]
+        channel_link = channel["Link"]
+        search_limit = channel["Search_Limit"]
+        video_to_download_list = []
+        walk_log = [] if walk_log is None else walk_log
+        known_ids = self.channel_watermarks.get_known_ids(channel)
 
-                self.log.info(f"{channel["Name"]}|{video["id"]}> Extracting info for '{video_title}' ({duration}s long)")
-                video_extracted_info = ydl.extract_info(video["url"], download=False)
+        ydl_opts = {
+            "quiet": True,
+            "extract_flat": True,
+            # Flat entries get approximate upload time parsed from "3 weeks ago", see prefilter_video()
+            "extractor_args": {"youtubetab": {"approximate_date": [""]}},
+        }
+        ydl_opts |= self.ytd_extra_parameters
 
-                video_upload_date_raw = video_extracted_info["upload_date"]
-                video_upload_date = datetime.datetime.strptime(video_upload_date_raw, "%Y%m%d")
-                video_timestamp = video_extracted_info["timestamp"]
+        # Instance is kept for the whole walk, playlist pages are fetched lazily while iterating over entries
+        with self.ydl_pool.lease(ydl_opts) as ydl:
+            if "playlist?list" in channel_link.lower():
+                playlist = self.extract_playlist_lazily(ydl, channel_link)
+                channel_title = playlist.get("title")
+                channel_id = playlist.get("channel_id")
+                self.log.info(f"{channel["Name"]}> CHANNEL_ID={channel_id}  TITLE='{channel_title}'  KNOWN={len(known_ids)}")
+            else:
+                channel_id, channel_title, playlist = self.extract_channel_videos_playlist(ydl, channel, len(known_ids))
+
+            today = datetime.datetime.now()
+            cutoff_date = None if days_to_retrieve == -1 else today - datetime.timedelta(days=days_to_retrieve)
+            approximate_cutoff = None if days_to_retrieve == -1 else time.time() - APPROXIMATE_CUTOFF_FACTOR * (days_to_retrieve + 1) * 86400
+            title_filter = compile_title_filter(channel.get("Filter_Title_Text") or "")
+
+            def prefilter(video):
+                return self.prefilter_video(channel, video, title_filter, current_channel_files, approximate_cutoff)
+
+            fails = 0
+            entries = self.prefetch_video_info(channel, ydl_opts, playlist.get("entries") or [], known_ids, prefilter)
+            for video_idx, (video, video_info_future) in enumerate(entries):
+                if 0 < search_limit <= video_idx:
+                    self.log.info(f"{channel["Name"]}> Search limit of {search_limit} videos reached")
+                    # Older videos were not looked at, so none of the visited ones can become a watermark
+                    walk_log.append((video["id"], False))
+                    break
 
-                current_time = time.time()
-                age_in_hours = (current_time - video_timestamp) / 3600
+                if video["id"] in known_ids:
+                    self.log.info(f"{channel["Name"]}|{video["id"]}> Reached already processed video, no need to look further")
+                    break
 
-                if cutoff_date is not None:
-                    if video_upload_date < cutoff_date:
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Ignoring video as it is older than the cut-off {cutoff_date}.")
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> No more videos in date range")
-                        break
+                try:
+                    video_title = f'{video["title"]} [{video["id"]}]' if self.include_id_in_filename else video["title"]
+                    duration = 0 if not video.get("duration") else video["duration"]
+                    live_status = video.get("live_status")
+
+                    if channel["Live_Rule"] == "Only":
+                        if len(video_to_download_list):
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> Live video found")
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> Downloading only first live video")
+                            break
+
+                        if live_status == "is_upcoming":
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> Skipping upcoming live video: {video_title}")
+                            walk_log.append((video["id"], False))
+                            continue
+
+                        if live_status not in ("is_live", "post_live"):
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> We only want active live videos and none were found")
+                            walk_log.append((video["id"], True))
+                            break
+
+                    # Title, duration, live status... are already in the flat entry, extract only what passes them
+                    skip = prefilter(video)
+                    if skip is not None:
+                        reason, handled, stop = skip
+                        self.log.info(f"{channel["Name"]}|{video["id"]}> {reason}")
+                        walk_log.append((video["id"], handled))
+                        if stop:
+                            break
+                        continue
 
-                if age_in_hours < self.defer_hours and video["live_status"] is None:
-                    self.log.info(f"{channel["Name"]}|{video["id"]}> Video is {age_in_hours:.2f} hours old. Waiting until it's older than {self.defer_hours} hours.")
-                    continue
+                    self.log.info(f"{channel["Name"]}|{video["id"]}> Extracting info for '{video_title}' ({duration}s long)")
+                    if video_info_future is not None:
+                        video_extracted_info = video_info_future.result()
+                    else:
+                        video_extracted_info = self.extract_video_info(ydl, channel, video)
 
-                if channel.get("Filter_Title_Text"):
-                    if channel["Negate_Filter"] and channel["Filter_Title_Text"].lower() in video_title.lower():
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Skipped video as it contains the filter text: {channel["Filter_Title_Text"]}")
-                        continue
+                    video_upload_date_raw = video_extracted_info["upload_date"]
+                    video_upload_date = datetime.datetime.strptime(video_upload_date_raw, "%Y%m%d")
+                    video_timestamp = video_extracted_info["timestamp"]
 
-                    if not channel["Negate_Filter"] and channel["Filter_Title_Text"].lower() not in video_title.lower():
-                        self.log.info(f"{channel["Name"]}|{video["id"]}> Skipped video as it does not contain the filter text: {channel["Filter_Title_Text"]}")
-                        continue
+                    current_time = time.time()
+                    age_in_hours = (current_time - video_timestamp) / 3600
 
-                video_to_download_list.append(
-                        {
-                            "title": video_title,
-                            "upload_date": video_upload_date,
-                            "link": video["url"],
-                            "id": video["id"],
-                            "channel_name": channel_title
-                        })
-                self.log.info(f"{channel["Name"]}|{video["id"]}> Added video to download list")
-                fails = 0
-            except Exception as e:
-                fails += 1
-                self.log.error(f"{channel["Name"]}|{video["id"]}> Error extracting details: {str(e)}")
+                    if cutoff_date is not None:
+                        if video_upload_date < cutoff_date:
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> Ignoring video as it is older than the cut-off {cutoff_date}.")
+                            self.log.info(f"{channel["Name"]}|{video["id"]}> No more videos in date range")
+                            walk_log.append((video["id"], True))
+                            break
 
-                if fails >= 3:
-                    self.log.error(f"{channel["Name"]}> Too many errors in succession, aborting! Please check logs.")
-                    return None
+                    if age_in_hours < self.defer_hours and live_status is None:
+                        self.log.info(f"{channel["Name"]}|{video["id"]}> Video is {age_in_hours:.2f} hours old. Waiting until it's older than {self.defer_hours} hours.")
+                        walk_log.append((video["id"], False))
+                        continue
 
-        return video_to_download_list
+                    item = {
+                        "title": video_title,
+                        "upload_date": video_upload_date,
+                        "timestamp": video_timestamp,
+                        "link": video["url"],
+                        "id": video["id"],
+                        "channel_name": channel_title
+                    }
+                    # Freshly extracted info (not the compact cached one) is kept in the work directory, the downloader
+                    # can reuse it instead of extracting the video again. Live videos change too quickly for that and
+                    # with ignoreerrors a failed download from it would go unnoticed (only download() returns the error).
+                    if (video_extracted_info.get("formats") and video_extracted_info.get("live_status") not in VideoInfoCache.VOLATILE_LIVE_STATES
+                            and not self.ytd_extra_parameters.get("ignoreerrors")):
+                        info = compact_video_info(video_extracted_info, self.subtitles in ("embed", "external"))
+                        if self.download_journal.save_extracted_info(channel, item, info):
+                            item["info_expiry"] = video_info_expiry(info)
+                    video_to_download_list.append(item)
+                    walk_log.append((video["id"], None))
+                    self.log.info(f"{channel["Name"]}|{video["id"]}> Added video to download list")
+                    fails = 0
+                except Exception as e:
+                    fails += 1
+                    walk_log.append((video["id"], False))
+                    self.log.error(f"{channel["Name"]}|{video["id"]}> Error extracting details: {str(e)}")
+
+                    if fails >= 3:
+                        self.log.error(f"{channel["Name"]}> Too many errors in succession, aborting! Please check logs.")
+                        return None
+
+            return video_to_download_list
+
+    def scan_channel_folder(self, channel_folder_path) -> dict:
+        """
+        Walk channel folder once and gather everything the sync needs from it
+
+        Returns dict with video IDs and filenames of media files (for deduplication), media file count and total size
+        of all files (for counters) and archive index rows of media and subtitle files (for retention).
+        """
+        folder_scan = {
+            "id_list": set(),
+            "filename_list": set(),
+            "video_count": 0,
+            "audio_count": 0,
+            "item_count": 0,
+            "item_size": 0,
+            "files": [],
+        }
+        indexable_files = {}
+        start_time = time.monotonic()
 
-    def get_list_of_files_from_channel_folder(self, channel_folder_path):
-        folder_info = { "id_list": [], "filename_list": [] }
-        try:
-            raw_directory_list = os.listdir(channel_folder_path)
-            for filename in raw_directory_list:
-                file_path = os.path.join(channel_folder_path, filename)
-                if not os.path.isfile(file_path):
+        with os.scandir(channel_folder_path) as dir_iterator:
+            for entry in dir_iterator:
+                if not entry.is_file():
                     continue
 
-                try:
-                    file_base_name, file_ext = os.path.splitext(filename)
-                    id_in_title = re.search(r"\[([0-9A-Za-z_-]{10,}[048AEIMQUYcgkosw])\]", file_base_name)
-                    if id_in_title:
-                        if file_ext.lower() in MEDIA_FILE_EXTENSIONS:
-                            folder_info["id_list"].append(id_in_title.group(1))
-                            folder_info["filename_list"].append(file_base_name)
-
-                    elif file_ext.lower() in MEDIA_FILE_EXTENSIONS:
-                        folder_info["filename_list"].append(file_base_name)
-                        mp4_file = MP4(file_path)
-                        embedded_video_id = mp4_file.get("\xa9cmt", [None])[0]
-                        folder_info["id_list"].append(embedded_video_id)
+                stat = entry.stat()
+                folder_scan["item_size"] += stat.st_size
 
-                except Exception as e:
-                    self.log.error(f"No video ID present or cannot read it from metadata of {filename}: {e}")
+                media_type = ArchiveIndex.get_media_type(os.path.splitext(entry.name)[1])
+                if media_type == "video":
+                    folder_scan["video_count"] += 1
+                elif media_type == "audio":
+                    folder_scan["audio_count"] += 1
+
+                if media_type is not None:
+                    indexable_files[entry.path] = (entry.name, stat.st_size, stat.st_mtime_ns, media_type)
+
+        folder_scan["item_count"] = folder_scan["video_count"] + folder_scan["audio_count"]
+        folder_scan["files"] = self.archive_index.refresh_folder(channel_folder_path, indexable_files)
+
+        for row in folder_scan["files"]:
+            if row["media_type"] not in ("video", "audio"):
+                continue
+
+            folder_scan["filename_list"].add(row["title"])
+            if row["video_id"]:
+                folder_scan["id_list"].add(row["video_id"])
+
+        self.metrics.observe("archivetube_stage_duration_seconds", time.monotonic() - start_time, stage="counting")
+        return folder_scan
+
+    def get_list_of_files_from_channel_folder(self, channel_folder_path, folder_scan=None):
+        folder_info = { "id_list": set(), "filename_list": set() }
+        try:
+            folder_scan = folder_scan or self.scan_channel_folder(channel_folder_path)
+            folder_info["id_list"] = folder_scan["id_list"]
+            folder_info["filename_list"] = folder_scan["filename_list"]
 
         except Exception as e:
             self.log.error(f"Error getting list of files for channel folder: {e}")
@@ -451,246 +2945,309 @@ class DataHandler:
             self.log.info(f'Found {len(folder_info["filename_list"])} files and {len(folder_info["id_list"])} IDs in {channel_folder_path}.')
             return folder_info
 
+    def get_channel_folder_path( self, channel ) -> str:
+        return os.path.join(self.audio_download_folder if channel["Audio_Only"] else self.download_folder, channel["Name"])
+
     def count_media_files_for_channel( self, channel ) -> tuple[int, int]:
-        channel_folder_path = self.audio_download_folder if channel["Audio_Only"] else self.download_folder
-        channel_folder_path = os.path.join(channel_folder_path, channel["Name"])
+        channel_folder_path = self.get_channel_folder_path(channel)
 
         if not os.path.isdir(channel_folder_path) or channel["Name"] == "":
             return -1, 0
 
         return self.count_media_files(channel_folder_path)
 
-    def count_media_files(self, channel_folder_path) -> tuple[int, int]:
-        video_item_count = 0
-        audio_item_count = 0
-        files_size = 0
-
-        raw_directory_list = os.listdir(channel_folder_path)
-        for filename in raw_directory_list:
-            file_path = os.path.join(channel_folder_path, filename)
-            if not os.path.isfile(file_path):
-                continue
-
-            files_size += os.path.getsize(file_path)
+    def count_media_files(self, channel_folder_path, folder_scan=None) -> tuple[int, int]:
+        folder_scan = folder_scan or self.scan_channel_folder(channel_folder_path)
 
-            file_base_name, file_ext = os.path.splitext(filename.lower())
-            if file_ext in VIDEO_EXTENSIONS:
-                video_item_count += 1
-            elif file_ext in AUDIO_EXTENSIONS:
-                audio_item_count += 1
+        self.log.info(f"count_media_files|{channel_folder_path}> Found {folder_scan["video_count"]} video files and {folder_scan["audio_count"]} audio files, totalling {number_si_suffix(folder_scan["item_size"])}B")
 
-        self.log.info(f"count_media_files|{channel_folder_path}> Found {video_item_count} video files and {audio_item_count} audio files, totalling {number_si_suffix(files_size)}B")
+        return folder_scan["item_count"], folder_scan["item_size"]
 
-        return video_item_count + audio_item_count, files_size
+    def cleanup_old_files(self, channel_folder_path, channel, folder_scan=None) -> int:
+        """
+        Remove files older than Keep_Days of the channel, returns number of removed files
 
-    def cleanup_old_files(self, channel_folder_path, channel):
+        Only files past the cut-off are fetched from the archive index, which has to be up to date (it gets refreshed
+        by scan_channel_folder()).
+        """
         days_to_keep = channel["Keep_Days"]
 
         if days_to_keep == PERMANENT_RETENTION:
             self.log.info(f"{channel['Name']}> Skipping cleanup due to permanent retention policy.")
-            return
+            return 0
 
-        current_datetime = datetime.datetime.now()
-        raw_directory_list = os.listdir(channel_folder_path)
-        for filename in raw_directory_list:
-            try:
-                file_path = os.path.join(channel_folder_path, filename)
-                if not os.path.isfile(file_path):
-                    continue
+        if folder_scan is None:
+            self.scan_channel_folder(channel_folder_path)
 
-                file_base_name, file_ext = os.path.splitext(filename.lower())
+        media_types = ["audio" if channel["Audio_Only"] else "video"]
+        if self.subtitles == "external":
+            media_types.append("subtitle")
 
-                video_file_check = file_ext in VIDEO_EXTENSIONS and not channel["Audio_Only"]
-                audio_file_check = file_ext in AUDIO_EXTENSIONS and channel["Audio_Only"]
-                subtitle_file_check = file_ext == ".srt" and self.subtitles == "external"
+        cutoff = time.time() - days_to_keep * 86400
+        removed_paths = []
+        removed_count = 0
+        removed_size = 0
+        for file_row in self.archive_index.get_expired(channel_folder_path, cutoff, media_types):
+            try:
+                os.remove(file_row["path"])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.log.error(f"{channel['Name']}> Error Cleaning Old Files: {os.path.basename(file_row["path"])} {str(e)}")
+                continue
 
-                if not (video_file_check or audio_file_check or subtitle_file_check):
-                    continue
+            removed_paths.append(file_row["path"])
+            removed_count += 0 if file_row["media_type"] == "subtitle" else 1
+            removed_size += file_row["size"]
+            self.log.debug(f"{channel['Name']}> Deleted '{os.path.basename(file_row["path"])}' as it is older than {days_to_keep} days.")
 
-                file_mtime = self.get_file_modification_time(file_path, filename, file_ext)
-                age = current_datetime - file_mtime
+        if removed_paths:
+            self.archive_index.remove_paths(removed_paths)
+            self.update_channel_counters(channel, -removed_count, -removed_size)
+            self.log.info(f"{channel['Name']}> Deleted {len(removed_paths)} files older than {days_to_keep} days ({number_si_suffix(removed_size)}B)")
 
-                if age > datetime.timedelta(days=days_to_keep):
-                    os.remove(file_path)
-                    self.log.info(f"{channel['Name']}> Deleted '{filename}' as it is {age.days} days old.")
-                    self.media_server_scan_req_flag = True
-                else:
-                    self.log.info(f"{channel['Name']}> File '{filename}' is {age.days} days old, keeping file as not over {days_to_keep} days.")
+        return len(removed_paths)
 
-            except Exception as e:
-                self.log.error(f"{channel['Name']}> Error Cleaning Old Files: {filename} {str(e)}")
+    def download_item(self, item, channel_folder_path, channel) -> bool:
+        """
+        Download single item to channel folder, returns True on success
+        """
+        self.log.info(f"{channel["Name"]}|{item["id"]}> Processing download of '{item["title"]}' [{item.get("position", "?")}]")
 
-    def get_file_modification_time(self, file_path, filename, file_ext):
+        link = item["link"]
         try:
-            if file_ext == ".srt":
-                file_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-                return file_mtime
-
-            mpeg4_file = MP4(file_path)
-            mpeg4_file_created_timestamp = mpeg4_file.get("\xa9day", [None])[0]
-            if mpeg4_file_created_timestamp:
-                file_mtime = datetime.datetime.strptime(mpeg4_file_created_timestamp, "%Y-%m-%d %H:%M:%S")
-                self.log.info(f"Extracted datetime {file_mtime} from metadata of {filename}")
-                return file_mtime
-            else:
-                raise Exception("No timestamp found")
-
-        except Exception as e:
-            self.log.warning(f"Error extracting datetime from metadata for {filename}: {e}")
-            file_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-            self.log.warning(f"Using filesystem modified timestamp {file_mtime} for {filename}")
-            return file_mtime
+            # Work directory outlives the process, so yt-dlp can continue partial downloads after a restart
+            work_dir = self.download_journal.get_work_dir(channel, item)
+            os.makedirs(work_dir, exist_ok=True)
+            cleaned_title = self.string_cleaner(item["title"])
+            #selected_media_type = channel["Media_Type"]
+            post_processors = []
+
+            if channel["Use_SponsorBlock"]:
+                post_processors.extend(
+                    [
+                        {"key": "SponsorBlock", "categories": ["sponsor"]},
+                        {"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]}
+                    ]
+                )
 
-    def download_items(self, item_list, channel_folder_path, channel):
-        fails = 0
-        temp_dir = None
-        current_item = 0
-        for item in item_list:
-            current_item += 1
+            if channel["Audio_Only"]:
+                if channel["Use_Best_Quality"]:
+                    # Format that contains video, and if it doesn't already have an audio stream, merge it with best audio-only format
+                    selected_format = f"bestaudio/best"
+                    merge_output_format = None
+                    post_processors.append( { "key": "FFmpegExtractAudio", "preferredquality": 0, } )
+                else:
+                    selected_ext = "m4a"
+                    selected_format = f"{self.audio_format_id}/bestaudio[acodec^={self.fallback_acodec}]/bestaudio"
+                    merge_output_format = None
+                    post_processors.append( { "key": "FFmpegExtractAudio", "preferredcodec": selected_ext, "preferredquality": 0, } )
 
-            self.log.info(f"{channel["Name"]}|{item["id"]}> Processing download of '{item["title"]}' [{current_item}/{len(item_list)}]")
 
+            else:
+                if channel["Use_Best_Quality"]:
+                    # Format that contains video, and if it doesn't already have an audio stream, merge it with best audio-only format
+                    selected_format = f"bestvideo*+bestaudio/best"
+                    merge_output_format = None
+                else:
+                    selected_ext = "mp4"
+                    selected_format = f"{self.video_format_id}+{self.audio_format_id}/bestvideo[vcodec^={self.fallback_vcodec}]+bestaudio[acodec^={self.fallback_acodec}]/bestvideo+bestaudio/best"
+                    merge_output_format = selected_ext
+
+            post_processors.extend(
+                [
+                    {"key": "FFmpegMetadata"},
+                    {"key": "EmbedThumbnail"},
+                ]
+            )
+
+            #folder_and_filename = os.path.join(channel_folder_path, cleaned_title)
+            progress = DownloadProgress(channel, item)
+            ydl_opts = {
+                "paths": {"home": channel_folder_path, "temp": work_dir},
+                "format": selected_format,
+                "outtmpl": f"{cleaned_title}.%(ext)s",
+                "writethumbnail": True,
+                "progress_hooks": [lambda progress_data: self.progress_callback(progress, progress_data)],
+                "post_hooks": [lambda file_path: self.count_downloaded_file(channel, file_path)],
+                "postprocessors": post_processors,
+                "no_mtime": channel["Set_Mtime"],
+                "live_from_start": True,
+                "extractor_args": {"youtubetab": {"skip": ["authcheck"]}},
+                "writeinfojson": channel["Write_Info_Json"],
+            }
+            ydl_opts |= self.ytd_extra_parameters
+
+            if self.subtitles in ["embed", "external"]:
+                ydl_opts.update(
+                    {
+                        "subtitlesformat": "best",
+                        "writeautomaticsub": True,
+                        "writesubtitles": True,
+                        "subtitleslangs": self.subtitle_languages,
+                    }
+                )
+                if self.subtitles == "embed":
+                    post_processors.extend([{"key": "FFmpegEmbedSubtitle", "already_have_subtitle": False}])
+                elif self.subtitles == "external":
+                    post_processors.extend([{"key": "FFmpegSubtitlesConvertor", "format": "srt", "when": "before_dl"}])
+
+            if merge_output_format:
+                ydl_opts["merge_output_format"] = merge_output_format
+
+            self.log.info(f"{channel["Name"]}|{item["id"]}> Download parameters: {ydl_opts}")
+            self.wait_for_request_slot()
+            self.log.info(f"{channel["Name"]}|{item["id"]}> Starting yt-dlp")
+            self.download_progress_table.add(progress)
+            self.metrics.inc("archivetube_ytdlp_requests", kind="download")
+            start_time = time.monotonic()
+            yt_ret = None
             try:
-                temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
-                link = item["link"]
-                cleaned_title = self.string_cleaner(item["title"])
-                #selected_media_type = channel["Media_Type"]
-                post_processors = []
-
-                if channel["Use_SponsorBlock"]:
-                    post_processors.append(
-                        [
-                            {"key": "SponsorBlock", "categories": ["sponsor"]},
-                            {"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]}
-                        ]
-                    )
-
-                if channel["Audio_Only"]:
-                    if channel["Use_Best_Quality"]:
-                        # Format that contains video, and if it doesn't already have an audio stream, merge it with best audio-only format
-                        selected_format = f"bestaudio/best"
-                        merge_output_format = None
-                        post_processors.append( { "key": "FFmpegExtractAudio", "preferredquality": 0, } )
-                    else:
-                        selected_ext = "m4a"
-                        selected_format = f"{self.audio_format_id}/bestaudio[acodec^={self.fallback_acodec}]/bestaudio"
-                        merge_output_format = None
-                        post_processors.append( { "key": "FFmpegExtractAudio", "preferredcodec": selected_ext, "preferredquality": 0, } )
-
+                with self.ydl_pool.lease(ydl_opts) as yt_downloader:
+                    yt_ret = self.download_with_extracted_info(yt_downloader, item, channel)
+            finally:
+                self.download_progress_table.remove(progress)
+                end_time = time.monotonic()
+                # Everything after the last stream finished downloading is merging and post-processing
+                finished_time = progress.finished_time or end_time
+                span_attrs = { "video": item["id"] } | ({} if yt_ret == 0 else { "failed": True })
+                self.record_stage(channel, "download", start_time, finished_time, bytes=progress.total_bytes, **span_attrs)
+                self.record_stage(channel, "postprocessing", finished_time, end_time, **span_attrs)
+                if yt_ret != 0:
+                    self.metrics.inc("archivetube_ytdlp_errors", kind="download")
+            self.log.info(f"{channel["Name"]}|{item["id"]}> yt-dlp finished with return code {yt_ret}")
+            item["downloaded"] = yt_ret == 0
+            if item["downloaded"]:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            #self.add_extra_metadata(f"{folder_and_filename}.{selected_ext}", item)
+
+            # Media counters were already updated by count_downloaded_file(), just show progress in GUI
+            self.emit_channel_refresh()
+            return item["downloaded"]
 
-                else:
-                    if channel["Use_Best_Quality"]:
-                        # Format that contains video, and if it doesn't already have an audio stream, merge it with best audio-only format
-                        selected_format = f"bestvideo*+bestaudio/best"
-                        merge_output_format = None
-                    else:
-                        selected_ext = "mp4"
-                        selected_format = f"{self.video_format_id}+{self.audio_format_id}/bestvideo[vcodec^={self.fallback_vcodec}]+bestaudio[acodec^={self.fallback_acodec}]/bestvideo+bestaudio/best"
-                        merge_output_format = selected_ext
+        except Exception as e:
+            self.log.error(f"{channel["Name"]}|{item["id"]}> Error downloading video: {link}. Error message: {e}")
+            return False
 
-                post_processors.extend(
-                    [
-                        {"key": "FFmpegMetadata"},
-                        {"key": "EmbedThumbnail"},
-                    ]
-                )
+    def download_with_extracted_info(self, ydl, item, channel) -> int:
+        """
+        Download item from info extracted while enumerating the channel, so yt-dlp doesn't have to extract it again
+
+        Falls back to downloading from the link (with a fresh extraction) when there is no info, it is about to expire
+        or the download from it fails - e.g. because YT stopped accepting its stream URLs sooner. Returns yt-dlp
+        return code.
+        """
+        # Info is needed just once, don't keep it around while the rest of the queue is downloaded
+        info = self.download_journal.pop_extracted_info(channel, item) if "info_expiry" in item else None
+        info_expiry = item.pop("info_expiry", 0)
+
+        if info is None:
+            result = "missing"
+        elif info_expiry - time.time() < EXTRACTED_INFO_EXPIRY_MARGIN:
+            self.log.info(f"{channel["Name"]}|{item["id"]}> Extracted info expires soon, extracting it again")
+            result = "stale"
+        else:
+            try:
+                ydl.process_ie_result(info, download=True)
+                self.metrics.inc("archivetube_extracted_info_downloads", result="reused")
+                return 0
+            except (yt_dlp.utils.DownloadError, yt_dlp.utils.ReExtractInfo) as e:
+                self.log.warning(f"{channel["Name"]}|{item["id"]}> Download from extracted info failed ({e}), extracting it again")
+
+            self.wait_for_request_slot()
+            result = "failed"
+
+        self.metrics.inc("archivetube_extracted_info_downloads", result=result)
+        return ydl.download([item["link"]])
+
+    def update_channel_counters(self, channel, count_delta, size_delta):
+        with self.channel_counter_lock:
+            channel["Item_Count"] = max(0, channel.get("Item_Count", 0) + count_delta)
+            channel["Item_Size"] = max(0, channel.get("Item_Size", 0) + size_delta)
+
+    def count_downloaded_file(self, channel, file_path):
+        """
+        yt-dlp post hook - add finished file (and its sidecar files) to channel counters without rescanning the folder
+        """
+        try:
+            file_base_name, file_ext = os.path.splitext(file_path)
+            size = os.path.getsize(file_path)
+            count = 1 if file_ext.lower() in MEDIA_FILE_EXTENSIONS else 0
 
-                #folder_and_filename = os.path.join(channel_folder_path, cleaned_title)
-                ydl_opts = {
-                    "paths": {"home": channel_folder_path, "temp": temp_dir.name},
-                    "format": selected_format,
-                    "outtmpl": f"{cleaned_title}.%(ext)s",
-                    "writethumbnail": True,
-                    "progress_hooks": [self.progress_callback],
-                    "postprocessors": post_processors,
-                    "no_mtime": channel["Set_Mtime"],
-                    "live_from_start": True,
-                    "extractor_args": {"youtubetab": {"skip": ["authcheck"]}},
-                    "writeinfojson": channel["Write_Info_Json"],
-                }
-                ydl_opts |= self.ytd_extra_parameters
-
-                if self.youtube_slow is True:
-                    ydl_opts |= self.ytd_slow_parameters
-
-                if self.subtitles in ["embed", "external"]:
-                    ydl_opts.update(
-                        {
-                            "subtitlesformat": "best",
-                            "writeautomaticsub": True,
-                            "writesubtitles": True,
-                            "subtitleslangs": self.subtitle_languages,
-                        }
-                    )
-                    if self.subtitles == "embed":
-                        post_processors.extend([{"key": "FFmpegEmbedSubtitle", "already_have_subtitle": False}])
-                    elif self.subtitles == "external":
-                        post_processors.extend([{"key": "FFmpegSubtitlesConvertor", "format": "srt", "when": "before_dl"}])
-
-                if merge_output_format:
-                    ydl_opts["merge_output_format"] = merge_output_format
-
-                yt_downloader = yt_dlp.YoutubeDL(ydl_opts)
-                self.log.info(f"{channel["Name"]}|{item["id"]}> Download parameters: {ydl_opts}")
-                self.log.info(f"{channel["Name"]}|{item["id"]}> Starting yt-dlp")
-                self.download_progress_report_perc = 0
-                yt_ret = yt_downloader.download([link])
-                self.log.info(f"{channel["Name"]}|{item["id"]}> yt-dlp finished with return code {yt_ret}")
-
-
-                #self.add_extra_metadata(f"{folder_and_filename}.{selected_ext}", item)
-
-                # Update media counter so we can see progress in GUI
-                itm_count, itm_size = self.count_media_files(channel_folder_path)
-                channel.update( { "Item_Count": itm_count, "Item_Size": itm_size } )
-                self.emit_channel_refresh()
+            sidecar_files = [f"{file_base_name}.info.json"] if channel["Write_Info_Json"] else []
+            if self.subtitles == "external":
+                sidecar_files.extend(f"{file_base_name}.{lang.strip()}.srt" for lang in self.subtitle_languages)
 
-                fails = 0
-            except Exception as e:
-                fails += 1
-                self.log.error(f"{channel["Name"]}|{item["id"]}> Error downloading video: {link}. Error message: {e}")
+            for sidecar_file in sidecar_files:
+                if os.path.isfile(sidecar_file):
+                    size += os.path.getsize(sidecar_file)
 
-                if fails >= 3:
-                    self.log.error(f"{channel["Name"]}> Too many errors in succession, aborting! Please check logs.")
-                    return False
+            self.update_channel_counters(channel, count, size)
 
-        if temp_dir is not None:
-            temp_dir.cleanup()
-        return True
+        except Exception as e:
+            self.log.warning(f"{channel["Name"]}> Failed to count downloaded file {file_path}: {e}")
 
-    def progress_callback(self, progress_data):
+    def progress_callback(self, progress, progress_data):
         status = progress_data.get("status", "unknown")
-        is_live_video = progress_data.get("info_dict", {}).get("is_live", False)
-        fragment_index = progress_data.get("fragment_index", 1)
-        show_live_log_message = fragment_index % 10 == 0
-        elapsed = progress_data.get("elapsed", 1)
-        percent = int(progress_data.get("_percent", 0))
-        minutes, seconds = divmod(elapsed, 60)
 
         if status == "finished":
-            self.log.info("Finished downloading video")
+            self.log.info(f"{progress.log_prefix}> Finished downloading video")
+            # Video and audio streams are downloaded separately, next one starts from zero again
+            progress.status = "processing"
+            progress.report_perc = 0
+            progress.downloaded_bytes = 0
+            progress.stream_started = False
+            progress.finished_time = time.monotonic()
+            self.download_progress_table.changed = True
 
         elif status == "downloading":
-            if is_live_video:
-                if not show_live_log_message:
+            downloaded_bytes = progress_data.get("downloaded_bytes") or 0
+            if not progress.stream_started:
+                # Resumed stream reports what is already in the partial file right away, that was downloaded before
+                # (and counted) - only what comes on top of the first report is charged
+                progress.stream_started = True
+                progress.downloaded_bytes = downloaded_bytes
+            elif downloaded_bytes > progress.downloaded_bytes:
+                self.metrics.inc("archivetube_downloaded_bytes", downloaded_bytes - progress.downloaded_bytes, channel=progress.channel_name)
+                if self.download_limiter is not None:
+                    self.download_limiter.consume(downloaded_bytes - progress.downloaded_bytes)
+
+            # Keep this cheap, it gets called many times per second - the progress table publishes it periodically
+            if progress.is_live is None:
+                info_dict = progress_data.get("info_dict")
+                progress.is_live = bool(info_dict and info_dict.get("is_live"))
+            progress.status = status
+            progress.downloaded_bytes = downloaded_bytes
+            progress.total_bytes = progress_data.get("total_bytes") or progress_data.get("total_bytes_estimate")
+            progress.speed = progress_data.get("speed")
+            progress.eta = progress_data.get("eta")
+            progress.fragment_index = progress_data.get("fragment_index")
+            self.download_progress_table.changed = True
+
+            if progress.is_live:
+                fragment_index = progress.fragment_index or 1
+                if fragment_index % 10 != 0:
                     return
+                minutes, seconds = divmod(progress_data.get("elapsed", 1), 60)
                 downloaded_bytes_str = progress_data.get("_downloaded_bytes_str", "0")
                 elapsed_str = f"{int(minutes)} minutes and {int(seconds)} seconds"
-                self.log.info(f"Live Video - Downloaded: {downloaded_bytes_str} (Fragment Index: {fragment_index}, Elapsed: {elapsed_str})")
+                self.log.info(f"{progress.log_prefix}> Live Video - Downloaded: {downloaded_bytes_str} (Fragment Index: {fragment_index}, Elapsed: {elapsed_str})")
 
             else:
                 # Display progress message only once each 5%
-                if percent < self.download_progress_report_perc:
+                percent = int(progress_data.get("_percent", 0))
+                if percent < progress.report_perc:
                     return
 
-                self.download_progress_report_perc = (int(percent/5)+1)*5
+                progress.report_perc = (int(percent/5)+1)*5
 
                 percent_str = progress_data.get("_percent_str", "unknown")
                 total_bytes_str = progress_data.get("_total_bytes_str", "unknown")
                 speed_str = progress_data.get("_speed_str", "unknown")
                 eta_str = progress_data.get("_eta_str", "unknown")
 
-                self.log.info(f"Downloaded {percent_str} of {total_bytes_str} at {speed_str} with ETA {eta_str}")
+                self.log.info(f"{progress.log_prefix}> Downloaded {percent_str} of {total_bytes_str} at {speed_str} with ETA {eta_str}")
 
     def add_extra_metadata(self, file_path, item):
         try:
@@ -708,139 +3265,346 @@ class DataHandler:
         except Exception as e:
             self.log.error(f"Error adding metadata to {file_path}: {e}")
 
-    def master_queue(self):
+    def collect_partial_downloads(self):
+        removed = self.download_journal.collect_garbage(self.partial_max_age_days * 86400, self.partial_max_size)
+        if removed:
+            self.log.info(f"Removed {removed} stale partial downloads from {self.download_journal.work_folder}")
+
+    def resume_interrupted_downloads(self):
+        """
+        Download items that were queued when the app was stopped, yt-dlp continues their partial files
+        """
+        self.collect_partial_downloads()
+        interrupted_items = self.download_journal.get_interrupted_items()
+        channel_uids = { channel["Uid"] for channel in self.req_channel_list }
+        for channel_uid in [ uid for uid in interrupted_items if uid not in channel_uids ]:
+            self.download_journal.remove_channel({ "Uid": channel_uid })
+            del interrupted_items[channel_uid]
+
+        if interrupted_items:
+            self.log.warning(f"Resuming {sum(len(items) for items in interrupted_items.values())} interrupted downloads "
+                             f"of {len(interrupted_items)} channels")
+            self.master_queue(resume_items=interrupted_items)
+
+    def master_queue(self, channel_ids=None, resume_items=None, not_synced_since=None):
+        """
+        Sync all channels, or just the ones with given Ids
+
+        With resume_items (dict of channel Uid -> items) the channels in it just download these items without asking YT
+        for new ones. Channels are leased as their enumeration starts, the ones leased by other sync workers are
+        skipped, as are channels whose sync started after not_synced_since (unix time) when given.
+        """
         if self.task_thread_started:
             self.log.info("Sync Task already running, not starting another one until it finishes")
             return
 
         sync_eligible_channels = 0
+        sync_stats = self.sync_stats = SyncStats()
+        self.sync_trace = SyncTrace()
+        profiler = None
+        # Web frontend passes the flag to workers through the job store, the first one to start a sync takes it
+        if self.profile_next_sync or (self.role == "worker" and self.job_store.take_flag("profile_next_sync")):
+            self.profile_next_sync = False
+            self.log.warning("Profiling this sync")
+            profiler = SamplingProfiler(PROFILER_INTERVAL)
+            profiler.start()
+
         try:
             self.task_thread_started = True
-            self.media_server_scan_req_flag = False
-            self.process_channel_errors = 0
-            self.log.warning(f"Sync Task started for {len(self.req_channel_list)} channels")
+            if resume_items is not None:
+                channel_ids = [ channel["Id"] for channel in self.req_channel_list if channel["Uid"] in resume_items ]
+            channels_to_sync = self.req_channel_list if channel_ids is None else [ channel for channel in self.req_channel_list if channel["Id"] in channel_ids ]
+            self.log.warning(f"Sync Task started for {len(channels_to_sync)} channels")
             socketio.emit("sync_state_changed", { "Sync_State": "run" })
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit) as executor:
-                futures = []
-                for channel in self.req_channel_list:
-                    if self.process_channel_errors >= 3:
-                        raise Exception("Too many errors, aborting sync! Please check logs.")
-
-                    if channel.get("Last_Synced") in ["In Progress", "Queued"]:
-                        self.log.info(f"queue|{channel["Name"]}> Channel synchronization already in progress")
-                        continue
+            channel_syncs = []
+            for channel in channels_to_sync:
+                if channel.get("Last_Synced") in ["In Progress", "Queued"]:
+                    self.log.info(f"queue|{channel["Name"]}> Channel synchronization already in progress")
+                    continue
 
-                    if channel.get("Paused") == 1:
-                        self.log.info(f"queue|{channel["Name"]}> Channel paused, skipping")
-                        continue
+                if channel.get("Paused") == 1:
+                    self.log.info(f"queue|{channel["Name"]}> Channel paused, skipping")
+                    continue
 
-                    self.log.info(f"queue|{channel["Name"]}> Adding channel to sync queue")
+                self.log.info(f"queue|{channel["Name"]}> Adding channel to sync queue")
+                channel_sync = ChannelSync(channel, self.get_channel_folder_path(channel))
+                channel_sync.not_synced_since = not_synced_since
+                # Every worker queues all channels, they would just overwrite state of the ones synced by the others
+                if self.role == "all":
                     channel["Last_Synced"] = "Queued"
-                    sync_eligible_channels += 1
-                    futures.append(executor.submit(self.process_channel, channel))
-                self.emit_channel_refresh()
-            concurrent.futures.wait(futures)
+                if resume_items is not None:
+                    channel_sync.resume_items = resume_items[channel["Uid"]]
+                channel_syncs.append(channel_sync)
+            sync_eligible_channels = len(channel_syncs)
+            self.emit_channel_refresh()
+
+            self.run_sync_pipeline(channel_syncs, sync_stats)
+            self.video_info_cache.save()
+            self.channel_watermarks.save()
+            self.channel_resolutions.save()
+            self.channel_scheduler.save()
 
             if self.req_channel_list:
-                self.save_channel_list_to_file()
+                self.channel_store.mark_changed()
+                self.channel_store.flush()
             else:
                 self.log.warning("Channel list empty")
 
-            if self.media_server_scan_req_flag is True and self.media_server_tokens:
-                self.sync_media_servers()
+            if sync_stats.media_server_scan_required and self.media_server_tokens:
+                # Folders were queued as their channels finished, no need to wait for the rest of the delay now
+                self.media_server_notifier.flush()
             else:
                 self.log.info("Media Server Sync not required")
 
         except Exception as e:
             self.log.error(f"Sync error: {str(e)}")
 
-        if self.process_channel_errors >= 3 or self.process_channel_errors == sync_eligible_channels:
-            self.log.error(f"Sync failed completely ({self.process_channel_errors}/{sync_eligible_channels} failed)")
+        # Channels are released as they finish, this covers the ones that never got that far
+        self.job_store.release_all()
+        channel_errors = sync_stats.channel_errors
+        if channel_errors >= 3 or channel_errors == sync_eligible_channels:
+            self.log.error(f"Sync failed completely ({channel_errors}/{sync_eligible_channels} failed)")
             socketio.emit("sync_state_changed", {"Sync_State": "stop", "Success": False})
 
-        elif self.process_channel_errors > 0:
-            self.log.warning(f"Sync finished with some errors ({self.process_channel_errors}/{sync_eligible_channels} failed)")
+        elif channel_errors > 0:
+            self.log.warning(f"Sync finished with some errors ({channel_errors}/{sync_eligible_channels} failed)")
             socketio.emit("sync_state_changed", {"Sync_State": "stop", "Success": True})
 
         else:
             self.log.info(f"Sync Finished: Completed all {sync_eligible_channels} channels")
             socketio.emit("sync_state_changed", {"Sync_State": "stop", "Success": True})
 
+        self.sync_trace.end()
+        try:
+            report_name = self.sync_reports.save(self.sync_trace, profiler.stop() if profiler is not None else None)
+            self.log.info(f"Sync report saved as {report_name}")
+        except Exception as e:
+            self.log.error(f"Error saving sync report: {str(e)}")
+        self.sync_trace = None
+
         self.emit_channel_refresh()
         self.task_thread_started = False
 
-    def process_channel(self, channel):
-        sync_encountered_problem = False
+    def run_sync_pipeline(self, channel_syncs, sync_stats):
+        """
+        Sync channels in three stages with separately sized worker pools
+
+        Metadata workers enumerate channels and feed a shared download queue, download workers pull items from it
+        (round-robin across channels) and once all items of a channel are processed, the channel is handed over to
+        cleanup workers. Slow channel backfill therefore does not block enumeration of other channels.
+        """
+        download_queue = FairDownloadQueue(self.channel_download_threads)
+        metadata_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.metadata_threads)
+        download_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.download_threads)
+        cleanup_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.cleanup_threads)
+        self.log.info(f"Sync pipeline: {self.metadata_threads} metadata, {self.download_threads} download "
+                      f"({self.channel_download_threads} per channel) and {self.cleanup_threads} cleanup workers")
+        if self.download_limiter is not None:
+            self.log.info(f"Total download speed limited to {number_si_suffix(self.download_rate_limit)}B/s")
+
+        try:
+            for _ in range(self.download_threads):
+                download_executor.submit(self.download_worker, download_queue, cleanup_executor, sync_stats)
+
+            enumeration_futures = [
+                self.submit_stage(metadata_executor, "enumeration", self.enumerate_channel, channel_sync, download_queue, cleanup_executor, sync_stats)
+                for channel_sync in channel_syncs
+            ]
+            concurrent.futures.wait(enumeration_futures)
+
+        finally:
+            download_queue.close()
+            metadata_executor.shutdown(wait=True)
+            download_executor.shutdown(wait=True)
+            cleanup_executor.shutdown(wait=True)
+            # Syncs are hours apart, there is no point in keeping idle connections around until the next one
+            self.ydl_pool.clear()
+            self.collect_partial_downloads()
+
+    def enumerate_channel(self, channel_sync, download_queue, cleanup_executor, sync_stats):
+        """
+        Pipeline stage 1 - scan channel folder, get list of videos to download and queue them
+        """
+        channel = channel_sync.channel
+        # Leasing channels only as they start lets idle workers take the rest of the queue
+        if not self.job_store.acquire_channel(channel["Uid"], channel_sync.not_synced_since):
+            self.log.info(f'{channel["Name"]}> Channel is being synced or was just synced by another worker, skipping')
+            channel["Last_Synced"] = channel_sync.last_synced
+            self.emit_channel_refresh()
+            return
+
+        if sync_stats.channel_errors >= 3:
+            self.log.error(f'{channel["Name"]}> Too many errors, skipping channel! Please check logs.')
+            channel["Last_Synced"] = "Incomplete"
+            self.emit_channel_refresh()
+            self.job_store.release_channel(channel["Uid"])
+            return
+
         try:
             channel["Last_Synced"] = "In Progress"
-            channel_folder_path = os.path.join(self.audio_download_folder, channel["Name"]) if channel["Audio_Only"] else os.path.join(self.download_folder, channel["Name"])
-            os.makedirs(channel_folder_path, exist_ok=True)
-
-            self.log.info(f'{channel["Name"]}> Getting current list of files for channel from {channel_folder_path}')
-            current_channel_files = self.get_list_of_files_from_channel_folder(channel_folder_path)
-
-            self.log.info(f'{channel["Name"]}> Getting list of videos from {channel["Link"]}')
-            item_download_list = self.get_list_of_videos_from_youtube(channel, current_channel_files)
-
-            # We generally don't bail out when we increase process_channel_errors counter because we still want to
-            # continue & clean up old files etc...
-            if item_download_list is None:
-                self.process_channel_errors += 1
-                sync_encountered_problem = True
-                self.log.warning(f'{channel["Name"]}> FAILED to get list of videos from YT, increasing error counter to {self.process_channel_errors}')
-
-            elif item_download_list:
-                channel["Remote_Count"] = len(item_download_list)
-                self.log.info(f'{channel["Name"]}> Downloading video list')
-                if not self.download_items(item_download_list, channel_folder_path, channel):
-                    self.process_channel_errors += 1
-                    sync_encountered_problem = True
-                    self.log.warning(f'{channel["Name"]}> FAILED downloading videos for channel, increasing error counter to {self.process_channel_errors}')
+            self.emit_channel_refresh()
+            os.makedirs(channel_sync.channel_folder_path, exist_ok=True)
 
-                else:
-                    self.log.info(f'{channel["Name"]}> Finished downloading videos for channel')
+            self.log.info(f'{channel["Name"]}> Getting current list of files for channel from {channel_sync.channel_folder_path}')
+            start_time = time.monotonic()
+            channel_sync.folder_scan = self.scan_channel_folder(channel_sync.channel_folder_path)
+            self.trace_span(channel, "counting", start_time, time.monotonic(), files=channel_sync.folder_scan["item_count"])
+            current_channel_files = self.get_list_of_files_from_channel_folder(channel_sync.channel_folder_path, channel_sync.folder_scan)
+
+            # Counters are reconciled with the folder content here, downloads and cleanup only adjust them
+            itm_count, itm_size = self.count_media_files(channel_sync.channel_folder_path, channel_sync.folder_scan)
+            channel["Item_Count"] = itm_count
+            channel["Item_Size"] = itm_size
 
-                self.media_server_scan_req_flag = True
+            if channel_sync.resume_items is not None:
+                self.log.info(f'{channel["Name"]}> Resuming {len(channel_sync.resume_items)} interrupted downloads')
+                channel_sync.items = [ item for item in channel_sync.resume_items if item["id"] not in current_channel_files["id_list"] ]
+            else:
+                self.log.info(f'{channel["Name"]}> Getting list of videos from {channel["Link"]}')
+                with self.sync_stage(channel, "enumeration") as span_attrs:
+                    channel_sync.items = self.get_list_of_videos_from_youtube(channel, current_channel_files, channel_sync.walk_log)
+                    span_attrs["visited"] = len(channel_sync.walk_log)
+                    span_attrs["items"] = None if channel_sync.items is None else len(channel_sync.items)
+
+            # We generally don't bail out when we increase error counter because we still want to continue & clean up
+            # old files etc...
+            if channel_sync.items is None:
+                channel_errors = sync_stats.add_channel_error()
+                channel_sync.problem = True
+                self.log.warning(f'{channel["Name"]}> FAILED to get list of videos from YT, increasing error counter to {channel_errors}')
+
+            elif channel_sync.items:
+                channel["Remote_Count"] = len(channel_sync.items)
+                for idx, item in enumerate(channel_sync.items, start=1):
+                    item["position"] = f"{idx}/{len(channel_sync.items)}"
+
+                self.log.info(f'{channel["Name"]}> Queueing {len(channel_sync.items)} videos for download')
+                self.download_journal.add_items(channel, channel_sync.items)
+                # Channel gets handed over to cleanup by the download worker that finishes its last item
+                download_queue.put_channel(channel_sync, channel_sync.items)
+                self.metrics.set("archivetube_queue_depth", download_queue.queued_count(), queue="download")
+                return
 
             else:
                 self.log.warning(f'{channel["Name"]}> No videos to download')
                 channel["Remote_Count"] = 0
 
-            self.log.info(f'{channel["Name"]}> Clearing old files')
-            self.cleanup_old_files(channel_folder_path, channel)
-            self.log.info(f'{channel["Name"]}> Finished clearing old files, recounting files...')
-            itm_count, itm_size = self.count_media_files(channel_folder_path)
-            channel["Item_Count"] = itm_count
-            channel["Item_Size"] = itm_size
+        except Exception as e:
+            self.log.error(f'{channel["Name"]}> Error processing channel: {str(e)}')
+            channel_sync.problem = True
+
+        self.submit_stage(cleanup_executor, "cleanup", self.finish_channel, channel_sync, sync_stats)
+
+    def download_worker(self, download_queue, cleanup_executor, sync_stats):
+        """
+        Pipeline stage 2 - download items from the shared queue until it is closed and drained
+        """
+        while (job := download_queue.get()) is not None:
+            channel_sync, item = job
+            channel = channel_sync.channel
+            drop_remaining = False
+            self.metrics.set("archivetube_queue_depth", download_queue.queued_count(), queue="download")
+
+            try:
+                with self.worker_active("download"):
+                    success = self.download_item(item, channel_sync.channel_folder_path, channel)
+            except Exception as e:
+                self.log.error(f'{channel["Name"]}|{item["id"]}> Download worker error: {str(e)}')
+                success = False
+
+            if success:
+                sync_stats.request_media_server_scan(channel_sync.channel_folder_path)
+
+            # Several workers can be downloading items of the same channel at once
+            with channel_sync.lock:
+                if success:
+                    channel_sync.download_fails = 0
+                else:
+                    channel_sync.download_fails += 1
+                    if channel_sync.download_fails >= 3 and not channel_sync.download_failed:
+                        self.log.error(f"{channel["Name"]}> Too many errors in succession, aborting! Please check logs.")
+                        channel_sync.download_failed = True
+                        drop_remaining = True
+
+            finished = download_queue.task_done(channel_sync, drop_remaining)
+            self.metrics.set("archivetube_queue_depth", download_queue.queued_count(), queue="download")
+            if finished:
+                self.submit_stage(cleanup_executor, "cleanup", self.finish_channel, channel_sync, sync_stats)
+
+    def finish_channel(self, channel_sync, sync_stats):
+        """
+        Pipeline stage 3 - update watermark, remove old files and mark channel as synced
+        """
+        channel = channel_sync.channel
+        try:
+            if channel_sync.download_failed:
+                channel_errors = sync_stats.add_channel_error()
+                channel_sync.problem = True
+                self.log.warning(f'{channel["Name"]}> FAILED downloading videos for channel, increasing error counter to {channel_errors}')
+            elif channel_sync.items:
+                self.log.info(f'{channel["Name"]}> Finished downloading videos for channel')
+
+            if channel_sync.items is not None:
+                downloaded_ids = { item["id"] for item in channel_sync.items if item.get("downloaded") }
+                self.channel_watermarks.update(channel, channel_sync.walk_log, downloaded_ids)
+                # Failed items are not resumed on their own, next sync finds them again (and reuses their work dirs)
+                self.download_journal.remove_items(channel, channel_sync.items)
+
+            if channel_sync.folder_scan is not None:
+                self.log.info(f'{channel["Name"]}> Clearing old files')
+                with self.sync_stage(channel, "cleanup") as span_attrs:
+                    removed_files = self.cleanup_old_files(channel_sync.channel_folder_path, channel, channel_sync.folder_scan)
+                    span_attrs["removed"] = removed_files
+                if removed_files:
+                    sync_stats.request_media_server_scan(channel_sync.channel_folder_path)
+                self.log.info(f'{channel["Name"]}> Finished clearing old files ({removed_files} removed), channel now has {channel["Item_Count"]} items totalling {number_si_suffix(channel["Item_Size"])}B')
+
+            if channel_sync.channel_folder_path in sync_stats.changed_folders and self.media_server_tokens:
+                self.media_server_notifier.request_scan(channel_sync.channel_folder_path)
 
         except Exception as e:
             self.log.error(f'{channel["Name"]}> Error processing channel: {str(e)}')
-            sync_encountered_problem = True
+            channel_sync.problem = True
 
         finally:
             # TODO: Update Last_Synced only on successful sync - right now the logic is not really ideal, when Sync
             #       starts it changes Last_Synced to "In Progress" and saves it to the channel_list.json... So we really
             #       *have* to set it like this for now. But I want to fix this properly...
 
-            if not sync_encountered_problem:
+            if not channel_sync.problem:
                 self.log.info(f'{channel["Name"]}> Channel processed')
-                channel["Last_Synced"] = datetime.datetime.now().strftime("%d-%m-%y %H:%M:%S")
+                channel["Last_Synced"] = datetime.datetime.now().strftime(LAST_SYNCED_FORMAT)
+                channel["Last_Success"] = time.time()
             else:
                 self.log.warning(f'{channel["Name"]}> Channel processed with some problems (check logs).')
                 channel["Last_Synced"] = "Failed"
             self.emit_channel_refresh()
 
+            trace = self.sync_trace
+            if trace is not None:
+                trace.end_span(trace.channel_span(channel), problem=channel_sync.problem,
+                               downloaded=sum(1 for item in channel_sync.items or [] if item.get("downloaded")))
+
+            if self.adaptive_schedule:
+                upload_times = [ item.get("timestamp") for item in channel_sync.items or [] ]
+                interval = self.channel_scheduler.record_sync(channel, not channel_sync.problem, upload_times)
+                self.log.info(f'{channel["Name"]}> Next sync in {interval / 3600:.1f} hours')
+
+            self.job_store.release_channel(channel["Uid"])
+
     def add_channel(self):
         existing_ids = [channel.get("Id", 0) for channel in self.req_channel_list]
         next_id = max(existing_ids, default=-1) + 1
         new_channel = {
             "Id": next_id,
+            "Uid": os.urandom(8).hex(),
             "Name": "New Channel",
             "Link": "https://www.youtube.com/@NewChannel",
             "Keep_Days": 28,
             "DL_Days": 14,
             "Last_Synced": "Never",
+            "Last_Success": None,
             "Item_Count": 0,
             "Item_Size": 0,
             "Remote_Count": 0,
@@ -853,29 +3617,113 @@ class DataHandler:
             "Set_Mtime": True,
         }
         self.req_channel_list.append(new_channel)
-        socketio.emit("new_channel_added", new_channel)
+        self.emit_channel_refresh()
         self.save_channel_list_to_file()
 
     def emit_channel_refresh( self ):
-        socketio.emit("update_channel_list", {"Channel_List": self.req_channel_list})
+        """
+        Let UI clients know the channel list changed, changes are sent coalesced by the channel list publisher
+        """
+        self.channel_list_publisher.mark_changed()
+        # Runtime state (counters, Last_Synced) is what changes with nearly every refresh
+        self.channel_store.mark_changed()
 
     def remove_channel(self, channel_to_be_removed):
+        # Clients send back just what they got, Uid is taken from the channel we have
+        channel_to_be_removed = next((channel for channel in self.req_channel_list if channel["Id"] == channel_to_be_removed["Id"]), None)
+        if channel_to_be_removed is None:
+            return
         self.req_channel_list = [channel for channel in self.req_channel_list if channel["Id"] != channel_to_be_removed["Id"]]
         self.save_channel_list_to_file()
+        # Web frontend has only stale copies of these, saving them would throw away what sync workers wrote since
+        if self.role != "web":
+            self.channel_watermarks.remove(channel_to_be_removed)
+            self.channel_watermarks.save()
+            self.channel_resolutions.remove(channel_to_be_removed)
+            self.channel_resolutions.save()
+            self.channel_scheduler.remove(channel_to_be_removed)
+            self.channel_scheduler.save()
+            self.download_journal.remove_channel(channel_to_be_removed)
+        self.emit_channel_refresh()
 
-    def sync_media_servers(self):
+    def get_library_relative_paths(self, folder_paths):
+        """
+        Paths of channel folders relative to download folders (as they appear under media server library locations),
+        None when some folder is outside of them
+        """
+        relative_paths = set()
+        for folder_path in folder_paths:
+            for root_folder in (self.download_folder, self.audio_download_folder):
+                relative_path = os.path.relpath(os.path.abspath(folder_path), os.path.abspath(root_folder))
+                if not relative_path.startswith(os.pardir):
+                    relative_paths.add(relative_path.replace(os.sep, "/"))
+                    break
+            else:
+                return None
+        return sorted(relative_paths)
+
+    def get_plex_server(self, address, token):
+        plex_server = self.plex_servers.get((address, token))
+        if plex_server is None:
+            plex_server = PlexServer(address, token, session=self.media_server_session)
+            self.plex_servers[(address, token)] = plex_server
+        return plex_server
+
+    def get_library_scan_paths(self, locations, relative_paths, list_folder_names):
+        """
+        Paths of changed channel folders on the media server, None when some of them can't be found there
+
+        Each relative path is joined only to the library location that holds its channel folder (video and audio
+        downloads are usually different locations), list_folder_names(location) lists folders in a location.
+        """
+        folder_names = { location: set(list_folder_names(location)) for location in locations }
+        scan_paths = []
+        for relative_path in relative_paths:
+            channel_folder_name = relative_path.split("/", 1)[0]
+            matching_locations = [ location for location in locations if channel_folder_name in folder_names[location] ]
+            if not matching_locations:
+                self.log.warning(f"Folder '{relative_path}' not found in any location of library '{self.media_server_library_name}'")
+                return None
+            scan_paths.extend(posixpath.join(location, relative_path) for location in matching_locations)
+        return scan_paths
+
+    def sync_media_servers(self, changed_folders=None):
+        """
+        Have media servers scan given channel folders, or the whole library when they are not known
+
+        Folders are mapped to paths on the media server through locations of the library. If that is not possible,
+        or the partial scan fails, full library scan is requested instead.
+        """
         media_servers = self.convert_string_to_dict(self.media_server_addresses)
         media_tokens = self.convert_string_to_dict(self.media_server_tokens)
+        relative_paths = None if changed_folders is None else self.get_library_relative_paths(changed_folders)
+
         if "Plex" in media_servers and "Plex" in media_tokens:
             try:
                 token = media_tokens.get("Plex")
                 address = media_servers.get("Plex")
                 self.log.warning("Attempting Plex Sync")
-                media_server_server = PlexServer(address, token)
-                library_section = media_server_server.library.section(self.media_server_library_name)
-                library_section.update()
-                self.log.info(f"Plex Library scan for '{self.media_server_library_name}' started.")
+                plex_server = self.get_plex_server(address, token)
+                library_section = plex_server.library.section(self.media_server_library_name)
+                scan_paths = None
+                if relative_paths and library_section.locations:
+                    try:
+                        scan_paths = self.get_library_scan_paths(library_section.locations, relative_paths, lambda location: [
+                            posixpath.basename(path.path.rstrip("/")) for path in plex_server.browse(location, includeFiles=False)
+                        ])
+                        for scan_path in scan_paths or []:
+                            library_section.update(path=scan_path)
+                    except Exception as e:
+                        self.log.warning(f"Plex scan of changed folders failed: {str(e)}, scanning everything")
+                        scan_paths = None
+
+                if scan_paths:
+                    self.log.info(f"Plex Library scan of {len(scan_paths)} folders in '{self.media_server_library_name}' started.")
+                else:
+                    library_section.update()
+                    self.log.info(f"Plex Library scan for '{self.media_server_library_name}' started.")
             except Exception as e:
+                self.plex_servers.clear()
                 self.log.info(f"Plex Library scan failed: {str(e)}")
 
         if "Jellyfin" in media_servers and "Jellyfin" in media_tokens:
@@ -883,15 +3731,54 @@ class DataHandler:
                 token = media_tokens.get("Jellyfin")
                 address = media_servers.get("Jellyfin")
                 self.log.info("Attempting Jellyfin Sync")
-                url = f"{address}/Library/Refresh?api_key={token}"
-                response = requests.post(url)
-                if response.status_code == 204:
-                    self.log.info("Jellyfin Library refresh request successful.")
-                else:
-                    self.log.info(f"Jellyfin Error: {response.status_code}, {response.text}")
+                paths_updated = False
+                if relative_paths:
+                    try:
+                        paths_updated = self.update_jellyfin_paths(address, token, relative_paths)
+                    except Exception as e:
+                        self.log.warning(f"Jellyfin scan of changed folders failed: {str(e)}, refreshing everything")
+
+                if not paths_updated:
+                    response = self.media_server_session.post(f"{address}/Library/Refresh", params={"api_key": token}, timeout=30)
+                    if response.status_code == 204:
+                        self.log.info("Jellyfin Library refresh request successful.")
+                    else:
+                        self.log.info(f"Jellyfin Error: {response.status_code}, {response.text}")
             except Exception as e:
                 self.log.info(f"Jellyfin Library scan failed: {str(e)}")
 
+    def update_jellyfin_paths(self, address, token, relative_paths) -> bool:
+        """
+        Report changed folders to Jellyfin (it then scans just these), returns False when full refresh is needed
+        """
+        response = self.media_server_session.get(f"{address}/Library/VirtualFolders", params={"api_key": token}, timeout=30)
+        response.raise_for_status()
+        locations = next((library.get("Locations") for library in response.json() if library.get("Name") == self.media_server_library_name), None)
+        if not locations:
+            self.log.warning(f"Jellyfin library '{self.media_server_library_name}' not found or it has no locations, refreshing everything")
+            return False
+
+        def list_folder_names(location):
+            response = self.media_server_session.get(f"{address}/Environment/DirectoryContents", timeout=30, params={
+                "api_key": token, "path": location, "includeDirectories": "true", "includeFiles": "false",
+            })
+            response.raise_for_status()
+            return [ entry.get("Name") for entry in response.json() ]
+
+        scan_paths = self.get_library_scan_paths(locations, relative_paths, list_folder_names)
+        if not scan_paths:
+            return False
+
+        updates = [ { "Path": scan_path, "UpdateType": "Modified" } for scan_path in scan_paths ]
+        response = self.media_server_session.post(f"{address}/Library/Media/Updated", params={"api_key": token},
+                                                  json={ "Updates": updates }, timeout=30)
+        if response.status_code != 204:
+            self.log.warning(f"Jellyfin Error: {response.status_code}, {response.text}, refreshing everything")
+            return False
+
+        self.log.info(f"Jellyfin scan of {len(scan_paths)} folders in '{self.media_server_library_name}' requested.")
+        return True
+
     def string_cleaner(self, input_string):
         if isinstance(input_string, str):
             raw_string = re.sub(r'[\/:*?"<>|]', " ", input_string)
@@ -930,6 +3817,12 @@ class DataHandler:
         self.media_server_library_name = data["media_server_library_name"]
         self.ignore_ssl_errors = data["ignore_ssl_errors"]
         self.youtube_slow = data["youtube_slow"]
+        self.profile_next_sync = bool(data.get("profile_next_sync", False))
+        if self.role == "web":
+            self.job_store.set_flag("profile_next_sync", self.profile_next_sync)
+        self.plex_servers.clear()
+        # Don't keep idle instances created with the old settings around
+        self.ydl_pool.clear()
 
         try:
             if data["sync_start_times"] == "":
@@ -950,8 +3843,11 @@ class DataHandler:
 
     def save_channel_changes(self, channel_to_be_saved):
         try:
+            # Invalid title filter expression would break every sync of the channel, refuse it right away
+            compile_title_filter(channel_to_be_saved.get("Filter_Title_Text") or "")
+
             # Remove fields that we don't want to be updatable from WebGUI
-            for rem in ("Item_Count", "Item_Size", "Last_Synced", "Remote_Count"):
+            for rem in ("Uid", *ChannelStore.STATE_FIELDS):
                 channel_to_be_saved.pop(rem, None)
 
             for channel in self.req_channel_list:
@@ -968,15 +3864,19 @@ class DataHandler:
 
         else:
             self.save_channel_list_to_file()
+            self.emit_channel_refresh()
             return True
 
     def manual_start(self):
-        if not self.task_thread_started:
+        if self.is_sync_running():
+            self.log.warning("Cannot trigger manual sync, previous sync still running...")
+        elif self.role == "web":
+            self.log.warning("Manual sync triggered, requesting it from sync workers.")
+            self.job_store.request_sync()
+        else:
             self.log.warning("Manual sync triggered.")
             self.task_thread = threading.Thread(target=self.master_queue, daemon=True)
             self.task_thread.start()
-        else:
-            self.log.warning("Cannot trigger manual sync, previous sync still running...")
 
         #socketio.emit("settings_save_message", "Manual sync initiated.")
 
@@ -992,10 +3892,41 @@ def home():
     return render_template("base.html")
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(data_handler.metrics.render(), content_type="application/openmetrics-text; version=1.0.0; charset=utf-8")
+
+
+@app.route("/sync_reports/<name>.folded")
+def sync_report_profile(name):
+    profile = data_handler.sync_reports.load_profile(name)
+    if profile is None:
+        return Response("Profile not found", status=404, mimetype="text/plain")
+    return Response(profile, mimetype="text/plain", headers={ "Content-Disposition": f"attachment; filename={name}.folded" })
+
+
 @socketio.on("connect")
 def connection():
-    socketio.emit("update_channel_list", {"Channel_List": data_handler.req_channel_list})
-    socketio.emit("sync_state_changed", { "Sync_State": "run" if data_handler.task_thread_started else "stop" })
+    emit("update_channel_list", data_handler.channel_list_publisher.full_list())
+    emit("sync_state_changed", { "Sync_State": "run" if data_handler.is_sync_running() else "stop" })
+    emit("download_progress", data_handler.download_progress_table.snapshot())
+
+
+@socketio.on("get_channel_list")
+def get_channel_list():
+    emit("update_channel_list", data_handler.channel_list_publisher.full_list())
+
+
+@socketio.on("get_sync_reports")
+def get_sync_reports():
+    emit("sync_reports", { "Reports": data_handler.sync_reports.get_summaries() })
+
+
+@socketio.on("get_sync_report")
+def get_sync_report(name):
+    report = data_handler.sync_reports.load(name)
+    if report is not None:
+        emit("sync_report", report)
 
 
 @socketio.on("get_settings")
@@ -1007,14 +3938,17 @@ def get_settings():
         "media_server_library_name": data_handler.media_server_library_name,
         "ignore_ssl_errors": data_handler.ignore_ssl_errors,
         "youtube_slow": data_handler.youtube_slow,
+        "profile_next_sync": data_handler.profile_next_sync,
     }
     socketio.emit("current_settings", data)
 
 
 @socketio.on("save_channel_changes")
 def save_channel_changes(channel_to_be_saved):
-    data_handler.save_channel_changes(channel_to_be_saved)
-    socketio.emit("channel_save_message", "Channel Settings Saved Successfully.")
+    if data_handler.save_channel_changes(channel_to_be_saved):
+        socketio.emit("channel_save_message", "Channel Settings Saved Successfully.")
+    else:
+        socketio.emit("channel_save_message", "Failed to save Channel Settings, see the log for details.")
 
 
 @socketio.on("save_settings")
@@ -1035,7 +3969,7 @@ def pause_channel(channel_to_be_paused):
     else:
         socketio.emit("channel_save_message", "Failed to pause channel")
 
-    socketio.emit("update_channel_list", {"Channel_List": data_handler.req_channel_list})
+    data_handler.emit_channel_refresh()
 
 
 @socketio.on("remove_channel")
@@ -4,6 +4,7 @@ const sync_status_button = document.getElementById("sync-status-button");
 const sync_start_times = document.getElementById("sync-start-times");
 const ignore_ssl_errors = document.getElementById("ignore-ssl-errors");
 const yt_slow = document.getElementById("yt-slow");
+const profile_next_sync = document.getElementById("profile-next-sync");
 const media_server_addresses = document.getElementById("media-server-addresses");
 const media_server_tokens = document.getElementById("media-server-tokens");
 const media_server_library_name = document.getElementById("media-server-library-name");
@@ -11,8 +12,19 @@ const sync_status_button_icon = document.getElementById("sync-status-button-icon
 const add_channel = document.getElementById("add-channel");
 const total_library_size = document.getElementById("total-library-size");
 const channel_table = document.getElementById("channel-table").querySelector("tbody");
+const download_table_container = document.getElementById("download-table");
+const download_table = download_table_container.querySelector("tbody");
 const modal_channel_template = document.getElementById("modal-channel-template").content;
+const sync_reports_modal = document.getElementById("sync-reports-modal");
+const sync_report_select = document.getElementById("sync-report-select");
+const sync_report_profile = document.getElementById("sync-report-profile");
+const sync_report_summary = document.getElementById("sync-report-summary");
+const sync_report_timeline = document.getElementById("sync-report-timeline");
+const SYNC_STAGES = ["counting", "enumeration", "extraction", "download", "postprocessing", "cleanup"];
 let channel_list = [];
+let channel_list_version = 0;
+const channel_rows = new Map();
+const download_rows = new Map();
 const socket = io();
 
 function number_si_suffix( bytes ) {
@@ -27,10 +39,22 @@ function number_si_suffix( bytes ) {
     return `${parseFloat((bytes / Math.pow(k, i)).toFixed(dm))} ${sizes[i]}`
 }
 
+function format_duration( seconds ) {
+    if (seconds === null || seconds === undefined) return "?";
+
+    const minutes = Math.floor(seconds / 60);
+    return minutes >= 60 ? `${Math.floor(minutes / 60)}h ${minutes % 60}m` : `${minutes}m ${Math.floor(seconds % 60)}s`;
+}
+
+function format_span_duration( seconds ) {
+    return seconds < 60 ? `${seconds.toFixed(1)}s` : format_duration(seconds);
+}
+
 function change_filter_description(negate_filter_checkbox, filter_text_description) {
-    filter_text_description.textContent = negate_filter_checkbox.checked
+    filter_text_description.textContent = (negate_filter_checkbox.checked
         ? "Ignore videos with this text in the title."
-        : "Only get videos with this text in the title.";
+        : "Only get videos with this text in the title.")
+        + " Prefix with 'any:' to separate more alternatives with ';' or with 're:' for a regular expression.";
 }
 
 function open_edit_modal(channel_id) {
@@ -89,23 +113,37 @@ function add_row_to_channel_table(channel) {
     const template = document.getElementById("channel-row-template");
     const new_row = document.importNode(template.content, true);
     const row = new_row.querySelector("tr");
+    const channel_id = channel.Id;
 
-    row.id = channel.Id;
-    row.querySelector(".channel-name").innerHTML = "<a class=\"text-decoration-none\" target=\"_blank\" href=\"" + channel.Link + "\">" + channel.Name + "</a>";
-    row.querySelector(".channel-last-synced").textContent = channel.Last_Synced;
-    row.querySelector(".channel-item-count").textContent = channel.Item_Count + " / " + channel.Remote_Count;
-    row.querySelector(".channel-item-size").textContent = number_si_suffix(channel.Item_Size);
+    row.id = channel_id;
 
+    // Channel objects get replaced on full list refresh, so handlers always look up the current one
     const edit_button = row.querySelector(".edit-button");
     edit_button.addEventListener("click", function () {
-        open_edit_modal(channel.Id);
+        open_edit_modal(channel_id);
     });
 
     const remove_button = row.querySelector(".remove-button");
     remove_button.addEventListener("click", function () {
-        remove_channel(channel);
+        remove_channel(channel_list.find(c => c.Id === channel_id));
     });
 
+    const pause_button = row.querySelector(".pause-button");
+    pause_button.addEventListener("click", function () {
+        pause_channel(channel_list.find(c => c.Id === channel_id), pause_button);
+    });
+
+    update_channel_row(row, channel);
+    channel_rows.set(channel_id, row);
+    channel_table.appendChild(row);
+}
+
+function update_channel_row(row, channel) {
+    row.querySelector(".channel-name").innerHTML = "<a class=\"text-decoration-none\" target=\"_blank\" href=\"" + channel.Link + "\">" + channel.Name + "</a>";
+    row.querySelector(".channel-last-synced").textContent = channel.Last_Synced;
+    row.querySelector(".channel-item-count").textContent = channel.Item_Count + " / " + channel.Remote_Count;
+    row.querySelector(".channel-item-size").textContent = number_si_suffix(channel.Item_Size);
+
     const pause_button = row.querySelector(".pause-button");
     const pause_button_icon = row.querySelector(".pause-btn-icon");
 
@@ -121,15 +159,24 @@ function add_row_to_channel_table(channel) {
         pause_button.title = "Channel synchronization enabled, click to pause"
 
     }
-    //pause_button_icon.classList = [ "fa-solid", "fa-pause" ]
-    //pause_button.textContent = channel.Paused ? "Resume" : "Pause";
+}
 
+function remove_channel_row(channel_id) {
+    const row = channel_rows.get(channel_id);
+    if (row) {
+        row.remove();
+        channel_rows.delete(channel_id);
+    }
+}
 
-    pause_button.addEventListener("click", function () {
-        pause_channel(channel, pause_button);
-    });
+function update_total_library_size() {
+    let total_size = 0;
+    for( const channel of channel_list ) {
+        let channel_size = parseInt(channel.Item_Size);
+        if( !isNaN(channel_size) ) total_size += channel_size;
+    }
 
-    channel_table.appendChild(row);
+    total_library_size.textContent = number_si_suffix(total_size);
 }
 
 function remove_channel(channel_to_be_removed) {
@@ -140,10 +187,7 @@ function remove_channel(channel_to_be_removed) {
         const index = channel_list.findIndex(c => c.Id === channel_to_be_removed.Id);
         if (index > -1) {
             channel_list.splice(index, 1);
-            const row = document.getElementById(`${channel_to_be_removed.Id}`);
-            if (row) {
-                row.remove();
-            }
+            remove_channel_row(channel_to_be_removed.Id);
         }
     }
 }
@@ -185,10 +229,10 @@ function save_channel_changes(channel) {
     socket.emit("save_channel_changes", channel_updates);
     const index = channel_list.findIndex(c => c.Id === channel.Id);
     if (index > -1) {
-        channel_list[index] = channel_updates;
-        const row = document.getElementById(channel.Id);
+        Object.assign(channel_list[index], channel_updates);
+        const row = channel_rows.get(channel.Id);
         if (row) {
-            row.querySelector(".channel-name").textContent = channel_updates.Name;
+            update_channel_row(row, channel_list[index]);
         }
     }
 }
@@ -213,6 +257,7 @@ save_changes_button.addEventListener("click", () => {
         "media_server_library_name": media_server_library_name.value,
         "ignore_ssl_errors": ignore_ssl_errors.checked,
         "youtube_slow": yt_slow.checked,
+        "profile_next_sync": profile_next_sync.checked,
     });
 });
 
@@ -239,25 +284,105 @@ socket.on("channel_save_message", function (message) {
 });
 
 socket.on("update_channel_list", function (data) {
-    console.log(data)
-
-    channel_table.innerHTML = "";
     channel_list = data.Channel_List;
-    let total_size = 0;
-    console.log(data);
+    channel_list_version = data.Version;
+
+    // Reuse existing rows, only rows of channels that are gone get removed
+    const current_ids = new Set(channel_list.map(c => c.Id));
+    for( const channel_id of [...channel_rows.keys()] ) {
+        if( !current_ids.has(channel_id) ) remove_channel_row(channel_id);
+    }
+
     for( const channel of channel_list ) {
-        let channel_size = parseInt(channel.Item_Size);
-        if( !isNaN(channel_size) ) total_size += channel_size;
+        const row = channel_rows.get(channel.Id);
+        if( row ) {
+            update_channel_row(row, channel);
+            channel_table.appendChild(row);
+        } else {
+            add_row_to_channel_table(channel);
+        }
+    }
+
+    update_total_library_size();
+});
 
-        add_row_to_channel_table(channel);
+socket.on("channel_list_patch", function (patch) {
+    if( patch.Version !== channel_list_version + 1 ) {
+        // Missed some changes (or got them twice), start over with the full list
+        if( patch.Version > channel_list_version ) socket.emit("get_channel_list");
+        return;
     }
+    channel_list_version = patch.Version;
 
-    total_library_size.textContent = number_si_suffix(total_size);
+    for( const channel_id of patch.Removed ) {
+        const index = channel_list.findIndex(c => c.Id === channel_id);
+        if (index > -1) channel_list.splice(index, 1);
+        remove_channel_row(channel_id);
+    }
+
+    for( const changes of patch.Changed ) {
+        let channel = channel_list.find(c => c.Id === changes.Id);
+        if( channel ) {
+            Object.assign(channel, changes);
+            update_channel_row(channel_rows.get(channel.Id), channel);
+        } else {
+            channel_list.push(changes);
+            add_row_to_channel_table(changes);
+        }
+    }
+
+    if( patch.Order ) {
+        const channels_by_id = new Map(channel_list.map(c => [c.Id, c]));
+        channel_list = patch.Order.map(channel_id => channels_by_id.get(channel_id)).filter(c => c);
+        for( const channel of channel_list ) channel_table.appendChild(channel_rows.get(channel.Id));
+    }
+
+    update_total_library_size();
 });
 
-socket.on("new_channel_added", function (new_channel) {
-    channel_list.push(new_channel);
-    add_row_to_channel_table(new_channel);
+function update_download_row(row, download) {
+    row.querySelector(".download-title").textContent = download.Position ? `${download.Title} [${download.Position}]` : download.Title;
+    row.querySelector(".download-channel").textContent = download.Channel;
+
+    let progress_text;
+    if( download.Status === "starting" ) {
+        progress_text = "Starting";
+    } else if( download.Status === "processing" ) {
+        progress_text = "Processing";
+    } else if( download.Is_Live ) {
+        progress_text = `${number_si_suffix(download.Downloaded_Bytes)} (fragment ${download.Fragment_Index})`;
+    } else if( download.Total_Bytes ) {
+        const percent = Math.min(100, 100 * download.Downloaded_Bytes / download.Total_Bytes);
+        progress_text = `${percent.toFixed(1)}% of ${number_si_suffix(download.Total_Bytes)}`;
+    } else {
+        progress_text = number_si_suffix(download.Downloaded_Bytes);
+    }
+    row.querySelector(".download-progress").textContent = progress_text;
+    row.querySelector(".download-speed").textContent = download.Speed ? `${number_si_suffix(download.Speed)}/s` : "";
+    row.querySelector(".download-eta").textContent = download.Is_Live || download.Status !== "downloading" ? "" : format_duration(download.ETA);
+}
+
+socket.on("download_progress", function (data) {
+    const current_keys = new Set(data.Downloads.map(d => d.Key));
+    for( const [key, row] of download_rows ) {
+        if( !current_keys.has(key) ) {
+            row.remove();
+            download_rows.delete(key);
+        }
+    }
+
+    for( const download of data.Downloads ) {
+        let row = download_rows.get(download.Key);
+        if( !row ) {
+            const template = document.getElementById("download-row-template");
+            row = document.importNode(template.content, true).querySelector("tr");
+            download_rows.set(download.Key, row);
+            download_table.appendChild(row);
+        }
+        update_download_row(row, download);
+    }
+
+    download_table_container.hidden = data.Downloads.length === 0;
 });
 
 socket.on("sync_state_changed", function (sync_state) {
@@ -287,6 +412,87 @@ socket.on("current_settings", function (settings) {
     media_server_library_name.value = settings.media_server_library_name;
     ignore_ssl_errors.checked = settings.ignore_ssl_errors;
     yt_slow.checked = settings.youtube_slow;
+    profile_next_sync.checked = settings.profile_next_sync;
+});
+
+sync_reports_modal.addEventListener("show.bs.modal", function () {
+    socket.emit("get_sync_reports");
+});
+
+sync_report_select.addEventListener("change", () => {
+    socket.emit("get_sync_report", sync_report_select.value);
+});
+
+socket.on("sync_reports", function (data) {
+    sync_report_select.replaceChildren();
+    for( const report of data.Reports ) {
+        const option = document.createElement("option");
+        option.value = report.Name;
+        option.textContent = `${new Date(report.Started * 1000).toLocaleString()} - ${format_span_duration(report.Duration || 0)}, `
+            + `${report.Channels} channels${report.Profile ? " (profiled)" : ""}`;
+        sync_report_select.appendChild(option);
+    }
+
+    if( data.Reports.length ) {
+        socket.emit("get_sync_report", data.Reports[0].Name);
+    } else {
+        sync_report_summary.textContent = "No sync finished yet.";
+        sync_report_timeline.replaceChildren();
+        sync_report_profile.hidden = true;
+    }
+});
+
+function add_timeline_span(track, span, report_duration, class_name) {
+    const [, name, start, duration, attrs] = span;
+    const span_element = document.createElement("div");
+    span_element.className = `timeline-span ${class_name}`;
+    span_element.style.left = `${100 * start / report_duration}%`;
+    span_element.style.width = `${100 * (duration || 0) / report_duration}%`;
+    const details = attrs ? Object.entries(attrs).filter(([key]) => key !== "channel").map(([key, value]) => `${key}: ${value}`) : [];
+    span_element.title = [`${name} ${format_span_duration(duration || 0)}`, ...details].join("\n");
+    track.appendChild(span_element);
+}
+
+socket.on("sync_report", function (report) {
+    // Spans are [parent, name, start, duration, attrs] rows, channels are children of the sync span (index 0)
+    const report_duration = report.Duration || 1;
+    const stage_totals = new Map(SYNC_STAGES.map(stage => [stage, 0]));
+    const tracks = new Map();
+    sync_report_timeline.replaceChildren();
+
+    const channel_spans = report.Spans.map((span, idx) => [idx, span]).filter(([, span]) => span[0] === 0);
+    channel_spans.sort((a, b) => a[1][2] - b[1][2]);
+    for( const [idx, span] of channel_spans ) {
+        const row = document.createElement("div");
+        row.className = "timeline-row";
+        const label = document.createElement("div");
+        label.className = span[4] && span[4].problem ? "timeline-label text-danger" : "timeline-label";
+        label.textContent = `${span[4] ? span[4].channel : span[1]} (${format_span_duration(span[3] || 0)})`;
+        label.title = label.textContent;
+        const track = document.createElement("div");
+        track.className = "timeline-track";
+        add_timeline_span(track, span, report_duration, "timeline-channel");
+        row.append(label, track);
+        sync_report_timeline.appendChild(row);
+        tracks.set(idx, track);
+    }
+
+    for( const span of report.Spans ) {
+        const track = tracks.get(span[0]);
+        if( !track ) continue;
+        stage_totals.set(span[1], (stage_totals.get(span[1]) || 0) + (span[3] || 0));
+        add_timeline_span(track, span, report_duration, span[4] && span[4].failed ? "timeline-failed" : `timeline-${span[1]}`);
+    }
+
+    sync_report_summary.replaceChildren(`Sync took ${format_span_duration(report.Duration || 0)}, time spent in stages:`);
+    for( const [stage, total] of stage_totals ) {
+        const legend = document.createElement("span");
+        legend.className = `timeline-legend timeline-${stage}`;
+        sync_report_summary.append(legend, `${stage} ${format_span_duration(total)}`);
+    }
+
+    sync_report_profile.hidden = !report.Profile;
+    sync_report_profile.href = `sync_reports/${report.Name}.folded`;
 });
 
 
@@ -0,0 +1,54 @@
+"""
+Sync worker - runs scheduled and requested syncs without the web frontend
+
+Any number of these can run next to a web frontend (gunicorn with ARCHIVETUBE_ROLE=web), all sharing the config and
+download folders. They coordinate through config/sync_jobs.db (see SyncJobStore), so every channel is synced by one
+of them at a time. Workers on the same host need distinct ARCHIVETUBE_WORKER_ID (hostname by default) and should not
+share the cache folder. Run from the folder holding config/, downloads/ and audio_downloads/, like the web frontend.
+
+Metrics of the worker's syncs are served on /metrics at ARCHIVETUBE_METRICS_PORT (5000 by default, 0 disables it),
+download progress goes to web frontends through the job store.
+"""
+import os
+import sys
+import time
+
+# ArchiveTube starts its threads according to the role right on import
+os.environ["ARCHIVETUBE_ROLE"] = "worker"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gevent.pywsgi import WSGIServer  # noqa: E402
+
+from src import ArchiveTube  # noqa: E402
+
+METRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def metrics_app( environ, start_response ):
+    """
+    WSGI app serving just /metrics, the worker has no UI
+    """
+    if environ.get("PATH_INFO") != "/metrics":
+        start_response("404 Not Found", [("Content-Type", "text/plain")])
+        return [b"Not found"]
+
+    body = ArchiveTube.data_handler.metrics.render().encode()
+    start_response("200 OK", [("Content-Type", METRICS_CONTENT_TYPE), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def main():
+    log = ArchiveTube.data_handler.log
+    log.warning(f"Sync worker {ArchiveTube.data_handler.worker_id} running")
+
+    metrics_port = int(os.environ.get("ARCHIVETUBE_METRICS_PORT", "5000") or "0")
+    if metrics_port:
+        log.info(f"Serving metrics on port {metrics_port}")
+        WSGIServer(("0.0.0.0", metrics_port), metrics_app, log=None).serve_forever()
+
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+yt-dlp worker process
+
+With ytdlp_worker_processes enabled, ArchiveTube runs yt-dlp in a pool of these processes. The CPU-heavy work (JSON
+parsing, signature deciphering, ...) then doesn't block the event loop of the web server, and a crash or leak in
+yt-dlp takes down just the worker, which gets replaced.
+
+Protocol is one JSON object per line, requests come on stdin and events go to stdout. Each request is answered by any
+number of "progress" and "post" events (yt-dlp hooks) followed by exactly one "result" or "error" event:
+
+    {"op": "extract", "opts": {...}, "url": "...", "process": false}  -> info dict, playlist entries stay in the worker
+    {"op": "entries", "count": 10}                                     -> {"entries": [...], "done": false}
+    {"op": "download", "opts": {...}, "url": "..."}                    -> yt-dlp return code
+    {"op": "process", "opts": {...}, "info": {...}}                    -> null (downloads from already extracted info)
+
+Result events also carry peak memory of the worker. When a request has "sync_progress" set,
+the worker waits for {"op": "ack"} after each progress event, so the parent can throttle downloads in its hook.
+"""
+import json
+import logging
+import os
+import resource
+import sys
+
+import yt_dlp
+
+# Options applied to a cached YoutubeDL instance for each request, all the others select the instance
+PER_ITEM_OPTIONS = ("paths", "outtmpl")
+MAX_INSTANCES = 4
+PROGRESS_FIELDS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta", "elapsed",
+                   "fragment_index", "_percent", "_percent_str", "_total_bytes_str", "_speed_str", "_downloaded_bytes_str")
+
+
+class Worker:
+    def __init__( self, requests, events, log: logging.Logger ):
+        self.requests = requests
+        self.events = events
+        self.log = log
+        # YoutubeDL instances keyed by their options, least recently used first
+        self.instances = {}
+        self.entries = None
+        self.sync_progress = False
+
+    def send( self, event: str, **fields ):
+        self.events.write(json.dumps({ "event": event } | fields, default=repr) + "\n")
+        self.events.flush()
+
+    def get_ydl( self, opts: dict ) -> yt_dlp.YoutubeDL:
+        signature = json.dumps({ key: value for key, value in opts.items() if key not in PER_ITEM_OPTIONS }, sort_keys=True)
+        ydl = self.instances.pop(signature, None)
+        if ydl is not None and opts.get("ignoreerrors"):
+            # Failures don't raise then and download() reports them by a return code that stays set for the rest of
+            # the instance's life, so the instance is used just once
+            ydl.close()
+            ydl = None
+        if ydl is None:
+            while len(self.instances) >= MAX_INSTANCES:
+                self.instances.pop(next(iter(self.instances))).close()
+            ydl = yt_dlp.YoutubeDL(opts | { "logger": self.log, "progress_hooks": [self.on_progress], "post_hooks": [self.on_post] })
+        self.instances[signature] = ydl
+
+        if "paths" in opts:
+            ydl.params["paths"] = opts["paths"]
+        if "outtmpl" in opts:
+            ydl.params["outtmpl"]["default"] = opts["outtmpl"]
+        return ydl
+
+    def on_progress( self, progress_data: dict ):
+        data = { key: progress_data.get(key) for key in PROGRESS_FIELDS }
+        data["info_dict"] = { "is_live": (progress_data.get("info_dict") or {}).get("is_live") }
+        self.send("progress", data=data)
+        if self.sync_progress:
+            self.requests.readline()
+
+    def on_post( self, file_path: str ):
+        self.send("post", path=file_path)
+
+    def next_entries( self, count: int ) -> dict:
+        entries = []
+        for entry in self.entries or ():
+            entries.append(yt_dlp.YoutubeDL.sanitize_info(entry, remove_private_keys=True))
+            if len(entries) >= count:
+                return { "entries": entries, "done": False }
+
+        self.entries = None
+        return { "entries": entries, "done": True }
+
+    def handle( self, request: dict ) -> dict:
+        """
+        Run single request, returns fields of its result event
+        """
+        if request["op"] == "entries":
+            return { "value": self.next_entries(request["count"]) }
+
+        ydl = self.get_ydl(request["opts"])
+        if request["op"] == "extract":
+            info = ydl.extract_info(request["url"], download=False, process=request.get("process", True))
+            has_entries = info.get("entries") is not None
+            if has_entries:
+                # Entries may be a lazy generator fetching further pages, the parent pulls them as it needs them
+                self.entries = iter(info.pop("entries"))
+            value = yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True)
+            return { "value": value, "entries": has_entries }
+
+        elif request["op"] == "download":
+            value = ydl.download([request["url"]])
+
+        elif request["op"] == "process":
+            ydl.process_ie_result(request["info"], download=True)
+            value = None
+
+        else:
+            raise ValueError(f"Unknown request: {request["op"]}")
+
+        return { "value": value }
+
+    def run( self ):
+        for line in self.requests:
+            request = json.loads(line)
+            if request["op"] == "ack":
+                continue
+
+            self.sync_progress = request.get("sync_progress", False)
+            try:
+                result = self.handle(request)
+
+            except Exception as e:
+                # Only these two are told apart by the parent, anything else is just an error
+                if isinstance(e, yt_dlp.utils.ReExtractInfo):
+                    error_type = "ReExtractInfo"
+                elif isinstance(e, yt_dlp.utils.DownloadError):
+                    error_type = "DownloadError"
+                else:
+                    error_type = "Exception"
+                self.send("error", type=error_type, message=str(e))
+
+            else:
+                max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+                self.send("result", max_rss=max_rss, **result)
+
+        for ydl in self.instances.values():
+            ydl.close()
+
+
+def main():
+    # Events go to the original stdout, anything else printing there (yt-dlp, ffmpeg...) ends up in stderr instead
+    events = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    log = logging.getLogger()
+    log.setLevel(logging.DEBUG if os.environ.get("verbose_logs", "false").lower() == "true" else logging.INFO)
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter(f"%(asctime)s.%(msecs)03d [%(levelname).1s]  [worker {os.getpid()}] %(message)s", "%H:%M:%S"))
+    log.addHandler(log_handler)
+
+    Worker(sys.stdin, events, log).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Channel watermarks against the fake extractor from bench/ (synthetic channel, nothing is downloaded)
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIDEO_COUNT = 10
+# Videos already archived, the rest of the channel is missing from its folder
+ARCHIVED_VIDEOS = [ idx for idx in range(VIDEO_COUNT) if idx != 7 ]
+
+ArchiveTube = None
+synthetic_archive = None
+work_folder = None
+
+
+def setUpModule():
+    global ArchiveTube, synthetic_archive, work_folder
+    # ArchiveTube works with folders relative to the current directory and starts right on import
+    work_folder = tempfile.mkdtemp(prefix="archivetube-test-")
+    os.chdir(work_folder)
+    os.environ.pop("XDG_CACHE_HOME", None)
+    sys.path.insert(0, ROOT_FOLDER)
+    sys.path.insert(0, os.path.join(ROOT_FOLDER, "bench"))
+    import fake_ytdlp
+    import synthetic_archive
+    from src import ArchiveTube
+
+    manifest = synthetic_archive.generate_channel_tree(os.path.join(work_folder, "archive"), 1, VIDEO_COUNT)
+    fake_ytdlp.install(manifest)
+
+
+def tearDownModule():
+    os.chdir(ROOT_FOLDER)
+    shutil.rmtree(work_folder, ignore_errors=True)
+
+
+class ChannelWatermarksTest(unittest.TestCase):
+    def setUp( self ):
+        self.data_handler = ArchiveTube.data_handler
+        self.channel = synthetic_archive.channel_entry(0, Id=0, Uid="watermark-test")
+        self.current_channel_files = {
+            "id_list": { synthetic_archive.video_id(0, idx) for idx in ARCHIVED_VIDEOS },
+            "filename_list": set(),
+        }
+        self.addCleanup(self.data_handler.channel_watermarks.remove, self.channel)
+
+    def sync( self, search_limit: int ) -> list:
+        """
+        Enumerate the channel and update its watermark like a sync that downloaded nothing, returns listed IDs
+        """
+        self.channel["Search_Limit"] = search_limit
+        walk_log = []
+        items = self.data_handler.get_list_of_videos_from_youtube(self.channel, self.current_channel_files, walk_log)
+        self.data_handler.channel_watermarks.update(self.channel, walk_log, set())
+        return [ item["id"] for item in items ]
+
+    def test_raised_search_limit_reaches_older_videos( self ):
+        self.assertEqual(self.sync(search_limit=5), [])
+        self.assertEqual(self.sync(search_limit=50), [synthetic_archive.video_id(0, 7)])
+
+    def test_walk_without_search_limit_sets_watermark( self ):
+        self.assertEqual(self.sync(search_limit=0), [synthetic_archive.video_id(0, 7)])
+        # Missing video wasn't downloaded, only the videos older than it are handled for good
+        self.assertEqual(self.data_handler.channel_watermarks.get_ids(self.channel), [ synthetic_archive.video_id(0, idx) for idx in (8, 9) ])
+        self.assertEqual(self.sync(search_limit=0), [synthetic_archive.video_id(0, 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Media server scans against stub Plex and Jellyfin servers (http.server on localhost), nothing else is contacted
+
+    python -m unittest discover tests
+"""
+import base64
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.parse
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIBRARY_NAME = "YouTube"
+# Library locations as the media server sees them and channel folders in each
+SERVER_FOLDERS = {
+    "/media/youtube": ["Video Channel", "Other Channel"],
+    "/media/youtube-audio": ["Audio Channel"],
+}
+
+ArchiveTube = None
+work_folder = None
+
+
+def setUpModule():
+    global ArchiveTube, work_folder
+    # ArchiveTube works with folders relative to the current directory and starts right on import
+    work_folder = tempfile.mkdtemp(prefix="archivetube-test-")
+    os.chdir(work_folder)
+    os.environ.pop("XDG_CACHE_HOME", None)
+    sys.path.insert(0, ROOT_FOLDER)
+    from src import ArchiveTube
+
+
+def tearDownModule():
+    os.chdir(ROOT_FOLDER)
+    shutil.rmtree(work_folder, ignore_errors=True)
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """
+    Records every request, responses come from the handle(method, path, query, body) -> (status, content_type, body)
+    """
+
+    def __init__( self, handle ):
+        self.handle = handle
+        self.requests = []
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def address( self ) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def paths( self, method: str, path: str ) -> list:
+        return [ request for request in self.requests if request[0] == method and request[1] == path ]
+
+
+class StubRequestHandler(http.server.BaseHTTPRequestHandler):
+    def respond( self, method: str ):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((method, url.path, query, body))
+        status, content_type, content = self.server.handle(method, url.path, query, body)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET( self ):
+        self.respond("GET")
+
+    def do_POST( self ):
+        self.respond("POST")
+
+    def log_message( self, *args ):
+        pass
+
+
+def jellyfin_stub( media_updated_status: int = 204 ):
+    def handle( method, path, query, body ):
+        if path == "/Library/VirtualFolders":
+            library = { "Name": LIBRARY_NAME, "Locations": list(SERVER_FOLDERS) }
+            return 200, "application/json", json.dumps([library]).encode()
+        if path == "/Environment/DirectoryContents":
+            location = query["path"][0]
+            entries = [ { "Name": name, "Path": f"{location}/{name}", "Type": "Directory" } for name in SERVER_FOLDERS.get(location, []) ]
+            return 200, "application/json", json.dumps(entries).encode()
+        if path == "/Library/Media/Updated":
+            return media_updated_status, "text/plain", b""
+        if path == "/Library/Refresh":
+            return 204, "text/plain", b""
+        return 404, "text/plain", b"Not found"
+
+    return StubServer(handle)
+
+
+def plex_stub( refresh_fails: bool = False ):
+    sections = "".join(f'<Location id="{idx}" path="{location}"/>' for idx, location in enumerate(SERVER_FOLDERS, start=1))
+
+    def handle( method, path, query, body ):
+        if path == "/":
+            return 200, "text/xml", b'<MediaContainer machineIdentifier="stub" version="1.40.0.0" friendlyName="stub"/>'
+        if path == "/library":
+            return 200, "text/xml", b'<MediaContainer title1="Plex Library"/>'
+        if path == "/library/sections":
+            return 200, "text/xml", (f'<MediaContainer><Directory key="1" type="movie" title="{LIBRARY_NAME}">{sections}'
+                                     f'</Directory></MediaContainer>').encode()
+        if path.startswith("/services/browse/"):
+            location = base64.b64decode(path.rsplit("/", 1)[1]).decode()
+            folders = "".join(f'<Path key="/services/browse/x" path="{location}/{name}" title="{name}"/>' for name in SERVER_FOLDERS.get(location, []))
+            return 200, "text/xml", f"<MediaContainer>{folders}</MediaContainer>".encode()
+        if path == "/library/sections/1/refresh":
+            if refresh_fails and "path" in query:
+                return 500, "text/plain", b"Scan failed"
+            return 200, "text/xml", b"<MediaContainer/>"
+        return 404, "text/plain", b"Not found"
+
+    return StubServer(handle)
+
+
+class MediaServerScanTest(unittest.TestCase):
+    def setUp( self ):
+        self.data_handler = ArchiveTube.data_handler
+        self.data_handler.media_server_library_name = LIBRARY_NAME
+        self.data_handler.plex_servers.clear()
+        self.changed_folders = [
+            os.path.join(self.data_handler.download_folder, "Video Channel"),
+            os.path.join(self.data_handler.audio_download_folder, "Audio Channel"),
+        ]
+
+    def configure( self, server_name: str, server: StubServer ):
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.data_handler.media_server_addresses = f"{server_name}: {server.address}"
+        self.data_handler.media_server_tokens = f"{server_name}: stub-token"
+
+    def test_jellyfin_scans_changed_folders_in_their_locations( self ):
+        server = jellyfin_stub()
+        self.configure("Jellyfin", server)
+        self.data_handler.sync_media_servers(self.changed_folders)
+
+        updates = json.loads(server.paths("POST", "/Library/Media/Updated")[0][3])["Updates"]
+        self.assertEqual(sorted(update["Path"] for update in updates), ["/media/youtube-audio/Audio Channel", "/media/youtube/Video Channel"])
+        self.assertEqual(server.paths("POST", "/Library/Refresh"), [])
+
+    def test_jellyfin_refreshes_library_when_folder_is_unknown( self ):
+        server = jellyfin_stub()
+        self.configure("Jellyfin", server)
+        self.data_handler.sync_media_servers([os.path.join(self.data_handler.download_folder, "New Channel")])
+
+        self.assertEqual(server.paths("POST", "/Library/Media/Updated"), [])
+        self.assertEqual(len(server.paths("POST", "/Library/Refresh")), 1)
+
+    def test_jellyfin_refreshes_library_when_partial_scan_fails( self ):
+        server = jellyfin_stub(media_updated_status=500)
+        self.configure("Jellyfin", server)
+        self.data_handler.sync_media_servers(self.changed_folders)
+
+        self.assertEqual(len(server.paths("POST", "/Library/Refresh")), 1)
+
+    def test_jellyfin_refreshes_library_without_changed_folders( self ):
+        server = jellyfin_stub()
+        self.configure("Jellyfin", server)
+        self.data_handler.sync_media_servers()
+
+        self.assertEqual(server.paths("GET", "/Library/VirtualFolders"), [])
+        self.assertEqual(len(server.paths("POST", "/Library/Refresh")), 1)
+
+    def test_plex_scans_changed_folders_in_their_locations( self ):
+        server = plex_stub()
+        self.configure("Plex", server)
+        self.data_handler.sync_media_servers(self.changed_folders)
+
+        scans = [ query.get("path", [None])[0] for _, _, query, _ in server.paths("GET", "/library/sections/1/refresh") ]
+        self.assertEqual(sorted(scans), ["/media/youtube-audio/Audio Channel", "/media/youtube/Video Channel"])
+
+    def test_plex_scans_whole_library_when_partial_scan_fails( self ):
+        server = plex_stub(refresh_fails=True)
+        self.configure("Plex", server)
+        self.data_handler.sync_media_servers(self.changed_folders)
+
+        scans = [ query.get("path", [None])[0] for _, _, query, _ in server.paths("GET", "/library/sections/1/refresh") ]
+        self.assertEqual(scans[-1], None)
+
+
+if __name__ == "__main__":
+    unittest.main()